@@ -0,0 +1,100 @@
+"""IVF ANN indeksinin tam aramaya karşı recall@k ve gecikme ölçümü.
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_ann --rows 100000 --dim 384 --nprobe 4 8 16 32
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from shared.ann import IVFIndex
+
+
+def clustered_vectors(rows: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Gerçek embedding'lere benzer şekilde kümelenmiş, normalize vektörler."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, size=rows)] + 0.6 * rng.normal(size=(rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def percentile_ms(samples, q: float) -> float:
+    return float(np.percentile(np.asarray(samples) * 1000.0, q))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0, help="0 = 4*sqrt(rows)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Sonucu JSON olarak yaz")
+    args = parser.parse_args()
+
+    data = clustered_vectors(args.rows, args.dim, clusters=max(args.rows // 500, 8), seed=args.seed)
+    queries = clustered_vectors(args.queries, args.dim, clusters=max(args.rows // 500, 8), seed=args.seed)
+    # Sorgular veri kümeleriyle aynı merkezlerden gelsin
+    queries = data[np.random.default_rng(args.seed + 1).choice(args.rows, args.queries, replace=False)] + 0.05 * queries
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    keys = np.arange(args.rows, dtype=np.int64)
+
+    def fetch(selected: np.ndarray) -> np.ndarray:
+        return data[selected]
+
+    exact_ids, exact_times = [], []
+    for q in queries:
+        start = time.perf_counter()
+        scores = data @ q
+        top = np.argpartition(-scores, args.k - 1)[:args.k]
+        exact_times.append(time.perf_counter() - start)
+        exact_ids.append(set(top.tolist()))
+
+    nlist = args.nlist or int(4 * np.sqrt(args.rows))
+    start = time.perf_counter()
+    index = IVFIndex(nlist=nlist)
+    index.train(data)
+    index.add(keys, data)
+    build_seconds = time.perf_counter() - start
+
+    result = {
+        "rows": args.rows,
+        "dim": args.dim,
+        "k": args.k,
+        "nlist": index.nlist,
+        "build_seconds": build_seconds,
+        "exact": {"p50_ms": percentile_ms(exact_times, 50), "p99_ms": percentile_ms(exact_times, 99)},
+        "ivf": [],
+    }
+    for nprobe in args.nprobe:
+        times, recalls = [], []
+        for q, truth in zip(queries, exact_ids):
+            start = time.perf_counter()
+            found, _ = index.search(q, args.k, fetch, nprobe=nprobe)
+            times.append(time.perf_counter() - start)
+            recalls.append(len(truth & set(found.tolist())) / args.k)
+        result["ivf"].append({
+            "nprobe": nprobe,
+            "recall_at_k": float(np.mean(recalls)),
+            "p50_ms": percentile_ms(times, 50),
+            "p99_ms": percentile_ms(times, 99),
+        })
+
+    if args.json:
+        print(json.dumps(result))
+        return
+    print(f"rows={args.rows} dim={args.dim} k={args.k} nlist={index.nlist} build={build_seconds:.2f}s")
+    print(f"exact        p50={result['exact']['p50_ms']:.2f}ms p99={result['exact']['p99_ms']:.2f}ms")
+    for row in result["ivf"]:
+        print(
+            f"ivf nprobe={row['nprobe']:<3} recall@{args.k}={row['recall_at_k']:.3f} "
+            f"p50={row['p50_ms']:.2f}ms p99={row['p99_ms']:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Metin çıkarma mikro-benchmark'ı.
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_extraction --paragraphs 20000 --table-density 0.3
+"""
+import argparse
+import json
+import time
+from typing import Dict, Any, List
+
+from benchmarks.synthetic_docs import make_document
+from google_docs.extraction import extract_document
+
+
+def _legacy_extract(raw_doc: Dict[str, Any]) -> str:
+    """Eski davranış: yalnızca üst seviye paragraflar (tablolar atlanır)."""
+    acc: List[str] = []
+    for el in raw_doc.get("body", {}).get("content", []):
+        para = el.get("paragraph")
+        if not para:
+            continue
+        for elem in para.get("elements", []):
+            content = elem.get("textRun", {}).get("content", "")
+            if content:
+                acc.append(content)
+    return "".join(acc).strip()
+
+
+def _best_of(fn, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--table-density", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Sonucu JSON olarak yaz")
+    args = parser.parse_args()
+
+    doc = make_document(paragraphs=args.paragraphs, table_density=args.table_density)
+    extracted = extract_document(doc)
+    legacy_text = _legacy_extract(doc)
+    result = {
+        "paragraphs": args.paragraphs,
+        "table_density": args.table_density,
+        "legacy_seconds": _best_of(_legacy_extract, doc, args.repeat),
+        "legacy_chars": len(legacy_text),
+        "extract_seconds": _best_of(extract_document, doc, args.repeat),
+        "extract_chars": len(extracted.text),
+        "headings": len(extracted.headings),
+        "paragraph_offsets": len(extracted.paragraph_offsets),
+    }
+    if args.json:
+        print(json.dumps(result))
+        return
+    for key, value in result.items():
+        print(f"{key:>18}: {value:.4f}" if isinstance(value, float) else f"{key:>18}: {value}")
+
+
+if __name__ == "__main__":
+    main()
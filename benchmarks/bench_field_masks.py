@@ -0,0 +1,43 @@
+"""Alan maskesi profillerine göre documents.get yanıt boyutlarını ölçer (gerçek API).
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_field_masks --credentials credentials.json DOC_ID [DOC_ID ...]
+"""
+import argparse
+import json
+import time
+
+from google_docs.client_pool import CLIENT_POOL, FIELD_MASK_PROFILES
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("document_ids", nargs="+")
+    parser.add_argument("--credentials", required=True, help="Service account JSON key path")
+    parser.add_argument("--profiles", nargs="+", default=list(FIELD_MASK_PROFILES))
+    parser.add_argument("--json", action="store_true", help="Sonucu JSON olarak yaz")
+    args = parser.parse_args()
+
+    client = CLIENT_POOL.get(credentials_path=args.credentials)
+    client.transfer_stats.reset()
+    seconds = {}
+    for profile in args.profiles:
+        start = time.perf_counter()
+        for doc_id in args.document_ids:
+            client.get_document(doc_id, fields=profile)
+        seconds[profile] = time.perf_counter() - start
+
+    stats = client.transfer_stats.snapshot()
+    result = {
+        profile: {**stats.get(profile, {"requests": 0, "bytes": 0}), "seconds": seconds[profile]}
+        for profile in args.profiles
+    }
+    if args.json:
+        print(json.dumps(result))
+        return
+    for profile, row in result.items():
+        print(f"{profile:>10}: {row['requests']} requests, {row['bytes']:,} bytes, {row['seconds']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Uçtan uca ingestion benchmark'ı: sahte Docs sunucusu + sentetik corpus, aşama başına throughput.
+
+Aşamalar: fetch_document (sıralı), get_documents (eşzamanlı), extraction,
+build_nodes_from_documents, (--dedup-threshold ile) near-duplicate tespiti,
+embedding ve index build. Ağ ya da gerçek kimlik gerekmez.
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_pipeline --docs 200 --latency 0.05 --json --output run.json
+    python -m benchmarks.bench_pipeline --docs 200 --compare run.json
+    python -m benchmarks.bench_pipeline --docs 200 --duplicate-rate 0.3 --dedup-threshold 0.9
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from llama_index.core import Settings, StorageContext, VectorStoreIndex
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.schema import MetadataMode
+
+from benchmarks.fake_docs_server import FakeDocsServer
+from benchmarks.synthetic_docs import make_corpus
+from google_docs.client_pool import CLIENT_POOL
+from google_docs.docs_reader import GoogleDocsConfigReader
+from google_docs.downloader import fetch_document
+from google_docs.extraction import extract_document
+from shared.config import SETTINGS
+from shared.dedup import DedupIndex
+from shared.llama_utils import build_nodes_from_documents, setup_llama_index
+
+RESULT_VERSION = 1
+
+
+def _timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def _stage(seconds: float, items: int, unit: str, **extra: Any) -> Dict[str, Any]:
+    return {
+        "seconds": seconds,
+        "items": items,
+        "unit": unit,
+        "items_per_second": items / seconds if seconds > 0 else None,
+        **extra,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _embed_model(kind: str, dim: int):
+    if kind == "mock":
+        return MockEmbedding(embed_dim=dim)
+    setup_llama_index()
+    return Settings.embed_model
+
+
+def _vector_store(kind: str, path: str):
+    if kind == "numpy":
+        from shared.vector_store import NumpyVectorStore
+
+        return NumpyVectorStore(path)
+    return None
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    corpus = make_corpus(
+        args.docs,
+        min_paragraphs=args.min_paragraphs,
+        max_paragraphs=args.max_paragraphs,
+        max_table_density=args.max_table_density,
+        seed=args.seed,
+        duplicate_rate=args.duplicate_rate,
+    )
+    doc_ids = list(corpus)
+    stages: Dict[str, Dict[str, Any]] = {}
+
+    # Limiter'lar istemciyle birlikte kurulur; evict'ten önce ayarlanmalı
+    SETTINGS.api_rate_per_second = args.rate
+    with FakeDocsServer(
+        corpus,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        seed=args.seed,
+    ) as server:
+        info = server.service_account_info()
+        CLIENT_POOL.evict(service_account_info=info)
+
+        sample = doc_ids[: args.sequential_docs]
+        raws, seconds = _timed(
+            lambda: [
+                fetch_document(d, service_account_info=info, api_endpoint=server.endpoint) for d in sample
+            ]
+        )
+        stages["fetch_document"] = _stage(
+            seconds, len(sample), "docs", errors=sum(r is None for r in raws)
+        )
+
+        server.reset_stats()
+        reader = GoogleDocsConfigReader(
+            data_source_id="benchmark",
+            config={
+                "service_account_dict": info,
+                "document_ids": doc_ids,
+                "inclusion_rules": [],
+                "exclusion_rules": [],
+                "api_endpoint": server.endpoint,
+                "max_workers": args.workers,
+            },
+        )
+        documents, seconds = _timed(reader.get_documents)
+        stages["get_documents"] = _stage(
+            seconds,
+            len(doc_ids),
+            "docs",
+            errors=len(reader.fetch_errors),
+            server=dict(server.stats),
+        )
+
+    raw_docs = list(corpus.values())
+    extracted, seconds = _timed(lambda: [extract_document(raw) for raw in raw_docs])
+    stages["extraction"] = _stage(
+        seconds, len(raw_docs), "docs", chars=sum(len(e.text) for e in extracted)
+    )
+
+    # Chunk cache kapalı: her çalıştırma chunking maliyetini ölçer
+    SETTINGS.chunk_cache_path = None
+    nodes, seconds = _timed(
+        lambda: build_nodes_from_documents(
+            documents,
+            chunk_size=SETTINGS.chunk_size,
+            chunk_overlap=SETTINGS.chunk_overlap,
+            strategy=args.chunk_strategy,
+            workers=args.chunk_workers,
+        )
+    )
+    stages["build_nodes"] = _stage(
+        seconds, len(documents), "docs", nodes=len(nodes), strategy=args.chunk_strategy
+    )
+
+    if args.dedup_threshold > 0:
+        dedup = DedupIndex(":memory:", threshold=args.dedup_threshold)
+        (nodes, duplicates), seconds = _timed(lambda: dedup.assign(nodes))
+        stages["dedup"] = _stage(
+            seconds,
+            len(nodes) + len(duplicates),
+            "nodes",
+            duplicates=len(duplicates),
+            threshold=args.dedup_threshold,
+        )
+
+    embed_model = _embed_model(args.embed, args.embed_dim)
+    texts = [n.get_content(metadata_mode=MetadataMode.EMBED) for n in nodes]
+    vectors, seconds = _timed(lambda: embed_model.get_text_embedding_batch(texts))
+    for node, vector in zip(nodes, vectors):
+        node.embedding = vector
+    stages["embedding"] = _stage(seconds, len(nodes), "nodes", model=args.embed)
+
+    def build_index():
+        store = _vector_store(args.store, args.store_path)
+        storage = StorageContext.from_defaults(vector_store=store)
+        return VectorStoreIndex(nodes, storage_context=storage, embed_model=embed_model)
+
+    _, seconds = _timed(build_index)
+    stages["index_build"] = _stage(seconds, len(nodes), "nodes", store=args.store)
+
+    return {
+        "version": RESULT_VERSION,
+        "commit": _git_commit(),
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": {
+            k: v for k, v in vars(args).items() if k not in ("json", "output", "compare", "max_regression")
+        },
+        "stages": stages,
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Aşama throughput'larını baseline ile karşılaştırır; eşiği aşan gerilemeleri döner."""
+    regressions = []
+    for name, stage in result["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if not base or not base.get("items_per_second") or not stage.get("items_per_second"):
+            continue
+        ratio = stage["items_per_second"] / base["items_per_second"]
+        stage["baseline_ratio"] = ratio
+        if ratio < 1.0 - max_regression:
+            regressions.append(f"{name}: {ratio:.2f}x of baseline {baseline.get('commit', '?')}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--sequential-docs", type=int, default=20, help="fetch_document aşamasındaki belge sayısı")
+    parser.add_argument("--min-paragraphs", type=int, default=20)
+    parser.add_argument("--max-paragraphs", type=int, default=400)
+    parser.add_argument("--max-table-density", type=float, default=0.4)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0,
+                        help="Önceki bir belgenin kopyası (tek paragrafı değişmiş) olan belge oranı")
+    parser.add_argument("--dedup-threshold", type=float, default=0.0,
+                        help="> 0 ise chunk'lar embed edilmeden önce MinHash/LSH ile elenir")
+    parser.add_argument("--latency", type=float, default=0.05, help="Sunucu yanıt gecikmesi (sn)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 yanıt olasılığı")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="429 yanıt olasılığı")
+    parser.add_argument("--workers", type=int, default=SETTINGS.fetch_max_workers)
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="Kimlik başına istek/sn sınırı (0 = sınırsız; gerçek kota için 5)")
+    parser.add_argument("--chunk-strategy", choices=("structure", "sentence"), default=SETTINGS.chunk_strategy)
+    parser.add_argument("--chunk-workers", type=int, default=SETTINGS.chunk_workers,
+                        help="Chunking process havuzu (0 = aynı process)")
+    parser.add_argument("--embed", choices=("mock", "model"), default="mock",
+                        help="mock: MockEmbedding (yalnızca pipeline maliyeti), model: setup_llama_index modeli")
+    parser.add_argument("--embed-dim", type=int, default=384)
+    parser.add_argument("--store", choices=("simple", "numpy"), default="simple")
+    parser.add_argument("--store-path", default=".bench_vector_store")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Sonucu JSON olarak yaz")
+    parser.add_argument("--output", help="JSON sonucu bu dosyaya da yaz")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki JSON sonucu")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="--compare ile izin verilen en fazla throughput düşüşü (0.2 = %%20)")
+    args = parser.parse_args()
+
+    result = run(args)
+    regressions = []
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.max_regression)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"commit={result['commit']} docs={args.docs} latency={args.latency}s workers={args.workers}")
+        for name, stage in result["stages"].items():
+            rate = stage["items_per_second"]
+            line = f"{name:>15}: {stage['seconds']:8.3f}s  {stage['items']:>6} {stage['unit']:<5}"
+            line += f" {rate:10.1f}/s" if rate else ""
+            if "baseline_ratio" in stage:
+                line += f"  ({stage['baseline_ratio']:.2f}x baseline)"
+            print(line)
+    for line in regressions:
+        print(f"[REGRESSION] {line}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
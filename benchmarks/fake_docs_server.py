@@ -0,0 +1,288 @@
+"""Google Docs API documents.get için yerel sahte HTTP sunucusu (benchmark'lar ve testler için).
+
+OAuth token endpoint'ini de sunar; service_account_info() ile üretilen kimlik
+doğrudan GoogleDocsConfigReader config'ine ya da CLIENT_POOL'a verilebilir.
+FakeDrive verilirse Drive v3 files.list ve changes feed uçları da sunulur.
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+_METADATA_KEYS = ("documentId", "title", "revisionId")
+_FOLDER_MIME = "application/vnd.google-apps.folder"
+_DOCUMENT_MIME = "application/vnd.google-apps.document"
+_PARENT_RE = re.compile(r"'([^']+)' in parents")
+
+
+class FakeDrive:
+    """Bellekte klasör / Docs dosyaları ve changes feed tutan sahte Drive.
+
+    Her değişiklik (ekleme, güncelleme, taşıma, silme) feed'e eklenir; page token
+    feed'deki sıradır. files.list yalnızca q'daki "'<id>' in parents" koşullarını
+    ve trashed alanını dikkate alır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.changes: List[Dict[str, Any]] = []
+        self._clock = 0
+
+    def _touch(self, file_id: str, removed: bool = False) -> None:
+        self._clock += 1
+        item = self.files.get(file_id)
+        if item is not None:
+            item["modifiedTime"] = f"2024-01-01T00:00:{self._clock:02d}Z"
+        self.changes.append({"fileId": file_id, "removed": removed, "file": None if removed else dict(item)})
+
+    def add_folder(self, folder_id: str, parent: Optional[str] = None) -> None:
+        self.put(folder_id, name=folder_id, mimeType=_FOLDER_MIME, parents=[parent] if parent else [])
+
+    def add_document(self, doc_id: str, parent: str, name: Optional[str] = None) -> None:
+        self.put(doc_id, name=name or doc_id, mimeType=_DOCUMENT_MIME, parents=[parent])
+
+    def put(self, file_id: str, **fields: Any) -> None:
+        """Dosyayı ekler ya da alanlarını günceller (örn. parents=[...] taşır, trashed=True çöpe atar)."""
+        with self._lock:
+            item = self.files.setdefault(file_id, {"id": file_id, "trashed": False})
+            item.update(fields)
+            self._touch(file_id)
+
+    def remove(self, file_id: str) -> None:
+        with self._lock:
+            self.files.pop(file_id, None)
+            self._touch(file_id, removed=True)
+
+    def list_files(self, query: str, page_token: Optional[str], page_size: int) -> Dict[str, Any]:
+        parents = set(_PARENT_RE.findall(query))
+        with self._lock:
+            matches = [
+                dict(item) for item in self.files.values()
+                if not item.get("trashed") and parents.intersection(item.get("parents", []))
+            ]
+        start = int(page_token or 0)
+        response: Dict[str, Any] = {"files": matches[start:start + page_size]}
+        if start + page_size < len(matches):
+            response["nextPageToken"] = str(start + page_size)
+        return response
+
+    def start_page_token(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"startPageToken": str(len(self.changes))}
+
+    def list_changes(self, page_token: str, page_size: int) -> Dict[str, Any]:
+        start = int(page_token)
+        with self._lock:
+            page = self.changes[start:start + page_size]
+            end = start + len(page)
+            response: Dict[str, Any] = {"changes": [dict(c) for c in page]}
+            if end < len(self.changes):
+                response["nextPageToken"] = str(end)
+            else:
+                response["newStartPageToken"] = str(end)
+        return response
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Varsayılan listen backlog (5) eşzamanlı fetch'lerde bağlantı hatası üretir
+    request_queue_size = 256
+
+
+class FakeDocsServer:
+    """corpus'taki belgeleri documents.get gibi sunan sunucu.
+
+    - latency / jitter: her yanıt öncesi latency + U(0, jitter) saniye bekleme
+    - error_rate: bu olasılıkla 500 döner
+    - rate_429: bu olasılıkla Retry-After başlıklı 429 döner
+    - fields parametresi "body" içermiyorsa yalnızca metadata alanları döner
+    - corpus'ta olmayan belge için 404, unavailable'daki belgeler için her zaman 500
+    - drive verilirse files.list, changes.getStartPageToken ve changes.list uçları
+    stats sayaçları (istek, durum kodu başına yanıt, byte, aynı anda işlenen en fazla
+    belge isteği: max_in_flight) thread-safe tutulur.
+    """
+
+    def __init__(
+        self,
+        corpus: Dict[str, Dict[str, Any]],
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_429: float = 0.0,
+        retry_after: float = 1.0,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        drive: Optional[FakeDrive] = None,
+        unavailable: Iterable[str] = (),
+    ):
+        self.corpus = corpus
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.drive = drive
+        self.unavailable = set(unavailable)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._encoded: Dict[str, bytes] = {}
+        self.stats: Dict[str, int] = {"requests": 0, "bytes": 0, "max_in_flight": 0}
+        self._in_flight = 0
+        self._httpd = _Server((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "FakeDocsServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake_docs", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeDocsServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = {"requests": 0, "bytes": 0, "max_in_flight": 0}
+
+    def service_account_info(self) -> Dict[str, Any]:
+        """Bu sunucunun token endpoint'ine bağlı, geçerli formatta service account kimliği."""
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode()
+        return {
+            "type": "service_account",
+            "project_id": "benchmark",
+            "private_key_id": "benchmark-key",
+            "private_key": pem,
+            "client_email": "benchmark@benchmark.iam.gserviceaccount.com",
+            "client_id": "0",
+            "auth_uri": f"{self.endpoint}auth",
+            "token_uri": f"{self.endpoint}token",
+            "auth_provider_x509_cert_url": f"{self.endpoint}certs",
+            "client_x509_cert_url": f"{self.endpoint}certs/benchmark",
+            "universe_domain": "googleapis.com",
+        }
+
+    def _record(self, status: int, nbytes: int) -> None:
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += nbytes
+            self.stats[str(status)] = self.stats.get(str(status), 0) + 1
+
+    def _enter(self, delta: int) -> None:
+        with self._lock:
+            self._in_flight += delta
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self._in_flight)
+
+    def _roll(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def _body(self, doc_id: str, fields: Optional[str]) -> Optional[bytes]:
+        doc = self.corpus.get(doc_id)
+        if doc is None:
+            return None
+        if fields and "body" not in fields:
+            return json.dumps({k: doc[k] for k in _METADATA_KEYS if k in doc}).encode()
+        body = self._encoded.get(doc_id)
+        if body is None:
+            body = self._encoded[doc_id] = json.dumps(doc).encode()
+        return body
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                server._record(status, len(body))
+
+            def _error(self, status: int, message: str, headers: Optional[Dict[str, str]] = None) -> None:
+                body = json.dumps({"error": {"code": status, "message": message}}).encode()
+                self._send(status, body, headers)
+
+            def do_POST(self):
+                # OAuth token endpoint (service account JWT grant)
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                body = json.dumps({"access_token": "fake", "expires_in": 3600, "token_type": "Bearer"})
+                self._send(200, body.encode())
+
+            def _drive(self, path: str, query: Dict[str, List[str]]) -> None:
+                drive = server.drive
+                page_size = int(query.get("pageSize", ["100"])[0])
+                page_token = query.get("pageToken", [None])[0]
+                if path == "/files":
+                    response = drive.list_files(query.get("q", [""])[0], page_token, page_size)
+                elif path == "/changes/startPageToken":
+                    response = drive.start_page_token()
+                else:
+                    response = drive.list_changes(page_token or "0", page_size)
+                self._send(200, json.dumps(response).encode())
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if server.drive is not None and url.path in ("/files", "/changes", "/changes/startPageToken"):
+                    self._drive(url.path, parse_qs(url.query))
+                    return
+                if not url.path.startswith("/v1/documents/"):
+                    self._error(404, "Not found")
+                    return
+                # Eşzamanlılık yalnızca gecikme süresince sayılır (yanıt yazılmadan önce biter)
+                server._enter(1)
+                try:
+                    delay = server.latency + (server._roll() * server.jitter if server.jitter else 0.0)
+                    if delay:
+                        time.sleep(delay)
+                finally:
+                    server._enter(-1)
+                roll = server._roll()
+                if roll < server.rate_429:
+                    self._error(429, "Quota exceeded", {"Retry-After": f"{server.retry_after:g}"})
+                    return
+                if roll < server.rate_429 + server.error_rate:
+                    self._error(500, "Backend error")
+                    return
+                doc_id = unquote(url.path[len("/v1/documents/"):])
+                if doc_id in server.unavailable:
+                    self._error(500, "Backend error")
+                    return
+                fields = parse_qs(url.query).get("fields", [None])[0]
+                body = server._body(doc_id, fields)
+                if body is None:
+                    self._error(404, f"Requested entity was not found: {doc_id}")
+                    return
+                self._send(200, body)
+
+        return Handler
@@ -0,0 +1,120 @@
+"""Google Docs API (documents.get) yanıtına benzeyen sentetik belge üretici."""
+import copy
+import random
+from typing import Dict, Any, List
+
+_WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua ticket release deploy customer "
+    "invoice report quarterly roadmap backlog sprint review"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _paragraph(text: str, style: str = "NORMAL_TEXT", runs: int = 3) -> Dict[str, Any]:
+    # Metni birkaç textRun'a böl (gerçek belgelerde stil değişimleri run'ları böler)
+    step = max(len(text) // runs, 1)
+    pieces = [text[i:i + step] for i in range(0, len(text), step)] or [""]
+    pieces[-1] += "\n"
+    return {
+        "paragraph": {
+            "elements": [
+                {"textRun": {"content": p, "textStyle": {"bold": i % 2 == 0}}}
+                for i, p in enumerate(pieces)
+            ],
+            "paragraphStyle": {"namedStyleType": style, "direction": "LEFT_TO_RIGHT"},
+        }
+    }
+
+
+def _table(rng: random.Random, rows: int, cols: int) -> Dict[str, Any]:
+    return {
+        "table": {
+            "rows": rows,
+            "columns": cols,
+            "tableRows": [
+                {
+                    "tableCells": [
+                        {"content": [_paragraph(_sentence(rng, rng.randint(2, 8)), runs=1)]}
+                        for _ in range(cols)
+                    ]
+                }
+                for _ in range(rows)
+            ],
+        }
+    }
+
+
+def make_document(
+    doc_id: str = "synthetic",
+    paragraphs: int = 200,
+    table_density: float = 0.1,
+    table_rows: int = 5,
+    table_cols: int = 4,
+    heading_every: int = 20,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """paragraphs kadar blok üretir; her blok table_density olasılıkla tablo olur."""
+    rng = random.Random(seed)
+    content: List[Dict[str, Any]] = [{"sectionBreak": {"sectionStyle": {}}}]
+    for i in range(paragraphs):
+        if heading_every and i % heading_every == 0:
+            content.append(_paragraph(f"Section {i // heading_every + 1}", style="HEADING_1", runs=1))
+        if rng.random() < table_density:
+            content.append(_table(rng, table_rows, table_cols))
+        else:
+            content.append(_paragraph(" ".join(_sentence(rng, rng.randint(6, 20)) for _ in range(3))))
+    return {
+        "documentId": doc_id,
+        "title": f"Synthetic {doc_id}",
+        "revisionId": f"rev-{seed}",
+        "body": {"content": content},
+        "documentStyle": {"pageSize": {"height": {"magnitude": 792, "unit": "PT"}}},
+    }
+
+
+def make_corpus(
+    count: int,
+    min_paragraphs: int = 20,
+    max_paragraphs: int = 400,
+    max_table_density: float = 0.4,
+    seed: int = 0,
+    duplicate_rate: float = 0.0,
+) -> Dict[str, Dict[str, Any]]:
+    """Boyutu ve tablo yoğunluğu değişen count belgelik sentetik corpus (doc_id -> belge).
+
+    Boyutlar log-uniform dağılır: gerçek klasörlerdeki gibi çoğu belge küçük,
+    birkaçı büyüktür. duplicate_rate olasılıkla bir belge önceki bir belgenin
+    kopyasıdır (şablon / fork): gövde aynen alınır, tek bir paragrafı değişir.
+    Aynı seed her zaman aynı corpus'u üretir.
+    """
+    rng = random.Random(seed)
+    corpus: Dict[str, Dict[str, Any]] = {}
+    for i in range(count):
+        doc_id = f"doc-{seed}-{i:05d}"
+        paragraphs = int(round(min_paragraphs * (max_paragraphs / min_paragraphs) ** rng.random()))
+        if duplicate_rate and corpus and rng.random() < duplicate_rate:
+            corpus[doc_id] = _fork_document(corpus[rng.choice(sorted(corpus))], doc_id, rng)
+            continue
+        corpus[doc_id] = make_document(
+            doc_id=doc_id,
+            paragraphs=paragraphs,
+            table_density=rng.uniform(0.0, max_table_density),
+            seed=seed * 1_000_003 + i,
+        )
+    return corpus
+
+
+def _fork_document(source: Dict[str, Any], doc_id: str, rng: random.Random) -> Dict[str, Any]:
+    doc = copy.deepcopy(source)
+    doc["documentId"] = doc_id
+    doc["title"] = f"Synthetic {doc_id}"
+    doc["revisionId"] = f"rev-{doc_id}"
+    content = doc["body"]["content"]
+    editable = [i for i, block in enumerate(content) if "paragraph" in block]
+    if editable:
+        content[rng.choice(editable)] = _paragraph(" ".join(_sentence(rng, rng.randint(6, 20)) for _ in range(3)))
+    return doc
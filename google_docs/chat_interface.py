@@ -1,37 +1,61 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
 import streamlit as st
-from googleapiclient.errors import HttpError
 from llama_index.core import Document
 
 from shared.llama_utils import setup_llama_index, create_index_from_documents
-from shared.config import SETTINGS, ensure_credentials
+from shared.config import SETTINGS
 from google_docs.downloader import fetch_document
+from google_docs.client_pool import credential_key
+from google_docs.extraction import extract_text
+from shared.jobs import JOB_RUNNER, Job
 
 
 def extract_text_from_doc(document: dict) -> str:
-    """Extract every textRun string from Google Docs API 'body.content'.
-    Previous approach only took the first element; this is comprehensive.
+    """Extract all text (paragraphs, tables, table of contents) from a Docs API document."""
+    return extract_text(document)
+
+
+# document_id -> (revisionId, index, Document); most recently used last
+_INDEX_CACHE: "OrderedDict[str, Tuple[str, Any, Document]]" = OrderedDict()
+_INDEX_CACHE_SIZE = 16
+# Background jobs for different sessions update the cache concurrently
+_INDEX_CACHE_LOCK = threading.Lock()
+
+
+def build_index_from_document(
+    document_id: str,
+    on_fetched: Optional[Callable[[Document], None]] = None,
+    service_account_info: Optional[Dict[str, Any]] = None,
+):
+    """Independent logic: fetch doc → extract text → wrap as Document → build index.
+
+    If this document was indexed before in this process, only its revisionId is
+    fetched; an unchanged revision reuses the cached index without re-embedding.
+    on_fetched is called with the Document before the index is built, so callers
+    can show a preview while embedding is still running.
+    service_account_info keeps credentials in memory for this call only; without
+    it the credentials file from the environment is used. The revision probe
+    always runs with the caller's credentials, so a cached index is only served
+    to callers that can still read the document.
     """
-    body = document.get("body", {})
-    contents = body.get("content", [])
-    texts = []
-    for element in contents:
-        para = element.get("paragraph")
-        if not para:
-            continue
-        for elem in para.get("elements", []):
-            text_run = elem.get("textRun")
-            if not text_run:
-                continue
-            content = text_run.get("content", "")
-            if content:
-                texts.append(content)
-    return "".join(texts).strip()
-
-
-def build_index_from_document(document_id: str):
-    """Independent logic: fetch doc → extract text → wrap as Document → build index."""
-    ensure_credentials()  # Ensure env var is set if needed
-    raw_doc = fetch_document(document_id=document_id)
+    with _INDEX_CACHE_LOCK:
+        cached = _INDEX_CACHE.get(document_id)
+    if cached:
+        probe = fetch_document(
+            document_id=document_id, fields="metadata", service_account_info=service_account_info
+        )
+        if probe and probe.get("revisionId") == cached[0]:
+            with _INDEX_CACHE_LOCK:
+                if document_id in _INDEX_CACHE:
+                    _INDEX_CACHE.move_to_end(document_id)
+            if on_fetched:
+                on_fetched(cached[2])
+            return cached[1], cached[2]
+
+    raw_doc = fetch_document(document_id=document_id, service_account_info=service_account_info)
     if not raw_doc:
         raise ValueError(f"Document not found or inaccessible: {document_id}")
 
@@ -43,30 +67,68 @@ def build_index_from_document(document_id: str):
         text=text_content,
         metadata={"title": raw_doc.get("title", "Unknown Document"), "doc_id": document_id}
     )
+    if on_fetched:
+        on_fetched(formatted)
 
     setup_llama_index()
     index = create_index_from_documents([formatted], chunk_size=SETTINGS.chunk_size, chunk_overlap=SETTINGS.chunk_overlap)
+    revision_id = raw_doc.get("revisionId")
+    if revision_id:
+        with _INDEX_CACHE_LOCK:
+            _INDEX_CACHE[document_id] = (revision_id, index, formatted)
+            _INDEX_CACHE.move_to_end(document_id)
+            while len(_INDEX_CACHE) > _INDEX_CACHE_SIZE:
+                _INDEX_CACHE.popitem(last=False)
     return index, formatted
 
 
-def run_documents_chat(document_id: str):
-    """Build index for a single document and display a preview."""
-    st.write("📄 Loading document...")
-
-    try:
-        index, formatted = build_index_from_document(document_id)
-        st.success("Document loaded & index built.")
-        st.write("### Title:")
-        st.write(f"- {formatted.metadata.get('title')}")
-        st.write("### Content (may be truncated):")
-        preview = formatted.text[:4000] + ("... (truncated)" if len(formatted.text) > 4000 else "")
-        st.code(preview, language="text")
-        return {
-            "title": formatted.metadata.get("title"),
-            "length": len(formatted.text),
-            "index": index,
-        }
-    except HttpError as e:
-        st.error(f"API error: {e}")
-    except Exception as e:
-        st.error(f"Error: {e}")
\ No newline at end of file
+def _index_document_job(
+    job: Job, document_id: str, service_account_info: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    job.report("Fetching document...", 0.1)
+
+    def on_fetched(formatted: Document) -> None:
+        job.set_preview(
+            title=formatted.metadata.get("title"),
+            length=len(formatted.text),
+            text=formatted.text[:4000],
+        )
+        job.check_cancelled()
+        job.report("Building index...", 0.5)
+
+    index, formatted = build_index_from_document(
+        document_id, on_fetched=on_fetched, service_account_info=service_account_info
+    )
+    job.report("Document loaded & index built.", 1.0)
+    return {
+        "title": formatted.metadata.get("title"),
+        "length": len(formatted.text),
+        "index": index,
+    }
+
+
+def run_documents_chat(
+    document_id: str, service_account_info: Optional[Dict[str, Any]] = None
+) -> Job:
+    """Start (or join) a background job that loads the document and builds its index.
+
+    Returns immediately; a job for the same document and credentials that is
+    still running is shared instead of starting a second build.
+    """
+    identity = credential_key(service_account_info) if service_account_info else None
+    return JOB_RUNNER.submit(
+        ("document", identity, document_id),
+        lambda job: _index_document_job(job, document_id, service_account_info),
+    )
+
+
+def render_document_preview(preview: Optional[Dict[str, Any]]) -> None:
+    """Display the title and (truncated) content of a fetched document."""
+    if not preview:
+        return
+    st.write("### Title:")
+    st.write(f"- {preview.get('title')}")
+    st.write("### Content (may be truncated):")
+    text = preview.get("text", "")
+    truncated = preview.get("length", len(text)) > len(text)
+    st.code(text + ("... (truncated)" if truncated else ""), language="text")
@@ -0,0 +1,354 @@
+import os
+import json
+import time
+import threading
+from functools import lru_cache
+from typing import Optional, Dict, Any, Sequence, Tuple
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp, Request
+from googleapiclient.discovery import build_from_document
+from googleapiclient.errors import HttpError
+from googleapiclient.discovery_cache import get_static_doc
+from google.oauth2 import service_account
+
+from shared.config import SETTINGS
+from shared.metrics import METRICS
+from google_docs.rate_limit import RateLimiter, RetryBudget, is_retryable
+
+
+_PARAGRAPH_FIELDS = "paragraph(elements/textRun/content,paragraphStyle/namedStyleType,bullet(listId,nestingLevel))"
+
+# Partial-response alan maskeleri. "text" yalnızca extraction.py'nin okuduğu alanları
+# ister (stil, inline object, öneri vb. gelmez); "metadata" gövdeyi hiç indirmez.
+FIELD_MASK_PROFILES: Dict[str, Optional[str]] = {
+    "text": (
+        "documentId,title,revisionId,lists,"
+        f"body/content({_PARAGRAPH_FIELDS},"
+        f"table/tableRows/tableCells/content({_PARAGRAPH_FIELDS},table),"
+        f"tableOfContents/content({_PARAGRAPH_FIELDS}))"
+    ),
+    "metadata": "documentId,title,revisionId",
+    "full": None,
+}
+
+
+def resolve_fields(fields: Optional[str]) -> Optional[str]:
+    """Profil adını maskeye çevirir; profil değilse verilen maske aynen kullanılır."""
+    if fields is None or fields == "*":
+        return None
+    return FIELD_MASK_PROFILES.get(fields, fields)
+
+
+class TransferStats:
+    """Profil (ya da ham maske) başına istek sayısı ve yanıt gövdesi byte'ları.
+
+    Byte'lar httplib2'nin açtığı (gzip çözülmüş) gövde boyutudur; JSON parse
+    maliyetiyle doğrudan orantılıdır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_profile: Dict[str, Dict[str, int]] = {}
+
+    def record(self, profile: str, nbytes: int) -> None:
+        with self._lock:
+            entry = self._by_profile.setdefault(profile, {"requests": 0, "bytes": 0})
+            entry["requests"] += 1
+            entry["bytes"] += nbytes
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {k: dict(v) for k, v in self._by_profile.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._by_profile.clear()
+
+
+class _CountingHttp(AuthorizedHttp):
+    """Son yanıt gövdesinin boyutunu tutan AuthorizedHttp (thread başına bir tane)."""
+
+    last_response_bytes = 0
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        resp, content = super().request(uri, method, body=body, headers=headers, **kwargs)
+        self.last_response_bytes = len(content or b"")
+        return resp, content
+
+
+@lru_cache(maxsize=None)
+def _discovery_document(service_name: str, version: str) -> Dict[str, Any]:
+    """Kütüphaneyle gelen statik discovery dokümanını bir kez parse eder (ağ yok)."""
+    raw = get_static_doc(service_name, version)
+    if raw is None:
+        raise RuntimeError(f"Static discovery document not found: {service_name} {version}")
+    return json.loads(raw)
+
+
+class _ApiClient:
+    """Tek bir kimlik + scope için paylaşılan Google API istemcisi (Docs, Drive).
+
+    - service (statik discovery dokümanından) bir kez kurulur ve thread'ler arasında paylaşılır
+    - httplib2.Http thread-safe olmadığı için her thread kendi AuthorizedHttp oturumunu alır
+    - token yenileme kilit altında yapılır, tüm çağıranlar aynı token'ı kullanır
+    - istekler limiter'dan (hız + AIMD eşzamanlılık) geçer; 429 / 5xx / bağlantı
+      hataları jitter'lı üstel backoff ve Retry-After ile tekrar denenir
+    """
+
+    SERVICE: Tuple[str, str] = ("", "")
+
+    def __init__(self, credentials, api_endpoint: Optional[str] = None, limiter: Optional[RateLimiter] = None):
+        self.credentials = credentials
+        self.limiter = limiter or RateLimiter.from_settings()
+        self._refresh_lock = threading.Lock()
+        self._local = threading.local()
+        client_options = {"api_endpoint": api_endpoint} if api_endpoint else None
+        self.service = build_from_document(
+            _discovery_document(*self.SERVICE),
+            credentials=credentials,
+            client_options=client_options,
+        )
+
+    def http(self) -> _CountingHttp:
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = _CountingHttp(self.credentials, http=httplib2.Http())
+        return http
+
+    def ensure_token(self) -> None:
+        if self.credentials.valid:
+            return
+        with self._refresh_lock:
+            if not self.credentials.valid:
+                self.credentials.refresh(Request(httplib2.Http()))
+
+    def _execute(
+        self, request, method: str, retry_budget: Optional[RetryBudget] = None, **labels: str
+    ) -> Dict[str, Any]:
+        """İsteği limiter altında, geçici hatalarda tekrar deneyerek çalıştırır.
+
+        Tekrarlar istek başına limiter.max_attempts ile, retry_budget verilirse
+        çalıştırma genelinde de sınırlıdır; sınır aşılınca son hata yükseltilir.
+        """
+        self.ensure_token()
+        http = self.http()
+        limiter = self.limiter
+        attempt = 0
+        while True:
+            waited = limiter.acquire()
+            error = None
+            try:
+                return self._execute_once(request, http, method, labels)
+            except Exception as e:
+                error = e
+                if not is_retryable(e) or attempt + 1 >= limiter.max_attempts:
+                    raise
+                if retry_budget is not None and not retry_budget.try_spend():
+                    if METRICS.enabled:
+                        METRICS.inc("gdocs_api_retry_budget_exhausted_total", method=method)
+                    raise
+            finally:
+                limiter.release(error)
+                if METRICS.enabled and waited > 0:
+                    METRICS.observe("gdocs_api_rate_limit_wait_seconds", waited, method=method)
+            delay = limiter.backoff(attempt, error)
+            if METRICS.enabled:
+                reason = str(error.resp.status) if isinstance(error, HttpError) else type(error).__name__
+                METRICS.inc("gdocs_api_retries_total", method=method, reason=reason)
+            time.sleep(delay)
+            attempt += 1
+
+    def _execute_once(self, request, http, method: str, labels: Dict[str, str]) -> Dict[str, Any]:
+        """Tek deneme; ölçüm açıksa süre ve durum kodu kaydedilir."""
+        if not METRICS.enabled:
+            return request.execute(http=http)
+
+        start = time.perf_counter()
+        status = "200"
+        try:
+            return request.execute(http=http)
+        except HttpError as e:
+            status = str(e.resp.status)
+            raise
+        except Exception as e:
+            status = type(e).__name__
+            raise
+        finally:
+            METRICS.observe("gdocs_api_request_seconds", time.perf_counter() - start, method=method, **labels)
+            METRICS.inc("gdocs_api_requests_total", method=method, status=status)
+
+
+class DocsClient(_ApiClient):
+    """Docs API istemcisi; transfer_stats alan maskesi profili başına indirilen byte'ları sayar."""
+
+    SERVICE = ("docs", "v1")
+
+    def __init__(self, credentials, api_endpoint: Optional[str] = None, limiter: Optional[RateLimiter] = None):
+        super().__init__(credentials, api_endpoint, limiter)
+        self.documents = self.service.documents()
+        self.transfer_stats = TransferStats()
+
+    def get_document(
+        self,
+        document_id: str,
+        fields: Optional[str] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """documents.get; fields bir profil adı ("text", "metadata", "full") ya da ham maske olabilir."""
+        mask = resolve_fields(fields)
+        if mask:
+            kwargs["fields"] = mask
+        profile = fields if fields in FIELD_MASK_PROFILES else (mask or "full")
+        # Ölçüm etiketlerinde ham maske yerine profil adı ("custom") kullanılır
+        label = profile if profile in FIELD_MASK_PROFILES else "custom"
+        doc = self._execute(
+            self.documents.get(documentId=document_id, **kwargs), "documents.get", retry_budget, profile=label
+        )
+        nbytes = self.http().last_response_bytes
+        self.transfer_stats.record(profile, nbytes)
+        if METRICS.enabled:
+            METRICS.inc("gdocs_api_response_bytes_total", nbytes, profile=label)
+        return doc
+
+
+class DriveClient(_ApiClient):
+    """Drive v3 istemcisi; files.list ve changes feed çağrıları (paylaşılan drive'lar dahil)."""
+
+    SERVICE = ("drive", "v3")
+
+    def __init__(self, credentials, api_endpoint: Optional[str] = None, limiter: Optional[RateLimiter] = None):
+        super().__init__(credentials, api_endpoint, limiter)
+        self.files = self.service.files()
+        self.changes = self.service.changes()
+
+    def list_files(self, **kwargs) -> Dict[str, Any]:
+        return self._execute(
+            self.files.list(supportsAllDrives=True, includeItemsFromAllDrives=True, **kwargs), "files.list"
+        )
+
+    def get_file(self, file_id: str, retry_budget: Optional[RetryBudget] = None, **kwargs) -> Dict[str, Any]:
+        return self._execute(
+            self.files.get(fileId=file_id, supportsAllDrives=True, **kwargs), "files.get", retry_budget
+        )
+
+    def get_start_page_token(self, **kwargs) -> str:
+        response = self._execute(
+            self.changes.getStartPageToken(supportsAllDrives=True, **kwargs), "changes.getStartPageToken"
+        )
+        return response["startPageToken"]
+
+    def list_changes(self, page_token: str, **kwargs) -> Dict[str, Any]:
+        return self._execute(
+            self.changes.list(
+                pageToken=page_token, supportsAllDrives=True, includeItemsFromAllDrives=True, **kwargs
+            ),
+            "changes.list",
+        )
+
+
+def credential_key(service_account_info: Dict[str, Any]) -> Tuple:
+    """Service account kimliği; private key'i içermeden istemci / cache anahtarı olarak kullanılır."""
+    return (service_account_info.get("client_email"), service_account_info.get("private_key_id"))
+
+
+class DocsClientPool:
+    """Process genelinde DocsClient / DriveClient önbelleği; anahtar kimlik + scope + endpoint + tür.
+
+    Aynı kimlik + endpoint + API'yi kullanan istemciler (örn. farklı scope'larla)
+    tek bir RateLimiter paylaşır; kota kimlik başına olduğu için hız ve eşzamanlılık
+    sınırı tüm reader'lar / thread'ler arasında ortaktır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple, _ApiClient] = {}
+        self._limiters: Dict[Tuple, RateLimiter] = {}
+
+    def get(
+        self,
+        service_account_info: Optional[Dict[str, Any]] = None,
+        credentials_path: Optional[str] = None,
+        scopes: Sequence[str] = (SETTINGS.docs_api_scope,),
+        api_endpoint: Optional[str] = None,
+    ) -> DocsClient:
+        return self._get(DocsClient, service_account_info, credentials_path, scopes, api_endpoint)
+
+    def get_drive(
+        self,
+        service_account_info: Optional[Dict[str, Any]] = None,
+        credentials_path: Optional[str] = None,
+        scopes: Sequence[str] = (SETTINGS.drive_api_scope,),
+        api_endpoint: Optional[str] = None,
+    ) -> DriveClient:
+        return self._get(DriveClient, service_account_info, credentials_path, scopes, api_endpoint)
+
+    def _get(self, client_cls, service_account_info, credentials_path, scopes, api_endpoint):
+        if service_account_info is None and not credentials_path:
+            raise ValueError("service_account_info or credentials_path is required.")
+        scopes = tuple(scopes)
+        if service_account_info is not None:
+            key = ("info", credential_key(service_account_info), scopes, api_endpoint, client_cls.__name__)
+        else:
+            # Dosya değişirse (mtime) yeni istemci kurulur; aksi halde dosya tekrar okunmaz
+            path = os.path.abspath(credentials_path)
+            key = ("file", path, os.path.getmtime(path), scopes, api_endpoint, client_cls.__name__)
+
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                if service_account_info is not None:
+                    creds = service_account.Credentials.from_service_account_info(
+                        service_account_info, scopes=list(scopes)
+                    )
+                else:
+                    creds = service_account.Credentials.from_service_account_file(
+                        credentials_path, scopes=list(scopes)
+                    )
+                limiter_key = key[:2] + (api_endpoint, client_cls.SERVICE)
+                limiter = self._limiters.get(limiter_key)
+                if limiter is None:
+                    limiter = self._limiters[limiter_key] = RateLimiter.from_settings()
+                client = self._clients[key] = client_cls(creds, api_endpoint=api_endpoint, limiter=limiter)
+        return client
+
+    def limiter(
+        self,
+        service_account_info: Optional[Dict[str, Any]] = None,
+        credentials_path: Optional[str] = None,
+        api_endpoint: Optional[str] = None,
+        service: Tuple[str, str] = DocsClient.SERVICE,
+    ) -> Optional[RateLimiter]:
+        """Kimliğin paylaşılan limiter'ı (henüz istemci kurulmadıysa None)."""
+        if service_account_info is not None:
+            identity = ("info", credential_key(service_account_info))
+        else:
+            identity = ("file", os.path.abspath(credentials_path))
+        return self._limiters.get(identity + (api_endpoint, service))
+
+    def evict(
+        self,
+        credentials_path: Optional[str] = None,
+        service_account_info: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Verilen dosyaya / kimliğe ait (ikisi de verilmezse tüm) istemcileri bırakır."""
+        with self._lock:
+            if credentials_path is None and service_account_info is None:
+                self._clients.clear()
+                self._limiters.clear()
+                return
+            if service_account_info is not None:
+                target = ("info", credential_key(service_account_info))
+            else:
+                target = ("file", os.path.abspath(credentials_path))
+            for key in [k for k in self._clients if k[:2] == target]:
+                del self._clients[key]
+            for key in [k for k in self._limiters if k[:2] == target]:
+                del self._limiters[key]
+
+
+CLIENT_POOL = DocsClientPool()
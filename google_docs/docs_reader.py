@@ -1,20 +1,30 @@
 import os
-import json
-import tempfile
-import shutil
-from contextlib import contextmanager
-from typing import Dict, Any, List, Sequence
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from google.oauth2 import service_account
 
-from llama_index.core import Document
+from llama_index.core import Document, Settings
 from llama_index.core.schema import BaseNode
-from llama_index.core.ingestion import IngestionPipeline
-from llama_index.core.node_parser import SentenceSplitter
 
 from shared.config import SETTINGS
+from shared.manifest import IndexManifest
+from shared.llama_utils import setup_llama_index, build_nodes_from_documents, embed_nodes, STRUCTURE_METADATA_KEYS
+from google_docs.extraction import extract_document
+from shared.pipeline import run_pipeline
+from shared.protocol import TaskCancelled
+from shared.metrics import METRICS
+from shared.lexical import BM25Index, lexical_index_path
+from shared.dedup import DedupIndex, dedup_index_path
+from google_docs.client_pool import CLIENT_POOL, DocsClient
+from google_docs.drive import DriveFolderSync, DriveSyncState, DriveSyncResult
+from google_docs.filters import DocumentFilter, InvalidFilterException
+from google_docs.rate_limit import RetryBudget
+
+logger = logging.getLogger("gdocs.docs_reader")
 
 
 class InvalidDataSourceConfigException(Exception):
@@ -36,63 +46,42 @@ REQUIRED_SERVICE_ACCOUNT_KEYS = [
 ]
 
 
-@contextmanager
-def credentials_context(config: Dict[str, Any]):
-    """Geçici çalışma klasörü oluşturarak config'i token.json'a kaydeder.
-
-    Adımlar:
-      1. Mevcut dizini kaydet
-      2. mkdtemp ile temp klasör oluştur
-      3. temp klasöre chdir
-      4. config tamamını token.json'a yaz
-      5. yield sonrası eski dizine dön ve temp'i sil
-    """
-    prev_cwd = os.getcwd()
-    temp_dir = tempfile.mkdtemp(prefix="gdocs_cfg_")
-    try:
-        os.chdir(temp_dir)
-        with open("token.json", "w", encoding="utf-8") as f:
-            json.dump(config, f)
-        yield
-    finally:
-        os.chdir(prev_cwd)
-        try:
-            shutil.rmtree(temp_dir, ignore_errors=True)
-        except Exception:
-            pass
-
-
-def _extract_text_from_doc(raw_doc: Dict[str, Any]) -> str:
-    body = raw_doc.get("body", {})
-    contents = body.get("content", [])
-    acc: List[str] = []
-    for el in contents:
-        para = el.get("paragraph")
-        if not para:
-            continue
-        for elem in para.get("elements", []):
-            text_run = elem.get("textRun")
-            if not text_run:
-                continue
-            content = text_run.get("content", "")
-            if content:
-                acc.append(content)
-    return "".join(acc).strip()
-
-
 class GoogleDocsConfigReader:
     """Config tabanlı, bir veya birden çok Google Docs belgesini indeksleyen sınıf.
 
     Beklenen config anahtarları:
       - service_account_dict: Service account JSON dict
-      - document_ids: List[str]
+      - document_ids: List[str] (folder_ids verilmişse boş olabilir)
       - inclusion_rules: List[str] (opsiyonel boş liste olabilir)
       - exclusion_rules: List[str]
+      - max_workers: int (opsiyonel, eşzamanlı istek sınırı; varsayılan SETTINGS.fetch_max_workers)
+      - api_endpoint: str (opsiyonel, örn. test için yerel sahte Docs sunucusu)
+      - manifest_path: str (opsiyonel, artımlı indeksleme manifest dosyası)
+      - stream: bool (opsiyonel, process() için batch'li pipeline modu)
+      - field_profile: str (opsiyonel, "text" | "metadata" | "full" ya da ham alan maskesi)
+      - folder_ids: List[str] (opsiyonel, altındaki tüm Google Docs belgeleri özyinelemeli eklenir)
+      - drive_state_path: str (opsiyonel, Drive changes token'ı ve klasör listesi; verilirse
+        sonraki çalışmalar yalnızca değişiklikleri okur)
+      - drive_id: str (opsiyonel, klasörler bir paylaşılan drive'daysa changes feed için)
+      - title_regex / exclude_title_regex: str (opsiyonel, başlığa uygulanan düzenli ifadeler)
+      - modified_since: str (opsiyonel, ISO 8601; bu zamandan önce değişen belgeler atlanır)
+      - prefilter: bool (opsiyonel, varsayılan True; kurallar gövde indirilmeden metadata ile uygulanır)
+      - lexical_index_path: str (opsiyonel, process()'in güncellediği BM25 indeksi; verilmezse
+        klasör tabanlı store'larda store klasöründe tutulur)
+      - dedup_index_path: str (opsiyonel, process()'in near-duplicate imza indeksi; verilmezse
+        klasör tabanlı store'larda store klasöründe tutulur)
+      - dedup_threshold: float (opsiyonel, varsayılan SETTINGS.dedup_threshold; 0 kapatır)
+      - chunk_strategy: str (opsiyonel, "structure" | "sentence"; varsayılan SETTINGS.chunk_strategy)
+      - retry_budget: int (opsiyonel, çalıştırma başına toplam API tekrar sayısı; varsayılan
+        SETTINGS.api_retry_budget)
+
+    service_account_dict yalnızca bellekte kullanılır: diske yazılmaz, cwd ya da
+    ortam değişkenleri değiştirilmez. Farklı kimliklerle çalışan reader'lar aynı
+    process'te (thread'lerde, eşzamanlı oturumlarda) birbirini etkilemeden çalışır.
     """
 
     REQUIRED_KEYS = [
         "service_account_dict",
-        "document_ids",
         "inclusion_rules",
         "exclusion_rules",
     ]
@@ -101,6 +90,13 @@ class GoogleDocsConfigReader:
         self.data_source_id = data_source_id
         self.config = config
         self.validate_config(config)
+        self.filter = DocumentFilter.from_config(config)
+        # Drive taramasından gelen belge metadata'sı (ad, modifiedTime); ön filtre tekrar sormaz
+        self._drive_metadata: Dict[str, Dict[str, Any]] = {}
+        # 429 / 5xx tekrarları için paylaşılan bütçe; her process() çalıştırmasında yenilenir
+        self.retry_budget = self._new_retry_budget()
+        # Son get_documents çağrısında alınamayan belgeler: doc_id -> hata mesajı
+        self.fetch_errors: Dict[str, str] = {}
 
     def validate_config(self, config: Dict[str, Any]):
         for k in self.REQUIRED_KEYS:
@@ -114,59 +110,226 @@ class GoogleDocsConfigReader:
                 raise InvalidDataSourceConfigException(
                     f"GoogleDocsConfigReader requires '{k}' in 'service_account_dict'."
                 )
-        if not isinstance(config.get("document_ids"), list) or not config["document_ids"]:
-            raise InvalidDataSourceConfigException("'document_ids' must be a non-empty list")
+        if "document_ids" not in config and "folder_ids" not in config:
+            raise InvalidDataSourceConfigException(
+                "GoogleDocsConfigReader requires 'document_ids' or 'folder_ids' in config."
+            )
+        for k in ("document_ids", "folder_ids"):
+            if k in config and not isinstance(config[k], list):
+                raise InvalidDataSourceConfigException(f"'{k}' must be a list")
+        if not config.get("document_ids") and not config.get("folder_ids"):
+            raise InvalidDataSourceConfigException("'document_ids' or 'folder_ids' must be a non-empty list")
+        max_workers = config.get("max_workers")
+        if max_workers is not None and (not isinstance(max_workers, int) or max_workers < 1):
+            raise InvalidDataSourceConfigException("'max_workers' must be a positive integer")
+        try:
+            DocumentFilter.from_config(config)
+        except InvalidFilterException as e:
+            raise InvalidDataSourceConfigException(str(e)) from e
+
+    def _new_retry_budget(self) -> RetryBudget:
+        return RetryBudget(self.config.get("retry_budget", SETTINGS.api_retry_budget))
+
+    def _client(self) -> DocsClient:
+        return CLIENT_POOL.get(
+            service_account_info=self.config["service_account_dict"],
+            api_endpoint=self.config.get("api_endpoint"),
+        )
+
+    def _drive_sync(self) -> DriveFolderSync:
+        return DriveFolderSync(
+            CLIENT_POOL.get_drive(
+                service_account_info=self.config["service_account_dict"],
+                api_endpoint=self.config.get("api_endpoint"),
+            ),
+            self.config["folder_ids"],
+            state=DriveSyncState(self.config.get("drive_state_path")),
+            drive_id=self.config.get("drive_id"),
+        )
+
+    def list_document_ids(self) -> List[str]:
+        """document_ids + folder_ids altındaki belgeler (Drive durumu kaydedilmez)."""
+        document_ids = list(self.config.get("document_ids", []))
+        if self.config.get("folder_ids"):
+            result = self._drive_sync().sync()
+            self._drive_metadata.update(result.state["documents"])
+            document_ids.extend(result.document_ids)
+        return list(dict.fromkeys(document_ids))
+
+    def _fetch_concurrently(self, keys: Sequence[str], fetch) -> Tuple[List[Tuple[str, Any]], Dict[str, str]]:
+        """fetch(key) çağrılarını max_workers sınırıyla paralel çalıştırır; hatalar key bazında toplanır."""
+        errors: Dict[str, str] = {}
+        max_workers = min(
+            self.config.get("max_workers") or SETTINGS.fetch_max_workers,
+            max(len(keys), 1),
+        )
+
+        def fetch_one(key: str) -> Tuple[str, Any]:
+            try:
+                return key, fetch(key)
+            except HttpError as e:
+                errors[key] = f"HTTP {e.resp.status}: {e}"
+            except Exception as e:
+                errors[key] = f"{type(e).__name__}: {e}"
+            return key, None
 
-    def _build_service(self):
-        creds = service_account.Credentials.from_service_account_info(
-            self.config["service_account_dict"], scopes=[SETTINGS.docs_api_scope]
+        if max_workers == 1:
+            results = [fetch_one(key) for key in keys]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gdocs_fetch") as pool:
+                results = list(pool.map(fetch_one, keys))
+        return results, errors
+
+    def fetch_raw_documents(
+        self, document_ids: Sequence[str], fields: Optional[str] = None
+    ) -> Tuple[List[Tuple[str, Optional[Dict[str, Any]]]], Dict[str, str]]:
+        """Belgeleri eşzamanlı olarak indirir.
+
+        Sonuçlar girdi sırasıyla (doc_id, raw) çiftleri olarak döner; alınamayan
+        belgelerde raw None'dır ve hata mesajı ikinci dönüş değerinde toplanır.
+        İstemci (service, resource, token) CLIENT_POOL üzerinden paylaşılır.
+        fields bir alan maskesi profili ya da ham maskedir; verilmezse config'teki
+        field_profile (varsayılan "text") kullanılır.
+        """
+        client = self._client()
+        fields = fields or self.config.get("field_profile", "text")
+        return self._fetch_concurrently(
+            document_ids, lambda d: client.get_document(d, fields=fields, retry_budget=self.retry_budget)
         )
-        return build("docs", "v1", credentials=creds)
 
-    def get_documents(self, *args, **kwargs) -> Sequence[Document]:
+    def fetch_metadata(self, document_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Gövdeyi indirmeden belge başına {"title", "modified_time", "revision_id"} döndürür.
+
+        Drive taramasında görülen belgeler için istek atılmaz. Diğerleri için
+        modified_since gerekiyorsa Drive files.get (id,name,modifiedTime), aksi
+        halde Docs "metadata" profili (title,revisionId) kullanılır. Metadata'sı
+        alınamayan belgeler sonuçta yer almaz.
+        """
+        metadata: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for doc_id in document_ids:
+            entry = self._drive_metadata.get(doc_id)
+            if entry is not None:
+                metadata[doc_id] = {"title": entry.get("name"), "modified_time": entry.get("modified_time")}
+            else:
+                missing.append(doc_id)
+        if not missing:
+            return metadata
+
+        if self.filter.needs_modified_time:
+            drive = CLIENT_POOL.get_drive(
+                service_account_info=self.config["service_account_dict"],
+                api_endpoint=self.config.get("api_endpoint"),
+            )
+            results, _ = self._fetch_concurrently(
+                missing, lambda d: drive.get_file(d, retry_budget=self.retry_budget, fields="id,name,modifiedTime")
+            )
+            for doc_id, item in results:
+                if item is not None:
+                    metadata[doc_id] = {"title": item.get("name"), "modified_time": item.get("modifiedTime")}
+        else:
+            results, _ = self.fetch_raw_documents(missing, fields="metadata")
+            for doc_id, raw in results:
+                if raw is not None:
+                    metadata[doc_id] = {"title": raw.get("title"), "revision_id": raw.get("revisionId")}
+        return metadata
+
+    def prefilter_document_ids(
+        self, document_ids: Sequence[str]
+    ) -> Tuple[List[str], Dict[str, Dict[str, Any]]]:
+        """Kuralları (inclusion/exclusion, regex, modified_since) yalnızca metadata ile uygular.
+
+        Gövdesi indirilecek belgeleri ve okunan metadata'yı döndürür. Kural yoksa
+        (ya da prefilter kapalıysa) ek istek atılmaz. Metadata'sı alınamayan belgeler
+        elenmez; gövde indirilirken hata olarak raporlanırlar.
+        """
+        if not document_ids or not self.filter.active or not self.config.get("prefilter", True):
+            return list(document_ids), {}
+        metadata = self.fetch_metadata(document_ids)
+        kept = [
+            d for d in document_ids
+            if d not in metadata or self.filter.matches(metadata[d]["title"], metadata[d].get("modified_time"))
+        ]
+        if METRICS.enabled:
+            METRICS.inc("gdocs_prefilter_documents_total", len(kept), result="kept")
+            METRICS.inc("gdocs_prefilter_documents_total", len(document_ids) - len(kept), result="skipped")
+        return kept, metadata
+
+    def changed_document_ids(
+        self,
+        manifest: IndexManifest,
+        document_ids: Sequence[str],
+        metadata: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> List[str]:
+        """Manifest'teki revizyondan farklı (ya da yeni) belgeleri döndürür.
+
+        Bilinen belgeler için yalnızca "metadata" profili istenir; gövde indirilmez.
+        Ön filtrede okunan revizyonlar (metadata) varsa tekrar sorulmaz.
+        Revizyonu alınamayan belgeler değişmiş kabul edilir.
+        """
+        metadata = metadata or {}
+        revisions = {d: m["revision_id"] for d, m in metadata.items() if m.get("revision_id")}
+        known = [d for d in document_ids if manifest.get_revision(d) and d not in revisions]
+        results, _ = self.fetch_raw_documents(known, fields="metadata") if known else ([], {})
+        revisions.update((doc_id, raw.get("revisionId")) for doc_id, raw in results if raw is not None)
+        unchanged = {
+            doc_id for doc_id in document_ids
+            if doc_id in revisions and manifest.is_unchanged(doc_id, revisions[doc_id])
+        }
+        return [d for d in document_ids if d not in unchanged]
+
+    def _load_documents(self, document_ids: Sequence[str]) -> Tuple[List[Document], Dict[str, str]]:
         docs: List[Document] = []
-        inclusion = [r.lower() for r in self.config.get("inclusion_rules", [])]
-        exclusion = [r.lower() for r in self.config.get("exclusion_rules", [])]
-        with credentials_context(self.config):
-            service = self._build_service()
-            for doc_id in self.config["document_ids"]:
-                try:
-                    raw = service.documents().get(documentId=doc_id).execute()
-                except HttpError as e:
-                    print(f"[ERROR] {doc_id} fetch failed: {e}")
-                    continue
-                title = raw.get("title", "")
-                tl = title.lower()
-                if inclusion and not any(r in tl for r in inclusion):
-                    continue
-                if exclusion and any(r in tl for r in exclusion):
-                    continue
-                text = _extract_text_from_doc(raw)
-                if not text:
-                    continue
-                docs.append(
-                    Document(
-                        text=text,
-                        metadata={
-                            "title": title,
-                            "doc_id": doc_id,
-                            "data_source": self.data_source_id,
-                            "source_type": "google_docs",
-                        },
-                    )
+        results, errors = self.fetch_raw_documents(document_ids)
+        for doc_id, raw in results:
+            if raw is None:
+                continue
+            title = raw.get("title", "")
+            # Ön filtreden sonra başlık değişmiş olabilir; başlık kuralları gövdeyle tekrar denetlenir
+            if not self.filter.match_title(title):
+                continue
+            if METRICS.enabled:
+                start = time.perf_counter()
+                extracted = extract_document(raw)
+                METRICS.observe("gdocs_extraction_seconds", time.perf_counter() - start)
+                METRICS.inc("gdocs_extracted_chars_total", len(extracted.text))
+            else:
+                extracted = extract_document(raw)
+            if not extracted.text:
+                continue
+            hidden_keys = ["revision_id", *STRUCTURE_METADATA_KEYS]
+            docs.append(
+                Document(
+                    id_=doc_id,
+                    text=extracted.text,
+                    metadata={
+                        "title": title,
+                        "doc_id": doc_id,
+                        "revision_id": raw.get("revisionId"),
+                        "data_source": self.data_source_id,
+                        "source_type": "google_docs",
+                        **extracted.structure_metadata(),
+                    },
+                    excluded_embed_metadata_keys=hidden_keys,
+                    excluded_llm_metadata_keys=hidden_keys,
                 )
+            )
+        return docs, errors
+
+    def get_documents(self, *args, document_ids: Optional[Sequence[str]] = None, **kwargs) -> Sequence[Document]:
+        if document_ids is None:
+            document_ids = self.list_document_ids()
+        document_ids, _ = self.prefilter_document_ids(document_ids)
+        docs, self.fetch_errors = self._load_documents(document_ids)
         return docs
 
     def create_nodes(self, documents: Sequence[Document]) -> List[BaseNode]:
-        pipeline = IngestionPipeline(
-            transformations=[
-                SentenceSplitter(
-                    chunk_size=SETTINGS.chunk_size,
-                    chunk_overlap=SETTINGS.chunk_overlap,
-                )
-            ]
+        return build_nodes_from_documents(
+            documents,
+            chunk_size=SETTINGS.chunk_size,
+            chunk_overlap=SETTINGS.chunk_overlap,
+            strategy=self.config.get("chunk_strategy"),
         )
-        return pipeline.run(documents=list(documents))
 
     def process(
         self,
@@ -176,16 +339,306 @@ class GoogleDocsConfigReader:
         task_id: str,
         **kwargs,
     ) -> None:
-        documents = self.get_documents()
-        if not documents:
-            print(f"[INFO] No documents processed for task {task_id}.")
+        """Belgeleri indirir, node'lara böler, embed eder ve vector_store'a yazar.
+
+        kwargs (config'te de verilebilir):
+          - manifest_path: artımlı çalışma; revizyonu değişmeyen belgeler atlanır,
+            değişenlerin eski node'ları silinip yenileri yazılır, listeden çıkarılan
+            belgeler vector store'dan temizlenir
+          - stream: True ise fetch → chunk → embed → store aşamaları sınırlı
+            kuyruklarla ayrı thread'lerde, belge batch'leri halinde çalışır; her
+            batch yazıldığında task_manager.notify çağrılır
+          - stream_doc_batch_size / stream_embed_batch_size / stream_queue_size
+          - embed_model: verilmezse setup_llama_index ile kurulan model kullanılır
+          - dedup_index_path / dedup_threshold: chunk'lar embed edilmeden önce imza
+            indeksinde aranır; near-duplicate'ler embed edilmez ve store'a yazılmaz,
+            kanonik node'a referans olarak indekste tutulur (bkz. DedupIndex)
+
+        folder_ids verilmişse belge listesi Drive'dan alınır. drive_state_path ile
+        sonraki çalışmalar klasörleri yeniden listelemez, changes feed'i okur; manifest
+        de varsa yalnızca feed'de değişen (ve henüz indekslenmemiş) belgeler indirilir,
+        silinen / taşınan belgeler store'dan temizlenir. Yeni token yalnızca tüm
+        batch'ler yazıldıktan sonra kaydedilir.
+
+        task_manager destekliyorsa (bkz. EmbeddingMethod.process) her batch sonrası
+        ilerleme raporlanır ve tamamlanan belgeler checkpoint'e yazılır; görev yeniden
+        başlatıldığında bu belgeler atlanır. İptal istenirse batch sınırında
+        TaskCancelled fırlatılır.
+        """
+        options = {**self.config, **kwargs}
+        self.retry_budget = self._new_retry_budget()
+        manifest_path = options.get("manifest_path")
+        manifest = IndexManifest(manifest_path) if manifest_path else None
+        lexical_path = options.get("lexical_index_path") or (
+            lexical_index_path(vector_store) if SETTINGS.lexical_index else None
+        )
+        lexical = BM25Index.open(lexical_path) if lexical_path else None
+        dedup_path = options.get("dedup_index_path") or dedup_index_path(vector_store)
+        dedup_threshold = options.get("dedup_threshold", SETTINGS.dedup_threshold)
+        dedup = None
+        # Eşik 0 olsa da mevcut indeks açılır: silinen kanoniklerin referansları store'a taşınır
+        if dedup_path and (dedup_threshold > 0 or os.path.exists(dedup_path)):
+            dedup = DedupIndex(
+                dedup_path,
+                threshold=dedup_threshold,
+                num_perm=SETTINGS.dedup_num_perm,
+                shingle_size=SETTINGS.dedup_shingle_size,
+            )
+        document_ids = list(self.config.get("document_ids", []))
+        drive_sync: Optional[DriveFolderSync] = None
+        drive_result: Optional[DriveSyncResult] = None
+        if self.config.get("folder_ids"):
+            drive_sync = self._drive_sync()
+            drive_result = drive_sync.sync()
+            self._drive_metadata.update(drive_result.state["documents"])
+            explicit = document_ids
+            document_ids = list(dict.fromkeys(explicit + drive_result.document_ids))
+            _task_call(
+                task_manager,
+                "notify",
+                task_id,
+                f"Drive: {len(drive_result.document_ids)} docs, {len(drive_result.changed_ids)} changed, "
+                f"{len(drive_result.removed_ids)} removed",
+            )
+
+        if manifest is not None:
+            wanted = set(document_ids)
+            removed = [d for d in manifest.doc_ids() if d not in wanted]
+            for doc_id in removed:
+                _delete_document_nodes(vector_store, doc_id, manifest.get_node_ids(doc_id), lexical, dedup)
+                manifest.remove(doc_id)
+            manifest.save()
+            if removed and lexical is not None:
+                lexical.save(lexical_path)
+            if drive_result is not None and not drive_result.full_crawl:
+                # Feed'de olmayan Drive belgeleri değişmemiştir; yalnızca değişenler, açık
+                # document_ids ve manifest'te olmayanlar (örn. yarıda kalan çalışma) denetlenir
+                candidates = explicit + drive_result.changed_ids + [
+                    d for d in drive_result.document_ids if not manifest.get_revision(d)
+                ]
+                document_ids = list(dict.fromkeys(candidates))
+
+        checkpoint = _task_call(task_manager, "load_checkpoint", task_id) or {}
+        completed = set(checkpoint.get("done_document_ids", []))
+        document_ids = [d for d in document_ids if d not in completed]
+
+        candidates = document_ids
+        document_ids, metadata = self.prefilter_document_ids(candidates)
+        if manifest is not None:
+            # Artık kurallara uymayan (örn. dışlanan bir başlığa yeniden adlandırılmış) indeksli
+            # belgeler temizlenir; gövde aşamasında elenen belgelerle (bkz. _store_batch) aynı davranış
+            kept, indexed = set(document_ids), set(manifest.doc_ids())
+            rejected = [d for d in candidates if d not in kept and d in indexed]
+            for doc_id in rejected:
+                _delete_document_nodes(vector_store, doc_id, manifest.get_node_ids(doc_id), lexical, dedup)
+                manifest.remove(doc_id)
+            if rejected:
+                manifest.save()
+                if lexical is not None:
+                    lexical.save(lexical_path)
+            document_ids = self.changed_document_ids(manifest, document_ids, metadata)
+        total_ids = len(completed) + len(document_ids)
+        if dedup is not None:
+            # Yeniden indekslenen belgelerin eski node'ları silineceği için kanonik aday değildir
+            dedup.begin(replacing=document_ids if manifest is not None else ())
+        if _task_call(task_manager, "is_cancelled", task_id):
+            raise TaskCancelled(task_id)
+
+        embed_model = options.get("embed_model")
+        if embed_model is None:
+            setup_llama_index()
+            embed_model = Settings.embed_model
+        embed_batch_size = options.get("stream_embed_batch_size", SETTINGS.stream_embed_batch_size)
+
+        def fetch(batch_ids: List[str]) -> _IngestBatch:
+            docs, errors = self._load_documents(batch_ids) if batch_ids else ([], {})
+            return _IngestBatch(batch_ids, docs, errors)
+
+        def chunk(batch: _IngestBatch) -> _IngestBatch:
+            batch.nodes = self.create_nodes(batch.documents) if batch.documents else []
+            if dedup is not None and batch.nodes:
+                batch.nodes, batch.duplicates = dedup.assign(batch.nodes)
+                if METRICS.enabled:
+                    METRICS.inc("gdocs_dedup_nodes_total", len(batch.duplicates), kind="duplicate")
+                    METRICS.inc("gdocs_dedup_nodes_total", len(batch.nodes), kind="unique")
+            return batch
+
+        def embed(batch: _IngestBatch) -> _IngestBatch:
+            embed_nodes(batch.nodes, embed_model, embed_batch_size)
+            return batch
+
+        if options.get("stream"):
+            size = options.get("stream_doc_batch_size", SETTINGS.stream_doc_batch_size)
+            id_batches = [document_ids[i:i + size] for i in range(0, len(document_ids), size)]
+            batches = run_pipeline(
+                id_batches,
+                [fetch, chunk, embed],
+                queue_size=options.get("stream_queue_size", SETTINGS.stream_queue_size),
+            )
+        else:
+            id_batches = [document_ids]
+            batches = (embed(chunk(fetch(ids))) for ids in id_batches)
+
+        self.fetch_errors = {}
+        total_docs = total_nodes = total_duplicates = done_ids = 0
+        # BM25 dosyası her batch'te değil, döngü bitince (iptal / hata dahil) bir kez yazılır;
+        # save() tüm indeksi yeniden yazdığından batch başına kayıt toplamda O(N²) olurdu
+        try:
+            for batch_no, batch in enumerate(batches, start=1):
+                self.fetch_errors.update(batch.errors)
+                _store_batch(vector_store, manifest, batch, lexical, dedup)
+                total_docs += len(batch.documents)
+                total_nodes += len(batch.nodes)
+                total_duplicates += len(batch.duplicates)
+                done_ids += len(batch.document_ids)
+                completed.update(d for d in batch.document_ids if d not in batch.errors)
+                _task_call(task_manager, "save_checkpoint", task_id, {"done_document_ids": sorted(completed)})
+                _task_call(task_manager, "report_progress", task_id, len(completed), total_ids)
+                if len(id_batches) > 1:
+                    _task_call(
+                        task_manager,
+                        "notify",
+                        task_id,
+                        f"Batch {batch_no}/{len(id_batches)}: {len(batch.nodes)} nodes stored "
+                        f"({done_ids}/{len(document_ids)} docs, {total_nodes} nodes total)",
+                    )
+                if _task_call(task_manager, "is_cancelled", task_id):
+                    raise TaskCancelled(task_id)
+        finally:
+            if lexical is not None:
+                lexical.save(lexical_path)
+
+        if drive_sync is not None:
+            # Alınamayan belgeler token ilerlese de sonraki artımlı çalışmada tekrar denenir
+            drive_sync.commit(drive_result, failed_ids=list(self.fetch_errors))
+        if self.fetch_errors:
+            # Tekrarlar / bütçe tükendikten sonra alınamayan belgeler checkpoint'e yazılmaz;
+            # görev yeniden çalıştırıldığında tekrar denenir
+            _task_call(
+                task_manager,
+                "notify",
+                task_id,
+                f"{len(self.fetch_errors)} documents could not be fetched "
+                f"({self.retry_budget.used} retries used)",
+            )
+        if not total_docs:
+            logger.info("No documents processed for task %s.", task_id)
             return
-        nodes = self.create_nodes(documents)
-        if hasattr(vector_store, "add"):
-            vector_store.add(nodes)
-        elif hasattr(vector_store, "add_nodes"):
-            vector_store.add_nodes(nodes)
+        message = f"Processed {total_nodes} nodes"
+        if total_duplicates:
+            message += f" ({total_duplicates} near-duplicates stored as references)"
+        _task_call(task_manager, "notify", task_id, message)
+
+
+def _task_call(task_manager, name: str, *args):
+    """task_manager'ın opsiyonel bir metodunu varsa çağırır (bkz. EmbeddingMethod.process)."""
+    fn = getattr(task_manager, name, None) if task_manager is not None else None
+    return fn(*args) if fn is not None else None
+
+
+@dataclass
+class _IngestBatch:
+    document_ids: List[str]
+    documents: List[Document]
+    errors: Dict[str, str]
+    nodes: List[BaseNode] = field(default_factory=list)
+    # Near-duplicate node'lar: embed edilmez, store'a yazılmaz (bkz. DedupIndex)
+    duplicates: List[BaseNode] = field(default_factory=list)
+
+
+def _store_batch(
+    vector_store,
+    manifest: Optional[IndexManifest],
+    batch: _IngestBatch,
+    lexical: Optional[BM25Index] = None,
+    dedup: Optional[DedupIndex] = None,
+) -> None:
+    """Batch'i store'a (ve varsa BM25 indeksine) yazar; manifest varsa eski node'ları silip kaydı günceller.
+
+    dedup verilmişse duplicate'ler store yerine imza indeksine referans olarak yazılır;
+    manifest'te belgenin node'ları arasında yine de yer alırlar.
+    """
+    if manifest is not None:
+        # Başarıyla yeniden indirilen belgelerin eski node'ları silinir; manifest hemen
+        # kaydedilir ki yarıda kalan bir çalışma sonrası belge "değişmemiş" sanılmasın.
+        for doc_id in batch.document_ids:
+            if doc_id in batch.errors:
+                continue
+            old_node_ids = manifest.get_node_ids(doc_id)
+            if old_node_ids:
+                _delete_document_nodes(vector_store, doc_id, old_node_ids, lexical, dedup)
+            manifest.remove(doc_id)
+        manifest.save()
+
+    nodes = batch.nodes
+    if dedup is not None:
+        # Kanoniği bu arada silinen duplicate'ler kanonik olur (embedding'leri kanoniğin vektörü)
+        nodes = nodes + [n for n in batch.duplicates if not dedup.is_duplicate(n.node_id)]
+    if nodes:
+        _add_nodes_to_store(vector_store, nodes)
+        if lexical is not None:
+            lexical.add_nodes(nodes)
+    if dedup is not None:
+        dedup.commit(batch.nodes + batch.duplicates)
+
+    if manifest is not None and batch.documents:
+        node_ids_by_doc: Dict[str, List[str]] = {}
+        for node in batch.nodes + batch.duplicates:
+            node_ids_by_doc.setdefault(node.metadata.get("doc_id"), []).append(node.node_id)
+        for doc in batch.documents:
+            doc_id = doc.metadata["doc_id"]
+            manifest.update(doc_id, doc.metadata.get("revision_id"), node_ids_by_doc.get(doc_id, []))
+        manifest.save()
+
+
+def _add_nodes_to_store(vector_store, nodes: Sequence[BaseNode]) -> None:
+    if hasattr(vector_store, "add"):
+        add = vector_store.add
+    elif hasattr(vector_store, "add_nodes"):
+        add = vector_store.add_nodes
+    else:
+        logger.warning("Vector store %s does not support add/add_nodes interface.", type(vector_store).__name__)
+        return
+    with METRICS.timer("gdocs_vector_store_write_seconds", op="add"):
+        add(nodes)
+    if METRICS.enabled:
+        METRICS.inc("gdocs_vector_store_nodes_total", len(nodes), op="add")
+
+
+def _delete_document_nodes(
+    vector_store,
+    doc_id: str,
+    node_ids: Sequence[str],
+    lexical: Optional[BM25Index] = None,
+    dedup: Optional[DedupIndex] = None,
+) -> None:
+    """Bir belgeye ait node'ları store'un desteklediği arayüzle (ve BM25 indeksinden) siler.
+
+    dedup verilmişse referans node'lar yalnızca imza indeksinden silinir; silinen
+    kanoniklerin yerini alan referanslar store'a eklenir.
+    """
+    if dedup is not None:
+        references, promoted = dedup.remove(node_ids) if node_ids else dedup.remove(doc_id=doc_id)
+        if promoted:
+            _add_nodes_to_store(vector_store, promoted)
+            if lexical is not None:
+                lexical.add_nodes(promoted)
+        if node_ids:
+            node_ids = [n for n in node_ids if n not in references]
+            if not node_ids:
+                return
+    if lexical is not None:
+        if node_ids:
+            lexical.delete_nodes(node_ids)
         else:
-            print("[WARN] Vector store does not support add/add_nodes interface.")
-        if task_manager and hasattr(task_manager, "notify"):
-            task_manager.notify(task_id, f"Processed {len(nodes)} nodes")
+            lexical.delete_document(doc_id)
+    with METRICS.timer("gdocs_vector_store_write_seconds", op="delete"):
+        if node_ids and hasattr(vector_store, "delete_nodes"):
+            vector_store.delete_nodes(list(node_ids))
+        elif hasattr(vector_store, "delete"):
+            vector_store.delete(doc_id)
+        else:
+            logger.warning("Vector store does not support deletes; stale nodes kept for %s.", doc_id)
+            return
+    if METRICS.enabled:
+        METRICS.inc("gdocs_vector_store_nodes_total", len(node_ids), op="delete")
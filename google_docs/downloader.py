@@ -1,38 +1,45 @@
+import logging
 from typing import Optional, Dict, Any
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from google.oauth2 import service_account
 from shared.config import SETTINGS, ensure_credentials
+from google_docs.client_pool import CLIENT_POOL
+
+logger = logging.getLogger("gdocs.downloader")
 
 
 def fetch_document(
     document_id: str,
     credentials_path: Optional[str] = None,
-    fields: str = "*"
+    fields: str = "text",
+    service_account_info: Optional[Dict[str, Any]] = None,
+    api_endpoint: Optional[str] = None,
 ) -> Optional[Dict[str, Any]]:
     """
     Tek bir Google Docs belgesini getirir.
-    fields parametresi performans için kısıtlanabilir (örn: 'title,body/content')
+    fields bir alan maskesi profili ("text", "metadata", "full") ya da ham maske
+    (örn: 'title,body/content') olabilir; varsayılan yalnızca metin alanlarını indirir.
+    service_account_info verilirse kimlik yalnızca bellekten kullanılır; aksi halde
+    credentials_path, ortam değişkeni ya da varsayılan credentials.json denenir.
+    api_endpoint verilirse (örn. benchmark'lardaki sahte sunucu) istekler oraya gider.
     """
-    cred_path = credentials_path or ensure_credentials(SETTINGS.default_credentials_filename)
-    if not cred_path:
-        raise FileNotFoundError("Credentials file not found.")
-
-    creds = service_account.Credentials.from_service_account_file(
-        cred_path, scopes=[SETTINGS.docs_api_scope]
-    )
-    service = build('docs', 'v1', credentials=creds)
+    if service_account_info is not None:
+        client = CLIENT_POOL.get(service_account_info=service_account_info, api_endpoint=api_endpoint)
+    else:
+        cred_path = credentials_path or ensure_credentials(SETTINGS.default_credentials_filename)
+        if not cred_path:
+            raise FileNotFoundError("Credentials file not found.")
+        client = CLIENT_POOL.get(credentials_path=cred_path, api_endpoint=api_endpoint)
 
     try:
-        doc = service.documents().get(documentId=document_id).execute()
+        doc = client.get_document(document_id, fields=fields)
         return doc
     except HttpError as e:
         if e.resp.status == 404:
-            print(f"[ERROR] Document {document_id} not found (404).")
+            logger.error("Document %s not found (404).", document_id)
         elif e.resp.status == 403:
-            print(f"[ERROR] Permission denied for {document_id} (403).")
+            logger.error("Permission denied for %s (403).", document_id)
         else:
-            print(f"[ERROR] HttpError while fetching {document_id}: {e}")
-    except Exception as e:
-        print(f"[ERROR] Unexpected error: {e}")
+            logger.error("HttpError while fetching %s: %s", document_id, e)
+    except Exception:
+        logger.exception("Unexpected error while fetching %s", document_id)
     return None
\ No newline at end of file
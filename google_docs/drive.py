@@ -0,0 +1,296 @@
+import os
+import json
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from google_docs.client_pool import DriveClient
+
+FOLDER_MIME = "application/vnd.google-apps.folder"
+DOCUMENT_MIME = "application/vnd.google-apps.document"
+
+_FILE_FIELDS = "id,name,mimeType,parents,trashed,modifiedTime"
+# Tek files.list sorgusunda OR'lanan klasör sayısı (sorgu uzunluğu sınırının altında kalır)
+_PARENTS_PER_QUERY = 20
+
+
+class DriveSyncState:
+    """Drive klasör taramasının durumunu diskte tutar.
+
+    roots: taranan kök klasörler; page_token: changes feed'de kalınan yer;
+    folders / documents: kökler altındaki klasör ve Docs belgelerinin parent
+    listeleri (taşınan ya da silinen klasörlerin etkisini hesaplamak için);
+    retry_ids: son çalışmada alınamayan belgeler, sonraki artımlı sync'te
+    feed'de görünmeseler de değişmiş sayılır.
+    Dosya IndexManifest gibi atomik olarak (temp dosya + os.replace) yazılır.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.roots: List[str] = []
+        self.page_token: Optional[str] = None
+        self.folders: Dict[str, List[str]] = {}
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.retry_ids: List[str] = []
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.roots = data.get("roots", [])
+            self.page_token = data.get("page_token")
+            self.folders = data.get("folders", {})
+            self.documents = data.get("documents", {})
+            self.retry_ids = data.get("retry_ids", [])
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            payload = {
+                "version": self.VERSION,
+                "roots": self.roots,
+                "page_token": self.page_token,
+                "folders": self.folders,
+                "documents": self.documents,
+                "retry_ids": self.retry_ids,
+            }
+            fd, tmp_path = tempfile.mkstemp(prefix=".drive_state_", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(payload, f)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+
+@dataclass
+class DriveSyncResult:
+    """Bir senkronizasyonun sonucu; page_token commit() ile kalıcı hale gelir."""
+
+    document_ids: List[str]
+    changed_ids: List[str]
+    removed_ids: List[str]
+    page_token: str
+    full_crawl: bool
+    state: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+class DriveFolderSync:
+    """Drive klasörleri altındaki tüm Google Docs belgelerini listeler ve artımlı izler.
+
+    İlk çalışmada (ya da kökler değiştiyse) önce changes feed başlangıç token'ı
+    alınır, ardından klasör ağacı sayfalı files.list ile genişlik öncelikli taranır.
+    Sonraki çalışmalarda yalnızca token'dan bu yana gelen değişiklikler okunur:
+    eklenen / değişen / silinen / taşınan belgeler ve klasörler durum üzerine
+    uygulanır, yeni eklenen klasörler taranır. Sonuç commit() edilene kadar durum
+    diske yazılmaz; böylece işleme yarıda kalırsa aynı değişiklikler tekrar okunur.
+    """
+
+    def __init__(
+        self,
+        client: DriveClient,
+        folder_ids: Sequence[str],
+        state: Optional[DriveSyncState] = None,
+        drive_id: Optional[str] = None,
+        page_size: int = 1000,
+    ):
+        self.client = client
+        self.folder_ids = list(dict.fromkeys(folder_ids))
+        self.state = state or DriveSyncState()
+        self.drive_id = drive_id
+        self.page_size = page_size
+
+    def _drive_kwargs(self) -> Dict[str, Any]:
+        return {"driveId": self.drive_id} if self.drive_id else {}
+
+    def _list_children(self, parent_ids: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        parents = " or ".join(f"'{p}' in parents" for p in parent_ids)
+        query = (
+            f"({parents}) and trashed = false and "
+            f"(mimeType = '{FOLDER_MIME}' or mimeType = '{DOCUMENT_MIME}')"
+        )
+        page_token = None
+        while True:
+            kwargs = {"pageToken": page_token} if page_token else {}
+            if self.drive_id:
+                kwargs.update(driveId=self.drive_id, corpora="drive")
+            response = self.client.list_files(
+                q=query,
+                fields=f"nextPageToken,files({_FILE_FIELDS})",
+                pageSize=self.page_size,
+                **kwargs,
+            )
+            yield from response.get("files", [])
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return
+
+    def _crawl(
+        self, start_folders: Sequence[str], folders: Dict[str, List[str]], documents: Dict[str, Dict[str, Any]]
+    ) -> List[str]:
+        """start_folders altını tarar, folders / documents'ı günceller; bulunan belgeleri döner."""
+        found: List[str] = []
+        pending = list(start_folders)
+        while pending:
+            batch, pending = pending[:_PARENTS_PER_QUERY], pending[_PARENTS_PER_QUERY:]
+            for item in self._list_children(batch):
+                item_id = item["id"]
+                if item["mimeType"] == FOLDER_MIME:
+                    if item_id not in folders:
+                        pending.append(item_id)
+                    folders[item_id] = item.get("parents", [])
+                else:
+                    documents[item_id] = _document_entry(item)
+                    found.append(item_id)
+        return found
+
+    def _changes(self, page_token: str) -> Tuple[List[Dict[str, Any]], str]:
+        changes: List[Dict[str, Any]] = []
+        while True:
+            response = self.client.list_changes(
+                page_token,
+                fields=f"nextPageToken,newStartPageToken,changes(fileId,removed,file({_FILE_FIELDS}))",
+                includeRemoved=True,
+                pageSize=self.page_size,
+                **self._drive_kwargs(),
+            )
+            changes.extend(response.get("changes", []))
+            if response.get("newStartPageToken"):
+                return changes, response["newStartPageToken"]
+            page_token = response["nextPageToken"]
+
+    def sync(self) -> DriveSyncResult:
+        state = self.state
+        if state.page_token and state.roots == self.folder_ids:
+            return self._incremental()
+
+        # Token taramadan önce alınır: tarama sırasında olan değişiklikler kaçmaz
+        token = self.client.get_start_page_token(**self._drive_kwargs())
+        folders: Dict[str, List[str]] = {root: [] for root in self.folder_ids}
+        documents: Dict[str, Dict[str, Any]] = {}
+        found = self._crawl(self.folder_ids, folders, documents)
+        removed = [d for d in state.documents if d not in documents]
+        return DriveSyncResult(
+            document_ids=list(documents),
+            changed_ids=list(dict.fromkeys(found)),
+            removed_ids=removed,
+            page_token=token,
+            full_crawl=True,
+            state={"folders": folders, "documents": documents},
+        )
+
+    def _incremental(self) -> DriveSyncResult:
+        state = self.state
+        changes, token = self._changes(state.page_token)
+        folders = {k: list(v) for k, v in state.folders.items()}
+        documents = dict(state.documents)
+        roots = set(self.folder_ids)
+
+        folder_changes: Dict[str, Optional[Dict[str, Any]]] = {}
+        doc_changes: Dict[str, Optional[Dict[str, Any]]] = {}
+        for change in changes:
+            file_id = change.get("fileId")
+            item = change.get("file")
+            gone = change.get("removed") or item is None or item.get("trashed")
+            mime = item.get("mimeType") if item else None
+            if mime == FOLDER_MIME or (mime is None and file_id in folders):
+                folder_changes[file_id] = None if gone else item
+            elif mime == DOCUMENT_MIME or (mime is None and file_id in documents):
+                doc_changes[file_id] = None if gone else item
+
+        # Klasörler: silinen / kapsam dışına taşınanlar alt ağaçlarıyla çıkarılır
+        for folder_id, item in folder_changes.items():
+            if folder_id in roots:
+                continue
+            if item is None:
+                folders.pop(folder_id, None)
+            elif folder_id in folders:
+                folders[folder_id] = item.get("parents", [])
+        _prune_orphans(folders, roots)
+
+        # Yeni klasörler: parent'ı kapsam içindeyse eklenir (iç içe yeni klasörler için sabit noktaya kadar)
+        new_folders: List[str] = []
+        added = True
+        while added:
+            added = False
+            for folder_id, item in folder_changes.items():
+                if item is None or folder_id in folders:
+                    continue
+                if any(p in folders for p in item.get("parents", [])):
+                    folders[folder_id] = item.get("parents", [])
+                    new_folders.append(folder_id)
+                    added = True
+
+        changed: List[str] = []
+        for doc_id, item in doc_changes.items():
+            if item is not None and any(p in folders for p in item.get("parents", [])):
+                documents[doc_id] = _document_entry(item)
+                changed.append(doc_id)
+            else:
+                documents.pop(doc_id, None)
+
+        # Klasörü taşınan / silinen belgeler
+        for doc_id in [d for d, entry in documents.items() if not any(p in folders for p in entry["parents"])]:
+            del documents[doc_id]
+
+        if new_folders:
+            changed.extend(self._crawl(new_folders, folders, documents))
+
+        removed = [d for d in state.documents if d not in documents]
+        retries = [d for d in state.retry_ids if d in documents]
+        return DriveSyncResult(
+            document_ids=list(documents),
+            changed_ids=list(dict.fromkeys(retries + changed)),
+            removed_ids=removed,
+            page_token=token,
+            full_crawl=False,
+            state={"folders": folders, "documents": documents},
+        )
+
+    def commit(self, result: DriveSyncResult, failed_ids: Sequence[str] = ()) -> None:
+        """Sonucu duruma uygular ve kaydeder; sonraki sync bu token'dan devam eder.
+
+        failed_ids (örn. indirilemeyen belgeler) token ilerlese de bir sonraki
+        artımlı sync'in changed_ids'ine eklenir.
+        """
+        documents = result.state["documents"]
+        self.state.roots = list(self.folder_ids)
+        self.state.page_token = result.page_token
+        self.state.folders = result.state["folders"]
+        self.state.documents = documents
+        self.state.retry_ids = [d for d in dict.fromkeys(failed_ids) if d in documents]
+        self.state.save()
+
+
+def _document_entry(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "parents": item.get("parents", []),
+        "name": item.get("name"),
+        "modified_time": item.get("modifiedTime"),
+    }
+
+
+def _prune_orphans(folders: Dict[str, List[str]], roots: Set[str]) -> None:
+    """Köklere artık bağlanmayan klasörleri (silinen bir klasörün alt ağacı dahil) çıkarır."""
+    reachable = set(roots)
+    children: Dict[str, List[str]] = {}
+    for folder_id, parents in folders.items():
+        for parent in parents:
+            children.setdefault(parent, []).append(folder_id)
+    pending = list(roots)
+    while pending:
+        for child in children.get(pending.pop(), ()):
+            if child not in reachable:
+                reachable.add(child)
+                pending.append(child)
+    for folder_id in [f for f in folders if f not in reachable]:
+        del folders[folder_id]
@@ -0,0 +1,146 @@
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Iterator, Tuple
+
+# namedStyleType -> başlık seviyesi
+HEADING_LEVELS = {
+    "TITLE": 0,
+    "SUBTITLE": 1,
+    "HEADING_1": 1,
+    "HEADING_2": 2,
+    "HEADING_3": 3,
+    "HEADING_4": 4,
+    "HEADING_5": 5,
+    "HEADING_6": 6,
+}
+
+# Sıralı (numaralı) liste glyph'leri; diğerleri "-" ile yazılır
+ORDERED_GLYPH_TYPES = frozenset({"DECIMAL", "ZERO_DECIMAL", "ALPHA", "UPPER_ALPHA", "ROMAN", "UPPER_ROMAN"})
+LIST_INDENT = "  "
+
+@dataclass
+class ExtractedDocument:
+    """Docs JSON'dan çıkarılan düz metin ve yapı bilgisi.
+
+    paragraph_offsets: her paragrafın text içindeki başlangıç offset'i
+    headings: (offset, seviye, başlık metni) üçlüleri
+    """
+
+    text: str
+    paragraph_offsets: List[int] = field(default_factory=list)
+    headings: List[Tuple[int, int, str]] = field(default_factory=list)
+
+    def structure_metadata(self) -> Dict[str, Any]:
+        """Document metadata'sına eklenecek yapı alanları (bkz. llama_utils.STRUCTURE_METADATA_KEYS)."""
+        return {
+            "paragraph_offsets": self.paragraph_offsets,
+            "headings": [list(h) for h in self.headings],
+        }
+
+
+def _root_contents(raw_doc: Dict[str, Any]) -> Iterator[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+    """(içerik, lists) çiftleri: body.content'i ya da (includeTabsContent ile alınmışsa) tüm sekmeleri verir."""
+    body = raw_doc.get("body")
+    if body is not None:
+        yield body.get("content", []), raw_doc.get("lists", {})
+        return
+    tabs = list(reversed(raw_doc.get("tabs", [])))
+    while tabs:
+        tab = tabs.pop()
+        document_tab = tab.get("documentTab", {})
+        yield document_tab.get("body", {}).get("content", []), document_tab.get("lists", {})
+        tabs.extend(reversed(tab.get("childTabs", [])))
+
+
+def _bullet_marker(
+    bullet: Dict[str, Any], lists: Dict[str, Any], counters: Dict[str, List[int]]
+) -> str:
+    """Liste öğesinin girintili işareti: numaralı seviyelerde "3. ", diğerlerinde "- ".
+
+    Numara (listId, seviye) başına sayılır; üst seviyeden bir öğe gelince alt
+    seviyelerin sayacı sıfırlanır. Harf / Roma rakamı glyph'leri de sayı olarak yazılır.
+    """
+    list_id = bullet.get("listId", "")
+    level = bullet.get("nestingLevel", 0)
+    levels = lists.get(list_id, {}).get("listProperties", {}).get("nestingLevels", [])
+    glyph = levels[level].get("glyphType") if level < len(levels) else None
+    counts = counters.setdefault(list_id, [])
+    del counts[level + 1:]
+    counts.extend([0] * (level + 1 - len(counts)))
+    counts[level] += 1
+    marker = f"{counts[level]}. " if glyph in ORDERED_GLYPH_TYPES else "- "
+    return LIST_INDENT * level + marker
+
+
+def extract_document(raw_doc: Dict[str, Any]) -> ExtractedDocument:
+    """Docs API belgesini tek geçişte, özyinelemesiz olarak düz metne çevirir.
+
+    Paragraflar, tablo hücreleri (iç içe tablolar dahil) ve içindekiler tablosu
+    belge sırasıyla gezilir. Liste öğeleri nestingLevel kadar girintili "- " ya
+    da "1. " işaretiyle yazılır. Metin parçaları listede toplanıp tek join ile
+    birleştirilir; paragraf ve başlık offset'leri aynı geçişte kaydedilir.
+    """
+    parts: List[str] = []
+    paragraph_offsets: List[int] = []
+    headings: List[Tuple[int, int, str]] = []
+    pos = 0
+
+    for contents, lists in _root_contents(raw_doc):
+        counters: Dict[str, List[int]] = {}
+        stack = [iter(contents)]
+        while stack:
+            element = next(stack[-1], None)
+            if element is None:
+                stack.pop()
+                continue
+
+            para = element.get("paragraph")
+            if para is not None:
+                runs: List[str] = []
+                for elem in para.get("elements", ()):
+                    text_run = elem.get("textRun")
+                    if text_run is None:
+                        continue
+                    content = text_run.get("content")
+                    if content:
+                        runs.append(content)
+                if not runs:
+                    continue
+                start = pos
+                bullet = para.get("bullet")
+                if bullet is not None:
+                    marker = _bullet_marker(bullet, lists, counters)
+                    parts.append(marker)
+                    pos += len(marker)
+                parts.extend(runs)
+                pos += sum(len(r) for r in runs)
+                paragraph_offsets.append(start)
+                level = HEADING_LEVELS.get(para.get("paragraphStyle", {}).get("namedStyleType"))
+                if level is not None:
+                    headings.append((start, level, "".join(runs).strip()))
+                continue
+
+            table = element.get("table")
+            if table is not None:
+                cells = [
+                    cell.get("content", [])
+                    for row in table.get("tableRows", ())
+                    for cell in row.get("tableCells", ())
+                ]
+                stack.append(el for cell_content in cells for el in cell_content)
+                continue
+
+            toc = element.get("tableOfContents")
+            if toc is not None:
+                stack.append(iter(toc.get("content", [])))
+
+    text = "".join(parts)
+    stripped = text.strip()
+    lead = len(text) - len(text.lstrip())
+    if lead:
+        paragraph_offsets = [max(o - lead, 0) for o in paragraph_offsets]
+        headings = [(max(o - lead, 0), lvl, t) for o, lvl, t in headings]
+    return ExtractedDocument(text=stripped, paragraph_offsets=paragraph_offsets, headings=headings)
+
+
+def extract_text(raw_doc: Dict[str, Any]) -> str:
+    return extract_document(raw_doc).text
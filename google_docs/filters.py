@@ -0,0 +1,98 @@
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence, Union
+
+
+class InvalidFilterException(ValueError):
+    pass
+
+
+def parse_timestamp(value: Union[str, datetime, None]) -> Optional[datetime]:
+    """RFC 3339 / ISO 8601 zaman damgasını UTC'ye çevirir; saat dilimi yoksa UTC kabul edilir."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError as e:
+            raise InvalidFilterException(f"Invalid timestamp '{value}': {e}") from e
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+class DocumentFilter:
+    """Belge başlığı ve değişiklik zamanı üzerinden çalışan ön filtre.
+
+    - inclusion_rules: başlıkta geçmesi gereken kelimelerden en az biri (büyük/küçük harf duyarsız)
+    - exclusion_rules: başlıkta geçerse belgeyi dışlayan kelimeler
+    - title_regex / exclude_title_regex: başlığa uygulanan düzenli ifadeler (re.search)
+    - modified_since: bu zamandan önce değişmiş belgeler dışlanır (Drive modifiedTime)
+
+    Kurallar yalnızca metadata gerektirdiği için gövde indirilmeden uygulanabilir;
+    değişiklik zamanı Docs API'de olmadığından modified_since Drive metadata'sı ister.
+    """
+
+    def __init__(
+        self,
+        inclusion_rules: Sequence[str] = (),
+        exclusion_rules: Sequence[str] = (),
+        title_regex: Optional[str] = None,
+        exclude_title_regex: Optional[str] = None,
+        modified_since: Union[str, datetime, None] = None,
+    ):
+        self.inclusion = [r.lower() for r in inclusion_rules if r]
+        self.exclusion = [r.lower() for r in exclusion_rules if r]
+        try:
+            self.title_regex = re.compile(title_regex) if title_regex else None
+            self.exclude_title_regex = re.compile(exclude_title_regex) if exclude_title_regex else None
+        except re.error as e:
+            raise InvalidFilterException(f"Invalid title regex: {e}") from e
+        self.modified_since = parse_timestamp(modified_since)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "DocumentFilter":
+        return cls(
+            inclusion_rules=config.get("inclusion_rules") or (),
+            exclusion_rules=config.get("exclusion_rules") or (),
+            title_regex=config.get("title_regex"),
+            exclude_title_regex=config.get("exclude_title_regex"),
+            modified_since=config.get("modified_since"),
+        )
+
+    @property
+    def active(self) -> bool:
+        return bool(
+            self.inclusion or self.exclusion or self.title_regex
+            or self.exclude_title_regex or self.modified_since
+        )
+
+    @property
+    def needs_modified_time(self) -> bool:
+        return self.modified_since is not None
+
+    def match_title(self, title: Optional[str]) -> bool:
+        title = title or ""
+        tl = title.lower()
+        if self.inclusion and not any(r in tl for r in self.inclusion):
+            return False
+        if self.exclusion and any(r in tl for r in self.exclusion):
+            return False
+        if self.title_regex is not None and not self.title_regex.search(title):
+            return False
+        if self.exclude_title_regex is not None and self.exclude_title_regex.search(title):
+            return False
+        return True
+
+    def matches(self, title: Optional[str], modified_time: Union[str, datetime, None] = None) -> bool:
+        """Başlık kuralları + modified_since; değişiklik zamanı bilinmiyorsa belge elenmez."""
+        if not self.match_title(title):
+            return False
+        if self.modified_since is not None and modified_time:
+            try:
+                return parse_timestamp(modified_time) >= self.modified_since
+            except InvalidFilterException:
+                return True
+        return True
@@ -0,0 +1,238 @@
+import time
+import socket
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from shared.config import SETTINGS
+
+# Geçici kabul edilen HTTP durumları; 403 yalnızca kota nedenleriyle (bkz. is_throttle) tekrar denenir
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+_RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded")
+# Geçici ağ hataları; httplib2 DNS hatalarını ServerNotFoundError ya da socket.gaierror olarak yükseltir
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError, socket.gaierror, httplib2.ServerNotFoundError)
+
+
+class TokenBucket:
+    """Saniyede rate token üreten, en fazla burst token biriktiren kova.
+
+    acquire() token'ı hemen rezerve eder (bakiye eksiye düşebilir) ve gereken
+    süre kadar kilit dışında uyur; böylece bekleyenler sırayla ve tam hızda
+    ilerler. pause(seconds) Retry-After için tüm çağıranları o ana kadar bekletir.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Bir token alır; beklenen süreyi (sn) döndürür."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            wait = max(-self._tokens / self.rate if self._tokens < 0 else 0.0, self._paused_until - now)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class AdaptiveConcurrency:
+    """AIMD eşzamanlılık sınırı: sağlıklı yanıtlarda +1, kısıtlamada yarıya iner.
+
+    Sınır, bir "pencere" (o anki sınır kadar) başarılı yanıttan sonra bir artar;
+    kısıtlama (429 / kota 403) gelince en fazla cooldown saniyede bir yarıya iner,
+    böylece aynı anda uçuşta olan isteklerin 429'ları sınırı sıfıra çekmez.
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 64, cooldown: float = 1.0):
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum, self.minimum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.cooldown = cooldown
+        self._in_flight = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self._successes = 0
+                self.limit += 1
+                self._cond.notify()
+
+    def on_throttle(self) -> None:
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self._successes = 0
+            self.limit = max(self.minimum, self.limit // 2)
+
+
+class RetryBudget:
+    """Bir çalıştırma (get_documents / process) boyunca yapılabilecek toplam tekrar sayısı.
+
+    Kalıcı bir kesintide her belgenin kendi tekrar hakkını tüketip çalıştırmayı
+    dakikalarca uzatmasını önler; bütçe bitince hatalar hemen yükseltilir.
+    """
+
+    def __init__(self, max_retries: int):
+        self.max_retries = max_retries
+        self.used = 0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        return max(self.max_retries - self.used, 0)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.used >= self.max_retries:
+                return False
+            self.used += 1
+            return True
+
+
+def default_max_concurrency() -> int:
+    """AIMD tavanı: aynı anda çalışabilecek fetch havuzlarının toplam boyutu.
+
+    Limiter kimlik başına process genelinde paylaşılır; tek bir reader zaten
+    fetch_max_workers ile sınırlıdır, tavan ise eşzamanlı görevlerin (scheduler
+    ya da arka plan indeksleme işleri) havuzlarının toplamına izin verir.
+    """
+    return SETTINGS.fetch_max_workers * max(SETTINGS.scheduler_max_concurrency, SETTINGS.index_job_workers, 1)
+
+
+class RateLimiter:
+    """Bir kimlik (ve API) için paylaşılan token bucket + AIMD eşzamanlılık + backoff politikası."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        initial_concurrency: int,
+        max_concurrency: int,
+        max_attempts: int = 6,
+        base_delay: float = 0.5,
+        max_delay: float = 32.0,
+    ):
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, maximum=max_concurrency)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_settings(cls) -> "RateLimiter":
+        return cls(
+            rate=SETTINGS.api_rate_per_second,
+            burst=SETTINGS.api_burst,
+            initial_concurrency=SETTINGS.api_initial_concurrency,
+            max_concurrency=SETTINGS.api_max_concurrency or default_max_concurrency(),
+            max_attempts=SETTINGS.api_max_attempts,
+            base_delay=SETTINGS.api_backoff_base,
+            max_delay=SETTINGS.api_backoff_max,
+        )
+
+    def acquire(self) -> float:
+        """Eşzamanlılık slotu + token alır; hız sınırı için beklenen süreyi döndürür."""
+        self.concurrency.acquire()
+        if self.bucket is None:
+            return 0.0
+        try:
+            return self.bucket.acquire()
+        except BaseException:
+            self.concurrency.release()
+            raise
+
+    def release(self, error: Optional[BaseException] = None) -> None:
+        self.concurrency.release()
+        if error is None:
+            self.concurrency.on_success()
+        elif is_throttle(error):
+            self.concurrency.on_throttle()
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """attempt. tekrar için bekleme: full jitter üstel backoff, Retry-After'dan kısa değil."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+            if self.bucket is not None:
+                self.bucket.pause(delay)
+        return delay
+
+
+def _error_reason(error: HttpError) -> str:
+    try:
+        details = error.error_details
+    except Exception:
+        return ""
+    if isinstance(details, list):
+        return " ".join(str(d.get("reason", "")) for d in details if isinstance(d, dict))
+    return ""
+
+
+def is_throttle(error: BaseException) -> bool:
+    """429 ya da kota nedenli 403."""
+    if not isinstance(error, HttpError):
+        return False
+    status = error.resp.status
+    if status == 429:
+        return True
+    return status == 403 and any(r in _error_reason(error) for r in _RATE_LIMIT_REASONS)
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, HttpError):
+        return error.resp.status in RETRYABLE_STATUSES or is_throttle(error)
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Retry-After başlığı (saniye ya da HTTP tarihi); yoksa None."""
+    if not isinstance(error, HttpError):
+        return None
+    value = error.resp.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
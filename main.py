@@ -1,42 +1,31 @@
 import streamlit as st
 import os
 import json
-import secrets
-import tempfile
-from pathlib import Path
-from google_docs.chat_interface import run_documents_chat
+from typing import Optional
+from llama_index.core import Settings
+from google_docs.chat_interface import run_documents_chat, render_document_preview
 from google_docs.docs_reader import GoogleDocsConfigReader
-from shared.llama_utils import setup_llama_index, create_index_from_documents
-from shared.config import set_credentials_path, SETTINGS
+from shared.llama_utils import setup_llama_index, create_index_from_documents, load_persisted_index
+from shared.config import SETTINGS
+from google_docs.client_pool import CLIENT_POOL, credential_key
+from shared.query_engine import QUERY_MODES, search_index
+from shared.jobs import JOB_RUNNER, Job, DONE, CANCELLED
 
 
-def save_credentials_securely(raw_content: str) -> str:
-    """Validate raw JSON key content and store in a unique temp file."""
+def load_credentials(raw_content: str) -> dict:
+    """Validate raw JSON key content and keep it in this session only (never written to disk)."""
     parsed = json.loads(raw_content)  # JSON validation
     if "client_email" not in parsed:
         raise ValueError("Invalid credentials (missing client_email).")
-
-    tmp_dir = Path(tempfile.gettempdir())
-    file_name = f"gcred_{secrets.token_hex(8)}.json"
-    cred_path = tmp_dir / file_name
-    cred_path.write_text(json.dumps(parsed), encoding="utf-8")
-
-    try:
-        os.chmod(cred_path, 0o600)
-    except Exception:
-        pass  # Windows vb. ortamda sorun olabilir
-
-    set_credentials_path(str(cred_path))
-    st.session_state["credentials_path"] = str(cred_path)
-    return str(cred_path)
+    st.session_state["service_account_info"] = parsed
+    return parsed
 
 
 def handle_credentials_input():
     st.sidebar.markdown("---")
     st.sidebar.subheader("🔐 Google API Credentials")
 
-    existing = st.session_state.get("credentials_path")
-    if existing and Path(existing).exists():
+    if st.session_state.get("service_account_info"):
         st.sidebar.success("✅ Credentials loaded.")
         return True
 
@@ -48,25 +37,20 @@ def handle_credentials_input():
 
     if content.strip():
         try:
-            path = save_credentials_securely(content.strip())
-            st.sidebar.success(f"✅ Saved: {path}")
+            info = load_credentials(content.strip())
+            st.sidebar.success(f"✅ Loaded: {info['client_email']}")
             return True
         except json.JSONDecodeError as e:
             st.sidebar.error(f"JSON parse error: {e}")
         except Exception as e:
-            st.sidebar.error(f"Save error: {e}")
+            st.sidebar.error(f"Credentials error: {e}")
     return False
 
 
 def cleanup_credentials():
-    cred_path = st.session_state.get("credentials_path")
-    if cred_path and os.path.exists(cred_path):
-        try:
-            os.unlink(cred_path)
-        except Exception as e:
-            st.sidebar.warning(f"Could not delete: {e}")
-    st.session_state.pop("credentials_path", None)
-    os.environ.pop(SETTINGS.credentials_env_var, None)
+    info = st.session_state.pop("service_account_info", None)
+    if info:
+        CLIENT_POOL.evict(service_account_info=info)
 
 
 def render_help():
@@ -83,6 +67,138 @@ def render_help():
     )
 
 
+@st.cache_resource(show_spinner="Loading embedding model...")
+def load_embed_model():
+    """Embedding model shared by all sessions; loaded once per process."""
+    setup_llama_index()
+    return Settings.embed_model
+
+
+@st.cache_resource(show_spinner="Loading persisted index...", max_entries=2)
+def load_shared_index(persist_dir: str, snapshot_mtime: float):
+    """Persisted multi-doc index shared by all sessions; reloaded when CURRENT changes."""
+    return load_persisted_index(persist_dir)
+
+
+def index_documents(job: Job, config: dict) -> dict:
+    """Background job: fetch documents in batches, then embed and build the index."""
+    setup_llama_index()
+    reader = GoogleDocsConfigReader(data_source_id="google_docs", config=config)
+    if config.get("folder_ids"):
+        job.report("Listing Drive folders...")
+    doc_ids = reader.list_document_ids()
+    if not doc_ids:
+        return {"index": None, "documents": 0}
+    size = SETTINGS.stream_doc_batch_size
+    documents, errors = [], {}
+    for start in range(0, len(doc_ids), size):
+        job.check_cancelled()
+        documents.extend(reader.get_documents(document_ids=doc_ids[start:start + size]))
+        errors.update(reader.fetch_errors)
+        done = min(start + size, len(doc_ids))
+        job.set_preview(titles=[d.metadata.get("title", "(no title)") for d in documents[:10]], errors=dict(errors))
+        job.report(f"Fetched {done}/{len(doc_ids)} documents", 0.4 * done / len(doc_ids))
+    if not documents:
+        return {"index": None, "documents": 0}
+
+    def on_embedded(done: int, total: int) -> None:
+        job.check_cancelled()
+        job.report(f"Embedded {done}/{total} chunks", 0.4 + 0.6 * done / max(total, 1))
+
+    index = create_index_from_documents(
+        documents,
+        chunk_size=SETTINGS.chunk_size,
+        chunk_overlap=SETTINGS.chunk_overlap,
+        persist_dir=SETTINGS.index_persist_dir,
+        progress=on_embedded,
+    )
+    return {"index": index, "documents": len(documents)}
+
+
+def render_job_progress(snapshot: dict) -> None:
+    message = snapshot["messages"][-1] if snapshot["messages"] else "Queued..."
+    st.progress(snapshot["progress"], text=message)
+
+
+@st.fragment(run_every=1.0)
+def poll_job(job_id: str, render_preview) -> None:
+    """Refresh only this block while the job runs; rerun the page once it finishes."""
+    job = JOB_RUNNER.get(job_id)
+    if job is None or job.finished:
+        st.rerun()
+    snapshot = job.snapshot()
+    render_job_progress(snapshot)
+    if st.button("Cancel", key=f"cancel-{job_id}", disabled=snapshot["cancel_requested"]):
+        job.cancel()
+    render_preview(snapshot["preview"])
+
+
+def render_multi_preview(preview) -> None:
+    if not preview:
+        return
+    for failed_id, err in preview.get("errors", {}).items():
+        st.warning(f"{failed_id} could not be fetched: {err}")
+    if preview.get("titles"):
+        st.write("Sample Titles:")
+        for title in preview["titles"]:
+            st.write(f"- {title}")
+
+
+def render_job(session_key: str, render_preview) -> Optional[Job]:
+    """Show the session's current job; returns it once finished successfully."""
+    job = JOB_RUNNER.get(st.session_state.get(session_key))
+    if job is None:
+        return None
+    if not job.finished:
+        poll_job(job.id, render_preview)
+        return None
+    snapshot = job.snapshot()
+    if job.status == CANCELLED:
+        st.info("Cancelled.")
+        return None
+    if job.status != DONE:
+        st.error(f"Error: {snapshot['error']}")
+        render_preview(snapshot["preview"])
+        return None
+    render_preview(snapshot["preview"])
+    return job
+
+
+def render_search(index):
+    st.markdown("---")
+    st.subheader("🔎 Search Indexed Documents")
+    with st.form("multi_docs_search"):
+        query = st.text_input("Query", help="Question or keywords; the most similar chunks are shown.")
+        top_k = st.number_input("Results", min_value=1, max_value=50, value=SETTINGS.query_top_k)
+        modes = list(QUERY_MODES)
+        mode = st.selectbox(
+            "Mode",
+            modes,
+            index=modes.index(SETTINGS.query_mode) if SETTINGS.query_mode in modes else 0,
+            help="auto: exact terms such as ticket IDs use keyword search only, other queries use hybrid. "
+                 "lexical: keyword (BM25) only, no embedding. vector: semantic only.",
+        )
+        submitted = st.form_submit_button("Search")
+    if not submitted:
+        return
+    if not query.strip():
+        st.error("Enter a query.")
+        return
+    try:
+        hits = search_index(index, query, top_k=int(top_k), mode=mode)
+    except Exception as e:
+        st.error(f"Search error: {e}")
+        return
+    if not hits:
+        st.info("No matching chunks.")
+    for i, hit in enumerate(hits, 1):
+        score = f" (score {hit.score:.3f})" if hit.score is not None else ""
+        with st.expander(f"{i}. {hit.title or hit.doc_id or '(no title)'}{score}", expanded=i == 1):
+            st.write(hit.text)
+            if hit.references:
+                st.caption("Also in: " + ", ".join(title or doc_id or "(no title)" for doc_id, title in hit.references))
+
+
 def main():
     st.set_page_config(page_title="Google Docs Reader", page_icon="📄", layout="wide")
     st.title("📄 Google Docs File Reader")
@@ -92,6 +208,12 @@ def main():
         render_help()
         return
 
+    try:
+        load_embed_model()
+    except Exception as e:
+        st.error(f"Embedding model could not be loaded: {e}")
+        return
+
     tab_single, tab_multi = st.tabs(["Single Document", "Multiple Documents"])
 
     with tab_single:
@@ -103,52 +225,90 @@ def main():
             if not document_id.strip():
                 st.error("Document ID required.")
             else:
-                run_documents_chat(document_id.strip())
+                job = run_documents_chat(
+                    document_id.strip(), service_account_info=st.session_state["service_account_info"]
+                )
+                st.session_state["single_doc_job"] = job.id
+        if render_job("single_doc_job", render_document_preview) is not None:
+            st.success("Document loaded & index built.")
 
     with tab_multi:
         st.subheader("Index Multiple Google Docs")
+        if "multi_docs_index" not in st.session_state and SETTINGS.index_persist_dir:
+            current = os.path.join(SETTINGS.index_persist_dir, "CURRENT")
+            try:
+                mtime = os.path.getmtime(current) if os.path.exists(current) else 0.0
+                persisted = load_shared_index(SETTINGS.index_persist_dir, mtime) if mtime else None
+            except Exception as e:
+                persisted = None
+                st.warning(f"Persisted index could not be loaded: {e}")
+            if persisted is not None:
+                st.session_state["multi_docs_index"] = persisted
+                st.caption(f"Loaded persisted index from {SETTINGS.index_persist_dir}.")
         multi_ids_raw = st.text_area(
             "Document IDs (one per line)",
             help="Only the ID part (between /d/ and /edit) for each document."
         )
+        folder_ids_raw = st.text_area(
+            "Drive Folder IDs (optional, one per line)",
+            help="All Google Docs under these folders (recursively) are indexed. "
+                 "Share the folders with the service account e-mail."
+        )
         inclusion_raw = st.text_area("Inclusion Rules (optional)", help="Words that must appear in the title")
         exclusion_raw = st.text_area("Exclusion Rules (optional)", help="Words that exclude a doc if present in the title")
+        title_regex = st.text_input("Title Regex (optional)", help="Only documents whose title matches are indexed")
+        modified_since = st.date_input("Modified Since (optional)", value=None,
+                                       help="Skip documents last modified before this date")
         if st.button("📚 Index Documents"):
             doc_ids = [l.strip() for l in multi_ids_raw.splitlines() if l.strip()]
-            if not doc_ids:
-                st.error("Enter at least one Document ID.")
+            folder_ids = [l.strip() for l in folder_ids_raw.splitlines() if l.strip()]
+            if not doc_ids and not folder_ids:
+                st.error("Enter at least one Document ID or Drive Folder ID.")
             else:
-                cred_path = st.session_state.get("credentials_path")
+                service_account_dict = st.session_state["service_account_info"]
+                config = {
+                    "service_account_dict": service_account_dict,
+                    "document_ids": doc_ids,
+                    "folder_ids": folder_ids,
+                    "inclusion_rules": [l.strip() for l in inclusion_raw.splitlines() if l.strip()],
+                    "exclusion_rules": [l.strip() for l in exclusion_raw.splitlines() if l.strip()],
+                    "title_regex": title_regex.strip() or None,
+                    "modified_since": modified_since.isoformat() if modified_since else None,
+                }
                 try:
-                    with open(cred_path, "r", encoding="utf-8") as f:
-                        service_account_dict = json.load(f)
+                    # Validate in the script thread so config errors show up immediately
+                    GoogleDocsConfigReader(data_source_id="google_docs", config=config)
+                    key = (
+                        "multi",
+                        credential_key(service_account_dict),
+                        tuple(doc_ids),
+                        tuple(folder_ids),
+                        tuple(config["inclusion_rules"]),
+                        tuple(config["exclusion_rules"]),
+                        config["title_regex"],
+                        config["modified_since"],
+                    )
+                    job = JOB_RUNNER.submit(
+                        key,
+                        lambda job: index_documents(job, config),
+                        reuse_seconds=SETTINGS.index_job_reuse_seconds,
+                    )
+                    st.session_state["multi_docs_job"] = job.id
                 except Exception as e:
-                    st.error(f"Could not read credentials: {e}")
-                    service_account_dict = None
-                if service_account_dict:
-                    config = {
-                        "service_account_dict": service_account_dict,
-                        "document_ids": doc_ids,
-                        "inclusion_rules": [l.strip() for l in inclusion_raw.splitlines() if l.strip()],
-                        "exclusion_rules": [l.strip() for l in exclusion_raw.splitlines() if l.strip()],
-                    }
-                    try:
-                        reader = GoogleDocsConfigReader(data_source_id="google_docs", config=config)
-                        setup_llama_index()
-                        documents = reader.get_documents()
-                        if not documents:
-                            st.warning("No documents passed the filters or contents are empty.")
-                        else:
-                            index = create_index_from_documents(documents, chunk_size=SETTINGS.chunk_size, chunk_overlap=SETTINGS.chunk_overlap)
-                            st.success(f"{len(documents)} documents indexed.")
-                            st.write("Sample Titles:")
-                            for d in documents[:10]:
-                                st.write(f"- {d.metadata.get('title','(no title)')}")
-                            # İleride sorgulama için session'da sakla
-                            st.session_state["multi_docs_index"] = index
-                            st.info("Index stored in session_state['multi_docs_index'] (you can add a query UI).")
-                    except Exception as e:
-                        st.error(f"Indexing error: {e}")
+                    st.error(f"Indexing error: {e}")
+
+        finished = render_job("multi_docs_job", render_multi_preview)
+        if finished is not None:
+            # Older jobs may have released their index (see JobRunner); the session keeps its own reference
+            if not finished.result.get("documents"):
+                st.warning("No documents passed the filters or contents are empty.")
+            else:
+                st.success(f"{finished.result['documents']} documents indexed.")
+                if not finished.result_released:
+                    st.session_state["multi_docs_index"] = finished.result["index"]
+
+        if st.session_state.get("multi_docs_index") is not None:
+            render_search(st.session_state["multi_docs_index"])
 
     if st.sidebar.button("🗑️ Clear Credentials"):
         cleanup_credentials()
@@ -0,0 +1,148 @@
+from array import array
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+# keys -> (len(keys), dim) float32 normalize vektörler
+VectorFetcher = Callable[[np.ndarray], np.ndarray]
+# keys -> bool maske (örn. silinmemiş satırlar)
+KeyFilter = Callable[[np.ndarray], np.ndarray]
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray, block: int = 16_384) -> np.ndarray:
+    """Her vektör için en yakın merkez; (n, k) skor matrisi blok blok hesaplanır."""
+    out = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block):
+        out[start:start + block] = np.argmax(vectors[start:start + block] @ centroids.T, axis=1)
+    return out
+
+
+def _kmeans(vectors: np.ndarray, k: int, iterations: int, seed: int) -> np.ndarray:
+    """Küresel k-means (cosine); merkezler her adımda yeniden normalize edilir."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _nearest(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        counts = np.bincount(assign, minlength=k)
+        empty = counts == 0
+        if empty.any():
+            # Boş kalan kümeleri rastgele noktalara taşı
+            sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.maximum(norms, 1e-12)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """Inverted-file (IVF) yaklaşık en yakın komşu indeksi, saf NumPy.
+
+    Vektörler k-means ile nlist kümeye ayrılır; sorguda yalnızca en yakın nprobe
+    kümenin üyeleri taranır. nprobe recall/gecikme dengesini ayarlar
+    (nprobe = nlist tam aramaya eşittir). İndeks yalnızca int64 anahtarları tutar;
+    vektörler sorgu anında fetch ile (örn. memmap'ten) okunur, böylece bellekte
+    ikinci bir kopya oluşmaz. Eğitimden sonra add ile artımlı ekleme yapılabilir.
+    """
+
+    def __init__(self, nlist: int = 256, nprobe: int = 8, seed: int = 0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[array] = []
+        self.ntotal = 0
+        self.trained_on = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, vectors: np.ndarray, iterations: int = 10, sample: int = 64) -> None:
+        """En fazla nlist * sample vektörlük bir örnek üzerinde merkezleri öğrenir."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        nlist = min(self.nlist, len(vectors))
+        if len(vectors) > nlist * sample:
+            rng = np.random.default_rng(self.seed)
+            vectors = vectors[rng.choice(len(vectors), size=nlist * sample, replace=False)]
+        self.centroids = _kmeans(vectors, nlist, iterations, self.seed)
+        self.nlist = nlist
+        self._lists = [array("q") for _ in range(nlist)]
+        self.ntotal = 0
+        self.trained_on = len(vectors)
+
+    def add(self, keys: np.ndarray, vectors: np.ndarray) -> None:
+        if not self.is_trained:
+            raise RuntimeError("IVFIndex must be trained before add().")
+        keys = np.asarray(keys, dtype=np.int64)
+        assign = _nearest(np.asarray(vectors, dtype=np.float32), self.centroids)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(self.nlist + 1))
+        for lst in range(self.nlist):
+            lo, hi = bounds[lst], bounds[lst + 1]
+            if hi > lo:
+                self._lists[lst].frombytes(keys[order[lo:hi]].tobytes())
+        self.ntotal += len(keys)
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        parts = [np.frombuffer(self._lists[i], dtype=np.int64) for i in probe if len(self._lists[i])]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        fetch: VectorFetcher,
+        nprobe: Optional[int] = None,
+        keep: Optional[KeyFilter] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(anahtarlar, skorlar) azalan skor sırasıyla; keep verilirse adaylar skorlamadan önce süzülür."""
+        keys = self.candidates(query, nprobe)
+        if keep is not None and len(keys):
+            keys = keys[keep(keys)]
+        if not len(keys):
+            return keys, np.empty(0, dtype=np.float32)
+        scores = fetch(keys) @ query
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return keys[top], scores[top]
+
+    def save(self, path: str) -> None:
+        sizes = np.array([len(lst) for lst in self._lists], dtype=np.int64)
+        keys = (
+            np.concatenate([np.frombuffer(lst, dtype=np.int64) for lst in self._lists])
+            if self._lists else np.empty(0, dtype=np.int64)
+        )
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids if self.centroids is not None else np.empty((0, 0), np.float32),
+                sizes=sizes,
+                keys=keys,
+                params=np.array([self.nlist, self.nprobe, self.seed, self.trained_on], dtype=np.int64),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            nlist, nprobe, seed, trained_on = (int(x) for x in data["params"])
+            index = cls(nlist=nlist, nprobe=nprobe, seed=seed)
+            centroids = data["centroids"]
+            if centroids.size:
+                index.centroids = centroids.astype(np.float32)
+                keys, sizes = data["keys"], data["sizes"]
+                offsets = np.concatenate([[0], np.cumsum(sizes)])
+                index._lists = []
+                for i in range(nlist):
+                    lst = array("q")
+                    lst.frombytes(keys[offsets[i]:offsets[i + 1]].tobytes())
+                    index._lists.append(lst)
+                index.ntotal = int(sizes.sum())
+                index.trained_on = trained_on
+        return index
@@ -0,0 +1,396 @@
+import os
+import json
+import time
+import atexit
+import sqlite3
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from llama_index.core import Document
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.node_parser.node_utils import build_nodes_from_splits
+from llama_index.core.schema import MetadataMode, NodeRelationship, TextNode
+from llama_index.core.utils import get_tokenizer
+
+from shared.config import SETTINGS
+from shared.metrics import METRICS
+
+# Chunk çıktısını değiştiren bir kod değişikliğinde artırılır; eski cache kayıtları kullanılmaz
+CHUNKER_VERSION = 1
+
+STRATEGIES = ("structure", "sentence")
+
+# Document'a chunking için eklenen yapı alanları; embed/LLM metnine girmez, node'lara taşınmaz
+STRUCTURE_METADATA_KEYS = ("paragraph_offsets", "headings")
+
+# Chunk: (başlangıç offset'i, bitiş offset'i, metin)
+Chunk = Tuple[int, int, str]
+
+
+def chunk_cache_key(
+    doc_id: str, revision_id: str, chunk_size: int, chunk_overlap: int, strategy: str
+) -> str:
+    raw = f"{CHUNKER_VERSION}\0{strategy}\0{doc_id}\0{revision_id}\0{chunk_size}\0{chunk_overlap}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ChunkCache:
+    """(doc_id, revisionId, chunk_size, chunk_overlap, strateji) -> chunk listesi; SQLite, LRU.
+
+    EmbeddingCache ile aynı düzen: tek bağlantı kilit altında, last_used ile LRU,
+    max_entries aşılınca en eski kayıtlar silinir; okumalardaki last_used
+    güncellemeleri bellekte biriktirilip put_many, stats ya da close sırasında
+    yazılır. Revizyon değişmedikçe belge tekrar tokenize edilmez.
+    """
+
+    _EVICT_CHECK_EVERY = 256
+    _TOUCH_FLUSH_EVERY = 4096
+
+    def __init__(self, path: str, max_entries: int = 50_000):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._puts_since_check = 0
+        self._pending_touches: Dict[str, int] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " key TEXT PRIMARY KEY, chunks TEXT NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_last_used ON chunks(last_used)")
+        self._conn.commit()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[Chunk]]:
+        found: Dict[str, List[Chunk]] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), 500):
+                part = unique[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, chunks FROM chunks WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, payload in rows:
+                    found[key] = [tuple(c) for c in json.loads(payload)]
+            if found:
+                now = time.time_ns()
+                self._pending_touches.update(dict.fromkeys(found, now))
+                if len(self._pending_touches) >= self._TOUCH_FLUSH_EVERY:
+                    self._flush_touches_locked()
+                    self._conn.commit()
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, items: Dict[str, Sequence[Chunk]]) -> None:
+        if not items:
+            return
+        now = time.time_ns()
+        rows = [(k, json.dumps([list(c) for c in v], ensure_ascii=False), now) for k, v in items.items()]
+        with self._lock:
+            for key in items:
+                self._pending_touches.pop(key, None)
+            self._flush_touches_locked()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (key, chunks, last_used) VALUES (?, ?, ?)", rows
+            )
+            self._puts_since_check += len(rows)
+            if self._puts_since_check >= self._EVICT_CHECK_EVERY:
+                self._puts_since_check = 0
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()
+                if count > self.max_entries:
+                    self._conn.execute(
+                        "DELETE FROM chunks WHERE key IN ("
+                        " SELECT key FROM chunks ORDER BY last_used ASC LIMIT ?)",
+                        (count - self.max_entries,),
+                    )
+            self._conn.commit()
+
+    def _flush_touches_locked(self) -> None:
+        """Biriken last_used güncellemelerini yazar; commit çağırana bırakılır."""
+        if self._pending_touches:
+            self._conn.executemany(
+                "UPDATE chunks SET last_used = ? WHERE key = ?",
+                [(t, k) for k, t in self._pending_touches.items()],
+            )
+            self._pending_touches.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._pending_touches:
+                self._flush_touches_locked()
+                self._conn.commit()
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()
+        total = self.hits + self.misses
+        return {
+            "entries": count,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touches_locked()
+            self._conn.commit()
+            self._conn.close()
+
+
+def _locate(text: str, pieces: Sequence[str], start: int = 0) -> List[Chunk]:
+    """Splitter parçalarını metindeki offset'lerine eşler (bulunamazsa son konumdan devam eder)."""
+    chunks: List[Chunk] = []
+    cursor = start
+    for piece in pieces:
+        found = text.find(piece, cursor)
+        pos = found if found >= 0 else cursor
+        chunks.append((pos, pos + len(piece), piece))
+        # Overlap nedeniyle sonraki parça bu parçanın içinden başlayabilir
+        cursor = pos + 1 if found >= 0 else cursor
+    return chunks
+
+
+def sentence_chunks(text: str, chunk_size: int, chunk_overlap: int) -> List[Chunk]:
+    """SentenceSplitter ile cümle sınırlarından böler (yapı bilgisi olmayan belgeler için)."""
+    splitter = SentenceSplitter(chunk_size=chunk_size, chunk_overlap=min(chunk_overlap, chunk_size // 2))
+    return _locate(text, splitter.split_text(text))
+
+
+def structure_chunks(
+    text: str,
+    paragraph_offsets: Sequence[int],
+    heading_offsets: Sequence[int],
+    chunk_size: int,
+    chunk_overlap: int,
+    count_tokens: Optional[Callable[[str], int]] = None,
+) -> List[Chunk]:
+    """Docs yapısından gelen paragraf sınırlarıyla chunk'lar oluşturur; cümle tespiti yapılmaz.
+
+    Paragraflar chunk_size token'a kadar birleştirilir. Her başlık yeni bir chunk
+    başlatır (başlık ile altındaki metin aynı chunk'ta kalır, bölümler karışmaz).
+    Overlap paragraf düzeyindedir: önceki chunk'ın chunk_overlap token'ı aşmayan
+    son paragrafları sonraki chunk'ın başına eklenir. chunk_size'dan uzun tek bir
+    paragraf SentenceSplitter ile bölünür.
+    """
+    if count_tokens is None:
+        tokenizer = get_tokenizer()
+
+        def count_tokens(s: str) -> int:
+            return len(tokenizer(s))
+
+    headings = set(heading_offsets)
+    bounds = sorted({o for o in paragraph_offsets if 0 <= o < len(text)} | {0})
+    ends = bounds[1:] + [len(text)]
+
+    chunks: List[Chunk] = []
+    # Birikmekte olan chunk'ın paragrafları: (başlangıç, bitiş, token)
+    current: List[Tuple[int, int, int]] = []
+    current_tokens = 0
+    has_body = False
+
+    def flush(keep_overlap: bool) -> None:
+        nonlocal current, current_tokens, has_body
+        if current:
+            start, end = current[0][0], current[-1][1]
+            chunks.append((start, end, text[start:end]))
+        tail: List[Tuple[int, int, int]] = []
+        if keep_overlap and chunk_overlap > 0:
+            budget = chunk_overlap
+            for para in reversed(current[1:]):
+                if para[2] > budget:
+                    break
+                tail.insert(0, para)
+                budget -= para[2]
+        current = tail
+        current_tokens = sum(p[2] for p in tail)
+        has_body = False
+
+    for para_start, para_end in zip(bounds, ends):
+        segment = text[para_start:para_end]
+        stripped = segment.strip()
+        if not stripped:
+            continue
+        start = para_start + (len(segment) - len(segment.lstrip()))
+        end = start + len(stripped)
+        # +1: paragraflar arasındaki satır sonu birleşik metinde ayrı token'dır
+        tokens = count_tokens(stripped) + 1
+        is_heading = para_start in headings or start in headings
+
+        if is_heading and has_body:
+            flush(keep_overlap=False)
+        if tokens > chunk_size:
+            flush(keep_overlap=False)
+            chunks.extend(_locate(text, SentenceSplitter(
+                chunk_size=chunk_size, chunk_overlap=min(chunk_overlap, chunk_size // 2)
+            ).split_text(stripped), start))
+            continue
+        if current and current_tokens + tokens > chunk_size:
+            flush(keep_overlap=True)
+            # Overlap paragrafları yeni paragrafla sığmıyorsa bırakılır
+            while current and current_tokens + tokens > chunk_size:
+                current_tokens -= current.pop(0)[2]
+        current.append((start, end, tokens))
+        current_tokens += tokens
+        has_body = has_body or not is_heading
+    flush(keep_overlap=False)
+    return chunks
+
+
+def _chunk_one(task: Tuple[str, List[int], List[int], int, int, str]) -> List[Chunk]:
+    text, paragraph_offsets, heading_offsets, chunk_size, chunk_overlap, strategy = task
+    if strategy == "structure" and paragraph_offsets:
+        return structure_chunks(text, paragraph_offsets, heading_offsets, chunk_size, chunk_overlap)
+    return sentence_chunks(text, chunk_size, chunk_overlap)
+
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+
+def _executor(workers: int) -> ProcessPoolExecutor:
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_WORKERS != workers:
+            if _POOL is not None:
+                _POOL.shutdown(wait=False, cancel_futures=True)
+            # fork, Streamlit gibi çok thread'li bir process'te güvenli değil
+            _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _POOL_WORKERS = workers
+        return _POOL
+
+
+def shutdown_chunk_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_chunk_pool)
+
+_CACHE: Optional[ChunkCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def default_chunk_cache() -> Optional[ChunkCache]:
+    """SETTINGS.chunk_cache_path'teki paylaşılan cache (kapalıysa None)."""
+    global _CACHE
+    if not SETTINGS.chunk_cache_path:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = ChunkCache(SETTINGS.chunk_cache_path, max_entries=SETTINGS.chunk_cache_max_entries)
+        return _CACHE
+
+
+def _metadata_tokens(document: Document, tokenizer) -> int:
+    """SentenceSplitter gibi: embed / LLM metadata metninden uzun olanın token sayısı."""
+    longest = max(
+        (document.get_metadata_str(mode=m) for m in (MetadataMode.EMBED, MetadataMode.LLM)), key=len
+    )
+    return len(tokenizer(longest))
+
+
+def chunk_documents(
+    documents: Sequence[Document],
+    chunk_size: int,
+    chunk_overlap: int,
+    strategy: Optional[str] = None,
+    workers: Optional[int] = None,
+    cache: Optional[ChunkCache] = None,
+) -> List[TextNode]:
+    """Belgeleri chunk'lara böler ve LlamaIndex TextNode'ları döndürür.
+
+    - strategy "structure": Docs paragraf / başlık sınırları (metadata'daki
+      paragraph_offsets, headings); yapı bilgisi olmayan belgelerde "sentence"
+    - workers > 0 ve cache'te olmayan belge sayısı SETTINGS.chunk_parallel_min_docs'u
+      aşıyorsa chunking spawn'lı process havuzunda yapılır
+    - cache: revision_id metadata'sı olan belgelerin chunk'ları
+      (doc_id, revisionId, chunk_size, chunk_overlap) anahtarıyla saklanır
+
+    chunk_size, SentenceSplitter'daki gibi metadata token'ları düşülerek uygulanır.
+    Node'lar belge metadata'sını (yapı alanları hariç), SOURCE / PREVIOUS / NEXT
+    ilişkilerini ve karakter offset'lerini taşır.
+    """
+    strategy = strategy or SETTINGS.chunk_strategy
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown chunk strategy '{strategy}', expected one of {STRATEGIES}")
+    workers = SETTINGS.chunk_workers if workers is None else workers
+    documents = list(documents)
+    tokenizer = get_tokenizer()
+
+    keys: List[Optional[str]] = []
+    for doc in documents:
+        revision = doc.metadata.get("revision_id")
+        doc_id = doc.metadata.get("doc_id") or doc.doc_id
+        keys.append(
+            chunk_cache_key(doc_id, revision, chunk_size, chunk_overlap, strategy)
+            if cache is not None and revision else None
+        )
+    cached = cache.get_many([k for k in keys if k]) if cache is not None else {}
+
+    results: List[Optional[List[Chunk]]] = []
+    tasks: List[Tuple[int, Tuple]] = []
+    for i, (doc, key) in enumerate(zip(documents, keys)):
+        chunks = cached.get(key) if key else None
+        if chunks is not None and all(end <= len(doc.text) for _, end, _ in chunks):
+            results.append(chunks)
+            continue
+        results.append(None)
+        effective = chunk_size - _metadata_tokens(doc, tokenizer)
+        if effective <= 0:
+            raise ValueError(
+                f"Metadata of document {doc.doc_id} is longer than chunk size ({chunk_size})."
+            )
+        tasks.append((i, (
+            doc.text,
+            list(doc.metadata.get("paragraph_offsets") or []),
+            [h[0] for h in doc.metadata.get("headings") or []],
+            effective,
+            chunk_overlap,
+            strategy,
+        )))
+
+    with METRICS.timer("gdocs_chunking_seconds"):
+        if workers > 0 and len(tasks) >= SETTINGS.chunk_parallel_min_docs:
+            chunksize = max(len(tasks) // (workers * 4), 1)
+            outputs = list(_executor(workers).map(_chunk_one, [t for _, t in tasks], chunksize=chunksize))
+        else:
+            outputs = [_chunk_one(t) for _, t in tasks]
+    fresh: Dict[str, List[Chunk]] = {}
+    for (i, _), chunks in zip(tasks, outputs):
+        results[i] = chunks
+        if keys[i]:
+            fresh[keys[i]] = chunks
+    if cache is not None:
+        cache.put_many(fresh)
+
+    nodes: List[TextNode] = []
+    for doc, chunks in zip(documents, results):
+        doc_nodes = build_nodes_from_splits([c[2] for c in chunks], doc)
+        metadata = {k: v for k, v in doc.metadata.items() if k not in STRUCTURE_METADATA_KEYS}
+        for node, (start, end, _) in zip(doc_nodes, chunks):
+            node.metadata = dict(metadata)
+            node.start_char_idx = start
+            node.end_char_idx = end
+        for prev, nxt in zip(doc_nodes, doc_nodes[1:]):
+            prev.relationships[NodeRelationship.NEXT] = nxt.as_related_node_info()
+            nxt.relationships[NodeRelationship.PREVIOUS] = prev.as_related_node_info()
+        nodes.extend(doc_nodes)
+
+    if METRICS.enabled:
+        METRICS.inc("gdocs_chunked_documents_total", len(documents))
+        METRICS.inc("gdocs_chunks_total", len(nodes))
+        METRICS.inc("gdocs_chunk_cache_hits_total", len(documents) - len(tasks))
+    return nodes
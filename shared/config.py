@@ -1,5 +1,5 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 
 
@@ -13,13 +13,111 @@ class AppSettings:
     
     chunk_size: int = 1024
     chunk_overlap: int = 20
+    # "sentence": SentenceSplitter (varsayılan); "structure": Docs paragraf / başlık sınırlarından böler
+    # (daha hızlı, ancak chunk sınırları ve dolayısıyla arama sonuçları değişir; mevcut indeksler yeniden kurulmalı)
+    chunk_strategy: str = field(default_factory=lambda: os.environ.get("GDOCS_CHUNK_STRATEGY", "sentence"))
+    # CHUNK_WORKERS > 0 ise chunking process havuzunda yapılır (en az chunk_parallel_min_docs belgede)
+    chunk_workers: int = field(default_factory=lambda: int(os.environ.get("CHUNK_WORKERS", "0")))
+    chunk_parallel_min_docs: int = 32
+    # Chunk cache (SQLite), anahtar (doc_id, revisionId, chunk_size, chunk_overlap); yalnızca
+    # GDOCS_CHUNK_CACHE verilirse açılır (örn. ~/.cache/gdocs_reader/chunks.sqlite)
+    chunk_cache_path: Optional[str] = field(default_factory=lambda: os.environ.get("GDOCS_CHUNK_CACHE") or None)
+    chunk_cache_max_entries: int = 50_000
+
+    # get_documents için eşzamanlı istek sınırı (1 = sıralı)
+    fetch_max_workers: int = 8
+
+    # process(stream=True): belge batch boyutu, embed çağrısı başına node ve aşamalar arası kuyruk sınırı
+    stream_doc_batch_size: int = 16
+    stream_embed_batch_size: int = 512
+    stream_queue_size: int = 2
+
+    # Verilirse multi-doc indeksi bu klasöre snapshot olarak kalıcı yazılır / oradan yüklenir
+    index_persist_dir: Optional[str] = field(default_factory=lambda: os.environ.get("GDOCS_INDEX_DIR"))
+    # Okuyucular eski snapshot'ı yüklerken silinmesin diye tutulan snapshot sayısı
+    index_snapshots_to_keep: int = 2
+    # Uygulamanın kurduğu index'lerin vector store'u: "simple" (llama-index bellek içi store'u, snapshot'a
+    # yazılır) ya da "numpy" (shared.vector_store.NumpyVectorStore; vector_store_path klasöründe, verilmezse
+    # index_persist_dir/vectors). GDOCS_ANN=ivf ile numpy store ann_min_rows satırdan sonra IVF indeksiyle
+    # aranır: ann_nlist küme (None: ~4 * sqrt(satır)), sorgu başına en yakın ann_nprobe küme taranır.
+    vector_store: str = field(default_factory=lambda: os.environ.get("GDOCS_VECTOR_STORE", "simple"))
+    vector_store_path: Optional[str] = field(default_factory=lambda: os.environ.get("GDOCS_VECTOR_STORE_DIR") or None)
+    ann: Optional[str] = field(default_factory=lambda: os.environ.get("GDOCS_ANN") or None)
+    ann_nlist: Optional[int] = None
+    ann_nprobe: int = 8
+    ann_min_rows: int = 20_000
+
+    # Verilirse embedding'ler bu SQLite dosyasında cache'lenir (örn. ~/.cache/gdocs_reader/embeddings.sqlite)
+    embed_cache_path: Optional[str] = field(default_factory=lambda: os.environ.get("GDOCS_EMBED_CACHE") or None)
+    embed_cache_max_entries: int = 200_000
+
+    # EMBED_WORKERS > 0 ise embedding'ler worker process havuzunda, dinamik batch'lerle hesaplanır
+    embed_workers: int = field(default_factory=lambda: int(os.environ.get("EMBED_WORKERS", "0")))
+    embed_max_batch_tokens: int = 8192
+    embed_max_batch_size: int = 128
+    embed_max_seq_tokens: int = 512
+
+    # Multi-doc arama: varsayılan sonuç sayısı, sonuç ve sorgu embedding LRU boyutları
+    query_top_k: int = 5
+    query_result_cache_size: int = 1024
+    query_embedding_cache_size: int = 4096
+    # Sorgu modu: "auto" (ID / kod gibi kısa terim sorgularında yalnızca BM25, aksi halde
+    # hybrid), "hybrid", "vector" ya da "lexical". Hybrid: alpha * vektör + (1 - alpha) * BM25
+    # (her ikisi min-max normalize); her kaynaktan top_k * query_hybrid_candidates aday alınır.
+    query_mode: str = field(default_factory=lambda: os.environ.get("GDOCS_QUERY_MODE", "auto"))
+    query_hybrid_alpha: float = 0.5
+    query_hybrid_candidates: int = 4
+    # Index kurulurken (create_index_from_documents, process) BM25 indeksi de kurulur ve saklanır
+    lexical_index: bool = True
+    # process(): chunk'lar embed edilmeden önce MinHash / LSH ile near-duplicate denetimi. Tahmini
+    # Jaccard benzerliği eşiği geçen chunk'lar embed edilmez, store'a yazılmaz; kanonik node'a
+    # referans olarak imza indeksinde tutulur; arama sonuçları bu referanslarla genişletilir.
+    # Varsayılan kapalı (0); örn. GDOCS_DEDUP_THRESHOLD=0.9 ile açılır.
+    dedup_threshold: float = field(default_factory=lambda: float(os.environ.get("GDOCS_DEDUP_THRESHOLD", "0")))
+    dedup_num_perm: int = 128
+    # Kelime shingle uzunluğu
+    dedup_shingle_size: int = 5
+
+    # Arka plan indeksleme işleri: eşzamanlı iş sayısı ve aynı isteğin sonucunun yeniden kullanım süresi
+    index_job_workers: int = 2
+    index_job_reuse_seconds: float = 300.0
+
+    # Ingestion scheduler (SQLite): görev deposu, global ve data source başına eşzamanlılık
+    scheduler_db_path: str = field(
+        default_factory=lambda: os.environ.get(
+            "GDOCS_SCHEDULER_DB",
+            os.path.join(os.path.expanduser("~"), ".cache", "gdocs_reader", "scheduler.sqlite"),
+        )
+    )
+    scheduler_max_concurrency: int = 4
+    scheduler_per_source_limit: int = 1
+
+    # Google API istek politikası (kimlik + API başına paylaşılır). Varsayılan hız Docs API'nin
+    # kullanıcı başına 300 okuma/dk kotasıdır; GDOCS_API_RATE=0 hız sınırını kapatır.
+    api_rate_per_second: float = field(default_factory=lambda: float(os.environ.get("GDOCS_API_RATE", "5")))
+    api_burst: int = 10
+    # Uçuştaki istek sınırı AIMD ile 1..api_max_concurrency arasında ayarlanır. Limiter paylaşıldığı
+    # için tavan tek bir fetch havuzunu değil, eşzamanlı görevlerin toplamını sınırlar; verilmezse
+    # fetch_max_workers * max(scheduler_max_concurrency, index_job_workers) (bkz. rate_limit.default_max_concurrency)
+    api_initial_concurrency: int = 8
+    api_max_concurrency: Optional[int] = None
+    # 429 / 5xx / bağlantı hatalarında: istek başına deneme, üstel backoff tabanı ve tavanı (sn)
+    api_max_attempts: int = 6
+    api_backoff_base: float = 0.5
+    api_backoff_max: float = 32.0
+    # Bir process() çalıştırması boyunca toplam tekrar sayısı
+    api_retry_budget: int = 200
+
+    # Ölçüm sink'leri, örn. GDOCS_METRICS="log,memory,prometheus=/var/lib/node_exporter/gdocs.prom"; boşsa kapalı
+    metrics_sinks: Optional[str] = field(default_factory=lambda: os.environ.get("GDOCS_METRICS"))
 
 SETTINGS = AppSettings()
 
 
 def set_credentials_path(path: str) -> None:
     """
-    Güvenli şekilde environment değişkenini günceller.
+    Environment değişkenini günceller (process geneli; tek kullanıcılı CLI içindir).
+    Eşzamanlı okuyucular için kimliği service_account_info ile bellekten verin.
     """
     if not path:
         return
@@ -32,12 +130,12 @@ def get_credentials_path() -> Optional[str]:
 
 def ensure_credentials(fallback: str = None) -> Optional[str]:
     """
-    Eğer env'de yoksa fallback'i (örn. credentials.json) kullanır.
+    Eğer env'de yoksa fallback'i (örn. credentials.json) döndürür.
+    Ortam değişkenini değiştirmez; eşzamanlı okuyucular birbirini etkilemez.
     """
     current = get_credentials_path()
     if current and os.path.exists(current):
         return current
     if fallback and os.path.exists(fallback):
-        set_credentials_path(fallback)
         return fallback
     return None
\ No newline at end of file
@@ -0,0 +1,413 @@
+import os
+import re
+import json
+import zlib
+import functools
+import sqlite3
+import hashlib
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.storage.docstore.utils import doc_to_json, json_to_doc
+
+# Store klasöründeki imza indeksi dosya adı
+DEDUP_FILE = "dedup_index.sqlite"
+
+# Permütasyonlar multiply-shift hash'tir: ((a * h + b) mod 2^64) >> 32, a tek sayı
+_PERM_SEED = 1
+# Shingle hash'i kelime kodlarının polinomudur (mod 2^64)
+_SHINGLE_MIX = np.uint64(0x9E3779B97F4A7C15)
+_WORD_RE = re.compile(r"\w+")
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _word_code(word: str) -> int:
+    return zlib.crc32(word.encode("utf-8"))
+
+
+def shingle_hashes(text: str, size: int) -> Optional[np.ndarray]:
+    """Küçük harfe çevrilmiş kelime size-gram'larının tekil 64 bit hash'leri; kelime yoksa None.
+
+    Kısa metinlerde (size kelime ya da daha az) metnin tamamı tek shingle olur.
+    """
+    words = _WORD_RE.findall(text.casefold())
+    if not words:
+        return None
+    codes = np.fromiter(map(_word_code, words), dtype=np.uint64, count=len(words))
+    count = max(len(codes) - size + 1, 1)
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(min(size, len(codes))):
+        hashes = hashes * _SHINGLE_MIX + codes[offset:offset + count]
+    return np.unique(hashes)
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Eşik için (band, satır) sayısı: yanlış pozitif + yanlış negatif alanını en aza indirir.
+
+    İki imza, benzerlikleri s iken en az bir bantta 1 - (1 - s^r)^b olasılıkla
+    çakışır; eğrinin eşiğin altında kalan kısmı gereksiz aday, üstünde kalan
+    kısmı kaçan duplicate'tir.
+    """
+    s = np.linspace(0.0, 1.0, 201)
+    step = s[1] - s[0]
+    below, above = s <= threshold, s >= threshold
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        p = 1.0 - (1.0 - s ** rows) ** bands
+        error = (p[below].sum() + (1.0 - p[above]).sum()) * step
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+@dataclass
+class _Pending:
+    node: BaseNode
+    doc_id: Optional[str]
+    signature: np.ndarray
+    canonical_id: Optional[str]
+
+
+class DedupIndex:
+    """Chunk'lar için kalıcı MinHash imza indeksi ve LSH ile near-duplicate tespiti.
+
+    assign() embed'den önce her node'un imzasını hesaplar; LSH bantlarında çakışan
+    ve tahmini Jaccard benzerliği threshold'u geçen kanonik bir node varsa node
+    duplicate sayılır: embed edilmez, store'a yazılmaz, yalnızca kanonik node'a
+    referans olarak burada tutulur. commit() store'a yazılan batch'i kalıcılaştırır;
+    o ana kadar kararlar bellekte bekler, yarıda kalan bir çalışma indeksi bozmaz.
+
+    Kanonik node silindiğinde (remove) referanslarından biri kanonik olur; onun
+    embedding'i olarak kanonik node'un vektörü kullanılır, yeniden embed gerekmez.
+    threshold 0 ise yeni duplicate aranmaz; mevcut referanslar yalnızca silme ve
+    kanonikleştirme için kullanılır. Dosya SQLite; tek bağlantı kilit altında,
+    pipeline thread'leri arasında paylaşılabilir.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.9, num_perm: int = 128, shingle_size: int = 5):
+        if not 0.0 <= threshold <= 1.0:
+            raise ValueError(f"dedup threshold must be in [0, 1], got {threshold}")
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(_PERM_SEED)
+        self._a = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self._lock = threading.RLock()
+        # Henüz commit edilmemiş kararlar: node_id -> kayıt; kanonikler için bellek içi bantlar
+        self._pending: Dict[str, _Pending] = {}
+        self._pending_buckets: Dict[Tuple[int, int], List[str]] = {}
+        # Bu çalışmada yeniden indekslenecek belgeler: eski node'ları silineceği için kanonik sayılmaz
+        self._replacing: Set[str] = set()
+        self._committed: Set[str] = set()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS nodes ("
+            " node_id TEXT PRIMARY KEY, doc_id TEXT, canonical_id TEXT,"
+            " signature BLOB NOT NULL, embedding BLOB, node TEXT);"
+            "CREATE INDEX IF NOT EXISTS idx_nodes_doc ON nodes(doc_id);"
+            "CREATE INDEX IF NOT EXISTS idx_nodes_canonical ON nodes(canonical_id);"
+            "CREATE TABLE IF NOT EXISTS bands (band INTEGER NOT NULL, bucket INTEGER NOT NULL, node_id TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_bands_bucket ON bands(band, bucket);"
+            "CREATE INDEX IF NOT EXISTS idx_bands_node ON bands(node_id);"
+        )
+        self._check_settings()
+        self._conn.commit()
+
+    def _check_settings(self) -> None:
+        stored = dict(self._conn.execute("SELECT key, value FROM settings").fetchall())
+        signature = {"num_perm": str(self.num_perm), "shingle_size": str(self.shingle_size)}
+        if stored and any(stored.get(k) != v for k, v in signature.items()):
+            raise ValueError(
+                f"Dedup index {self.path} was built with num_perm={stored.get('num_perm')}, "
+                f"shingle_size={stored.get('shingle_size')}; delete it or use the same settings."
+            )
+        if self.threshold > 0 or not stored.get("bands"):
+            self.bands, self.rows = lsh_params(self.threshold or 1.0, self.num_perm)
+        else:
+            self.bands, self.rows = (int(v) for v in stored["bands"].split("x"))
+        layout = f"{self.bands}x{self.rows}"
+        if stored and stored.get("bands") != layout:
+            # Eşik değişti: imzalar aynı kalır, yalnızca bant tablosu yeniden kurulur
+            self._conn.execute("DELETE FROM bands")
+            rows = self._conn.execute("SELECT node_id, signature FROM nodes WHERE canonical_id IS NULL")
+            self._conn.executemany(
+                "INSERT INTO bands (band, bucket, node_id) VALUES (?, ?, ?)",
+                [
+                    (band, bucket, node_id)
+                    for node_id, blob in rows.fetchall()
+                    for band, bucket in self._buckets(np.frombuffer(blob, dtype=np.uint32))
+                ],
+            )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+            [*signature.items(), ("bands", layout)],
+        )
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """num_perm uzunluğunda MinHash imzası (uint32); metinde kelime yoksa None."""
+        hashes = shingle_hashes(text, self.shingle_size)
+        if hashes is None:
+            return None
+        values = (self._a[:, None] * hashes[None, :] + self._b[:, None]) >> np.uint64(32)
+        return values.min(axis=1).astype(np.uint32)
+
+    def _buckets(self, signature: np.ndarray) -> List[Tuple[int, int]]:
+        out = []
+        for band in range(self.bands):
+            part = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(part, digest_size=8).digest()
+            out.append((band, int.from_bytes(digest, "big", signed=True)))
+        return out
+
+    def similarity(self, a: np.ndarray, b: np.ndarray) -> float:
+        """İki imzanın tahmini Jaccard benzerliği."""
+        return float(np.count_nonzero(a == b)) / self.num_perm
+
+    def begin(self, replacing: Iterable[str] = ()) -> None:
+        """Yeni çalışma: replacing belgelerinin mevcut node'ları kanonik aday sayılmaz."""
+        with self._lock:
+            self._replacing = set(replacing)
+            self._committed = set()
+
+    def _candidates_locked(self, buckets: List[Tuple[int, int]]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        for key in buckets:
+            for node_id in self._pending_buckets.get(key, ()):
+                found[node_id] = self._pending[node_id].signature
+        placeholders = ",".join("(?, ?)" for _ in buckets)
+        rows = self._conn.execute(
+            "SELECT n.node_id, n.doc_id, n.signature FROM nodes n WHERE n.node_id IN ("
+            f" SELECT node_id FROM bands WHERE (band, bucket) IN (VALUES {placeholders}))",
+            [v for key in buckets for v in key],
+        ).fetchall()
+        for node_id, doc_id, blob in rows:
+            if doc_id in self._replacing and node_id not in self._committed:
+                continue
+            found[node_id] = np.frombuffer(blob, dtype=np.uint32)
+        return found
+
+    def assign(self, nodes: Sequence[BaseNode]) -> Tuple[List[BaseNode], List[BaseNode]]:
+        """Node'ları (kanonik, duplicate) olarak ayırır; kararlar commit()'e kadar bellekte tutulur."""
+        if not self.threshold:
+            return list(nodes), []
+        unique: List[BaseNode] = []
+        duplicates: List[BaseNode] = []
+        with self._lock:
+            for node in nodes:
+                signature = self.signature(node.get_content(metadata_mode=MetadataMode.NONE))
+                if signature is None:
+                    unique.append(node)
+                    continue
+                buckets = self._buckets(signature)
+                best_id, best = None, self.threshold
+                for candidate_id, candidate in self._candidates_locked(buckets).items():
+                    score = self.similarity(signature, candidate)
+                    if score >= best:
+                        best_id, best = candidate_id, score
+                doc_id = node.metadata.get("doc_id") or node.ref_doc_id
+                self._pending[node.node_id] = _Pending(node, doc_id, signature, best_id)
+                if best_id is None:
+                    unique.append(node)
+                    for key in buckets:
+                        self._pending_buckets.setdefault(key, []).append(node.node_id)
+                else:
+                    duplicates.append(node)
+        return unique, duplicates
+
+    def is_duplicate(self, node_id: str) -> bool:
+        """assign()'da duplicate sayılan ve hâlâ bir kanoniğe bağlı olan (commit bekleyen) node."""
+        with self._lock:
+            entry = self._pending.get(node_id)
+            return entry is not None and entry.canonical_id is not None
+
+    def commit(self, nodes: Sequence[BaseNode]) -> None:
+        """Store'a yazılan kanonikleri (embedding'leriyle) ve duplicate referanslarını kalıcılaştırır."""
+        with self._lock:
+            node_rows, band_rows = [], []
+            for node in nodes:
+                entry = self._pending.pop(node.node_id, None)
+                if entry is None:
+                    continue
+                blob = entry.signature.tobytes()
+                if entry.canonical_id is None:
+                    embedding = None
+                    if node.embedding is not None:
+                        embedding = np.asarray(node.embedding, dtype=np.float32).tobytes()
+                    node_rows.append((node.node_id, entry.doc_id, None, blob, embedding, None))
+                    buckets = self._buckets(entry.signature)
+                    band_rows.extend((band, bucket, node.node_id) for band, bucket in buckets)
+                    for key in buckets:
+                        ids = self._pending_buckets.get(key)
+                        if ids and node.node_id in ids:
+                            ids.remove(node.node_id)
+                            if not ids:
+                                del self._pending_buckets[key]
+                else:
+                    payload = json.dumps(doc_to_json(node), ensure_ascii=False)
+                    node_rows.append((node.node_id, entry.doc_id, entry.canonical_id, blob, None, payload))
+                self._committed.add(node.node_id)
+            self._conn.execute("DELETE FROM bands WHERE node_id IN (SELECT value FROM json_each(?))",
+                               (json.dumps([r[0] for r in node_rows]),))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO nodes (node_id, doc_id, canonical_id, signature, embedding, node)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                node_rows,
+            )
+            self._conn.executemany("INSERT INTO bands (band, bucket, node_id) VALUES (?, ?, ?)", band_rows)
+            self._conn.commit()
+
+    def remove(
+        self, node_ids: Optional[Sequence[str]] = None, doc_id: Optional[str] = None
+    ) -> Tuple[Set[str], List[BaseNode]]:
+        """Node'ları (ya da doc_id'nin tüm node'larını) indeksten siler.
+
+        (referans_id'ler, kanonikleşen node'lar) döner: referanslar store'da yoktur,
+        silinmeleri gerekmez; kanonikleşen node'lar (embedding'i atanmış) store'a
+        eklenmelidir.
+        """
+        with self._lock:
+            if node_ids is not None:
+                ids = list(node_ids)
+                rows = []
+                for start in range(0, len(ids), 500):
+                    part = ids[start:start + 500]
+                    rows += self._conn.execute(
+                        f"SELECT node_id, canonical_id, embedding FROM nodes WHERE node_id IN ({','.join('?' * len(part))})",
+                        part,
+                    ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT node_id, canonical_id, embedding FROM nodes WHERE doc_id = ?", (doc_id,)
+                ).fetchall()
+            removed = [r[0] for r in rows]
+            references = {r[0] for r in rows if r[1] is not None}
+            canonicals = {r[0]: r[2] for r in rows if r[1] is None}
+            payload = json.dumps(removed)
+            self._conn.execute("DELETE FROM nodes WHERE node_id IN (SELECT value FROM json_each(?))", (payload,))
+            self._conn.execute("DELETE FROM bands WHERE node_id IN (SELECT value FROM json_each(?))", (payload,))
+            promoted = []
+            for canonical_id, embedding in canonicals.items():
+                promoted.extend(self._promote_locked(canonical_id, embedding))
+            self._conn.commit()
+        return references, promoted
+
+    def _promote_locked(self, canonical_id: str, embedding: Optional[bytes]) -> List[BaseNode]:
+        """Silinen kanoniğin ilk referansını kanonik yapar, diğer referansları ona bağlar."""
+        vector = np.frombuffer(embedding, dtype=np.float32).tolist() if embedding else None
+        # Commit bekleyen referanslar: aynı batch'te store'a kanonik olarak yazılırlar
+        for entry in self._pending.values():
+            if entry.canonical_id == canonical_id:
+                entry.canonical_id = None
+                entry.node.embedding = vector
+                for key in self._buckets(entry.signature):
+                    self._pending_buckets.setdefault(key, []).append(entry.node.node_id)
+        refs = self._conn.execute(
+            "SELECT node_id, signature, node FROM nodes WHERE canonical_id = ? ORDER BY rowid", (canonical_id,)
+        ).fetchall()
+        if not refs:
+            return []
+        if vector is None:
+            # Vektör yoksa (embedding'siz commit) referanslar bir sonraki çalışmada yeniden indekslenir
+            self._conn.execute("DELETE FROM nodes WHERE canonical_id = ?", (canonical_id,))
+            return []
+        node_id, signature, payload = refs[0]
+        node = json_to_doc(json.loads(payload))
+        node.embedding = vector
+        self._conn.execute(
+            "UPDATE nodes SET canonical_id = NULL, node = NULL, embedding = ? WHERE node_id = ?", (embedding, node_id)
+        )
+        self._conn.execute("UPDATE nodes SET canonical_id = ? WHERE canonical_id = ?", (node_id, canonical_id))
+        self._conn.executemany(
+            "INSERT INTO bands (band, bucket, node_id) VALUES (?, ?, ?)",
+            [(band, bucket, node_id) for band, bucket in self._buckets(np.frombuffer(signature, dtype=np.uint32))],
+        )
+        return [node]
+
+    def references(self, canonical_id: str) -> List[Tuple[str, Optional[str]]]:
+        """Kanonik node'a bağlı duplicate'ler: [(node_id, doc_id), ...]."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT node_id, doc_id FROM nodes WHERE canonical_id = ? ORDER BY rowid", (canonical_id,)
+            ).fetchall()
+
+    def reference_documents(self, canonical_ids: Sequence[str]) -> Dict[str, List[Tuple[Optional[str], Optional[str]]]]:
+        """Kanonik node -> referans belgeleri [(doc_id, başlık), ...]; her belge bir kez, ekleme sırasıyla."""
+        found: Dict[str, List[Tuple[Optional[str], Optional[str]]]] = {}
+        ids = list(dict.fromkeys(canonical_ids))
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                part = ids[start:start + 500]
+                rows = self._conn.execute(
+                    "SELECT canonical_id, doc_id, json_extract(node, '$.__data__.metadata.title') FROM nodes"
+                    f" WHERE canonical_id IN ({','.join('?' * len(part))}) ORDER BY rowid",
+                    part,
+                ).fetchall()
+                for canonical_id, doc_id, title in rows:
+                    docs = found.setdefault(canonical_id, [])
+                    if all(doc_id != d for d, _ in docs):
+                        docs.append((doc_id, title))
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (canonical,) = self._conn.execute("SELECT COUNT(*) FROM nodes WHERE canonical_id IS NULL").fetchone()
+            (duplicates,) = self._conn.execute("SELECT COUNT(*) FROM nodes WHERE canonical_id IS NOT NULL").fetchone()
+        return {
+            "canonical": canonical,
+            "duplicates": duplicates,
+            "threshold": self.threshold,
+            "bands": self.bands,
+            "rows": self.rows,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def dedup_index_path(vector_store: Any) -> Optional[str]:
+    """Klasör tabanlı store'larda (örn. NumpyVectorStore) imza indeksinin varsayılan yeri."""
+    path = getattr(vector_store, "path", None)
+    if isinstance(path, str) and os.path.isdir(path):
+        return os.path.join(path, DEDUP_FILE)
+    return None
+
+
+# index objesi -> DedupIndex; index bellekten düşünce kayıt da düşer
+_ATTACHED: "weakref.WeakKeyDictionary[Any, DedupIndex]" = weakref.WeakKeyDictionary()
+
+
+def attach_dedup_index(index: Any, dedup: Optional[DedupIndex]) -> None:
+    """Vektör index'ine imza indeksini bağlar; arama sonuçları duplicate belgelerle genişletilir."""
+    if dedup is None:
+        _ATTACHED.pop(index, None)
+    else:
+        _ATTACHED[index] = dedup
+
+
+def get_dedup_index(index: Any) -> Optional[DedupIndex]:
+    """Bağlı imza indeksi; yoksa klasör tabanlı store'un yanındaki dosya (varsa) açılıp bağlanır."""
+    dedup = _ATTACHED.get(index)
+    if dedup is None:
+        path = dedup_index_path(getattr(index, "vector_store", None))
+        if path and os.path.exists(path):
+            from shared.config import SETTINGS
+
+            # Eşik 0: yalnızca okunur, kayıtlı bant düzeni korunur
+            dedup = DedupIndex(
+                path, threshold=0.0, num_perm=SETTINGS.dedup_num_perm, shingle_size=SETTINGS.dedup_shingle_size
+            )
+            _ATTACHED[index] = dedup
+    return dedup
@@ -0,0 +1,191 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+from typing import Dict, List, Sequence, Any
+
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from pydantic import PrivateAttr
+
+
+def embedding_cache_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """hash(model + metin) -> vektör eşlemesini SQLite'ta tutan, boyut sınırlı LRU cache.
+
+    - last_used sütunu ile LRU; satır sayısı max_entries'i aşınca en eskiler silinir.
+      Okumalar diske yazmaz: dokunulan anahtarlar bellekte biriktirilip put_many,
+      stats ya da close sırasında tek transaction'da yazılır
+    - hits / misses sayaçları stats() ile okunur
+    - tek bağlantı, kilit altında; thread'ler arasında paylaşılabilir
+    """
+
+    # Her put'ta COUNT(*) çalıştırmamak için tahliye kontrolü aralığı
+    _EVICT_CHECK_EVERY = 256
+    # Bellekte biriken last_used güncellemeleri bu sayıyı aşınca put beklenmeden yazılır
+    _TOUCH_FLUSH_EVERY = 4096
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._puts_since_check = 0
+        self._pending_touches: Dict[str, int] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite parametre sınırına takılmamak için parça parça sorgula
+            for start in range(0, len(unique), 500):
+                part = unique[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time_ns()
+                self._pending_touches.update(dict.fromkeys(found, now))
+                if len(self._pending_touches) >= self._TOUCH_FLUSH_EVERY:
+                    self._flush_touches_locked()
+                    self._conn.commit()
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, items: Dict[str, Sequence[float]]) -> None:
+        if not items:
+            return
+        now = time.time_ns()
+        rows = [(k, array("f", v).tobytes(), now) for k, v in items.items()]
+        with self._lock:
+            for key in items:
+                self._pending_touches.pop(key, None)
+            self._flush_touches_locked()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            self._puts_since_check += len(rows)
+            if self._puts_since_check >= self._EVICT_CHECK_EVERY:
+                self._puts_since_check = 0
+                self._evict_locked()
+            self._conn.commit()
+
+    def _flush_touches_locked(self) -> None:
+        """Biriken last_used güncellemelerini yazar; commit çağırana bırakılır."""
+        if self._pending_touches:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(t, k) for k, t in self._pending_touches.items()],
+            )
+            self._pending_touches.clear()
+
+    def _evict_locked(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                " SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._pending_touches:
+                self._flush_touches_locked()
+                self._conn.commit()
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        total = self.hits + self.misses
+        return {
+            "entries": count,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touches_locked()
+            self._conn.commit()
+            self._conn.close()
+
+
+class CachedEmbedding(BaseEmbedding):
+    """Metin embedding'lerini EmbeddingCache üzerinden sunan şeffaf sarmalayıcı.
+
+    Yalnızca cache'te olmayan (ve batch içinde tekrarlanmayan) metinler alttaki
+    modele gönderilir. Sorgu embedding'leri cache'lenmez, doğrudan modele gider.
+    """
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+
+    def __init__(self, inner: BaseEmbedding, cache: EmbeddingCache, **kwargs: Any):
+        kwargs.setdefault("model_name", inner.model_name)
+        kwargs.setdefault("embed_batch_size", inner.embed_batch_size)
+        super().__init__(**kwargs)
+        self._inner = inner
+        self._cache = cache
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        return self._cache
+
+    @property
+    def inner(self) -> BaseEmbedding:
+        return self._inner
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self._inner.get_query_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        return await self._inner.aget_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        keys = [embedding_cache_key(self.model_name, t) for t in texts]
+        found = self._cache.get_many(keys)
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self._inner.get_text_embedding_batch(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self._cache.put_many(computed)
+            found.update(computed)
+        return [found[k] for k in keys]
+
+    async def _aget_text_embedding(self, text: str) -> Embedding:
+        return self._get_text_embedding(text)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        return self._get_text_embeddings(texts)
+
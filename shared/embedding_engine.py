@@ -0,0 +1,139 @@
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, List, Optional, Sequence
+
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from pydantic import Field, PrivateAttr
+
+# Worker process'te bir kez yüklenen model
+_WORKER_MODEL = None
+
+
+def _init_worker(model_name: str, torch_threads: int, max_batch_size: int) -> None:
+    global _WORKER_MODEL
+    try:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+    _WORKER_MODEL = HuggingFaceEmbedding(
+        model_name=model_name, device="cpu", embed_batch_size=max_batch_size
+    )
+
+
+def _embed_texts(texts: List[str]) -> List[Embedding]:
+    return _WORKER_MODEL.get_text_embedding_batch(texts)
+
+
+def _embed_queries(queries: List[str]) -> List[Embedding]:
+    return [_WORKER_MODEL.get_query_embedding(q) for q in queries]
+
+
+def estimate_tokens(text: str, max_seq_tokens: int) -> int:
+    """Tokenizer'sız kaba tahmin (~4 karakter/token), modelin kesme sınırıyla."""
+    return min(len(text) // 4 + 2, max_seq_tokens)
+
+
+def plan_batches(
+    texts: Sequence[str],
+    max_batch_tokens: int,
+    max_batch_size: int,
+    max_seq_tokens: int,
+) -> List[List[int]]:
+    """Metin indekslerini uzunluğa göre sıralayıp padding'i azaltan batch'lere böler.
+
+    Bir batch'in maliyeti en uzun öğe * öğe sayısıdır (padding dahil token);
+    bu değer max_batch_tokens'ı, öğe sayısı max_batch_size'ı aşmaz.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    batches: List[List[int]] = []
+    current: List[int] = []
+    for i in order:
+        tokens = estimate_tokens(texts[i], max_seq_tokens)
+        # Sıralı olduğumuz için batch'in en uzun öğesi her zaman son eklenen olur
+        if current and (
+            len(current) >= max_batch_size or tokens * (len(current) + 1) > max_batch_tokens
+        ):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+class ParallelEmbedding(BaseEmbedding):
+    """HuggingFace modelini worker process havuzunda çalıştıran embedding motoru.
+
+    Her worker modeli bir kez yükler ve torch'u cpu_count / workers thread ile
+    sınırlar. Gelen metinler uzunluk kovalarına göre dinamik batch'lere bölünür
+    (token bütçesi max_batch_tokens) ve worker'lara dağıtılır; sonuçlar girdi
+    sırasıyla döner. Yalnızca CPU kullanır.
+    """
+
+    workers: int = Field(description="Worker process sayısı")
+    max_batch_tokens: int = Field(default=8192, description="Batch başına padding dahil token bütçesi")
+    max_batch_size: int = Field(default=128, description="Batch başına en fazla metin")
+    max_seq_tokens: int = Field(default=512, description="Modelin metni kestiği token sınırı")
+
+    _pool: Optional[ProcessPoolExecutor] = PrivateAttr(default=None)
+    _pool_lock: Any = PrivateAttr(default=None)
+
+    def __init__(self, model_name: str, workers: int, **kwargs: Any):
+        # LlamaIndex get_text_embedding_batch'i bu boyutta parçalar; büyük tutulur ki
+        # kovalama ve worker'lara dağıtım geniş bir metin kümesi üzerinde yapılsın.
+        kwargs.setdefault("embed_batch_size", 2048)
+        super().__init__(model_name=model_name, workers=workers, **kwargs)
+        self._pool_lock = threading.Lock()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ParallelEmbedding"
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    torch_threads = max((os.cpu_count() or 1) // self.workers, 1)
+                    # fork, Streamlit gibi çok thread'li bir process'te güvenli değil
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(self.model_name, torch_threads, self.max_batch_size),
+                    )
+                    atexit.register(self.close)
+        return self._pool
+
+    def close(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        batches = plan_batches(texts, self.max_batch_tokens, self.max_batch_size, self.max_seq_tokens)
+        executor = self._executor()
+        futures = [executor.submit(_embed_texts, [texts[i] for i in batch]) for batch in batches]
+        results: List[Optional[Embedding]] = [None] * len(texts)
+        for batch, future in zip(batches, futures):
+            for i, vector in zip(batch, future.result()):
+                results[i] = vector
+        return results
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._executor().submit(_embed_texts, [text]).result()[0]
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self._executor().submit(_embed_queries, [query]).result()[0]
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        return self._get_query_embedding(query)
+
+    async def _aget_text_embedding(self, text: str) -> Embedding:
+        return self._get_text_embedding(text)
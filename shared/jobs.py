@@ -0,0 +1,192 @@
+import time
+import secrets
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from shared.config import SETTINGS
+from shared.protocol import TaskCancelled
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class Job:
+    """Arka planda çalışan tek bir iş; durumu UI thread'inden okunur.
+
+    İş fonksiyonu job objesini alır ve report / set_preview ile ilerlemeyi
+    yayınlar. notify(task_id, mesaj) ve is_cancelled(task_id) task_manager
+    arayüzüyle uyumludur, böylece job doğrudan EmbeddingMethod.process'e
+    task_manager olarak verilebilir. cancel() kuyruktaki işi hiç başlatmaz;
+    çalışan iş check_cancelled() çağırdığı noktada (ya da process'in batch
+    sınırında) TaskCancelled ile durur.
+    """
+
+    def __init__(self, key: Hashable):
+        self.id = secrets.token_hex(8)
+        self.key = key
+        self.status = QUEUED
+        self.progress = 0.0
+        self.messages: List[str] = []
+        self.preview: Optional[Dict[str, Any]] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.cancel_requested = False
+        # History'ye geçen job'ın sonucu özetiyle değiştirildiyse True (bkz. JobRunner)
+        self.result_released = False
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def cancel(self) -> bool:
+        """Kuyruktaki işi iptal eder, çalışan işe iptal isteği bırakır; iş zaten bittiyse False."""
+        with self._lock:
+            if self.status == QUEUED:
+                self.status = CANCELLED
+                self.finished_at = time.time()
+                return True
+            if self.status == RUNNING:
+                self.cancel_requested = True
+                return True
+            return False
+
+    def is_cancelled(self, task_id: Optional[str] = None) -> bool:
+        return self.cancel_requested
+
+    def check_cancelled(self) -> None:
+        """İptal istendiyse TaskCancelled fırlatır; iş fonksiyonları güvenli noktalarda çağırır."""
+        if self.cancel_requested:
+            raise TaskCancelled(self.id)
+
+    def report(self, message: str, progress: Optional[float] = None) -> None:
+        with self._lock:
+            self.messages.append(message)
+            if progress is not None:
+                self.progress = min(max(progress, 0.0), 1.0)
+
+    def notify(self, task_id: str, message: str) -> None:
+        self.report(message)
+
+    def set_preview(self, **preview: Any) -> None:
+        with self._lock:
+            self.preview = preview
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Tutarlı bir kopya; UI render sırasında iş thread'i durumu değiştirebilir."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "progress": self.progress,
+                "messages": list(self.messages),
+                "preview": self.preview,
+                "error": self.error,
+                "cancel_requested": self.cancel_requested,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class JobRunner:
+    """Process genelinde paylaşılan arka plan iş havuzu.
+
+    Aynı anahtarla gönderilen iş zaten kuyruktaysa / çalışıyorsa (örn. kullanıcı
+    butona tekrar bastı ya da başka bir oturum aynı belgeleri istedi) yeni iş
+    açılmaz, mevcut job döner. reuse_seconds verilirse o süre içinde başarıyla
+    bitmiş aynı anahtarlı job da yeniden kullanılır. Bitmiş job'lardan en yenileri
+    history kadar tutulur; ancak yalnızca en yeni keep_results tanesi sonucunu
+    (örn. kurulmuş index) bellekte tutar, eskilerin sonucu skaler alanlardan oluşan
+    bir özetle değiştirilir ve bu job'lar yeniden kullanılmaz.
+    """
+
+    def __init__(self, max_workers: int = 2, history: int = 64, keep_results: int = 4):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gdocs_job")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._by_key: Dict[Hashable, Job] = {}
+        self._history = history
+        self._keep_results = keep_results
+
+    def submit(
+        self, key: Hashable, fn: Callable[[Job], Any], reuse_seconds: Optional[float] = None
+    ) -> Job:
+        with self._lock:
+            existing = self._by_key.get(key)
+            if existing is not None:
+                if not existing.finished:
+                    return existing
+                if (
+                    reuse_seconds
+                    and existing.status == DONE
+                    and not existing.result_released
+                    and time.time() - existing.finished_at < reuse_seconds
+                ):
+                    return existing
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+            self._trim_locked()
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]) -> None:
+        with job._lock:
+            if job.status == CANCELLED:
+                return
+            job.status = RUNNING
+        try:
+            result = fn(job)
+        except TaskCancelled:
+            with job._lock:
+                job.finished_at = time.time()
+                job.status = CANCELLED
+        except Exception as e:
+            with job._lock:
+                job.error = f"{type(e).__name__}: {e}"
+                job.finished_at = time.time()
+                job.status = FAILED
+        else:
+            with job._lock:
+                job.result = result
+                job.progress = 1.0
+                job.finished_at = time.time()
+                job.status = DONE
+        with self._lock:
+            self._trim_locked()
+
+    def _trim_locked(self) -> None:
+        finished = sorted((j for j in self._jobs.values() if j.finished), key=lambda j: j.finished_at)
+        for job in finished[: max(len(finished) - self._history, 0)]:
+            del self._jobs[job.id]
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+        for job in finished[: max(len(finished) - self._keep_results, 0)]:
+            with job._lock:
+                if not job.result_released:
+                    job.result = _summarize(job.result)
+                    job.result_released = True
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        if not job_id:
+            return None
+        with self._lock:
+            return self._jobs.get(job_id)
+
+
+def _summarize(result: Any) -> Optional[Dict[str, Any]]:
+    """History'deki job için sonucun yalnızca skaler alanları (örn. belge sayısı, başlık)."""
+    if not isinstance(result, dict):
+        return None
+    return {k: v for k, v in result.items() if isinstance(v, (str, int, float, bool))}
+
+
+JOB_RUNNER = JobRunner(max_workers=SETTINGS.index_job_workers)
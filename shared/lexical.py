@@ -0,0 +1,300 @@
+import os
+import re
+import json
+import math
+import tempfile
+import threading
+import weakref
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Snapshot / vector store klasöründeki dosya adı
+LEXICAL_FILE = "lexical_index.npz"
+
+# Kelime + tire / nokta / iki nokta ile bağlı parçalar: "proj-1234", "v2.1", "a/b" tek token olur
+_TOKEN_RE = re.compile(r"\w+(?:[-./:#]\w+)*")
+_JOINERS_RE = re.compile(r"[-./:#]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Küçük harfe çevrilmiş token'lar; bileşik token'ların parçaları da eklenir.
+
+    "PROJ-1234" hem "proj-1234" hem "proj", "1234" verir: tam ID araması bileşik
+    token'la, kısmi arama parçalarla eşleşir.
+    """
+    tokens: List[str] = []
+    for match in _TOKEN_RE.finditer(text.casefold()):
+        token = match.group()
+        tokens.append(token)
+        if not token.isalnum() and _JOINERS_RE.search(token):
+            tokens.extend(p for p in _JOINERS_RE.split(token) if p)
+    return tokens
+
+
+class BM25Index:
+    """Node'lar üzerinde bellek içi ters indeks ve BM25 skorlaması.
+
+    Her terim için posting listesi iki array('i')'dir (satır numaraları ve terim
+    frekansları); sorguda numpy ile kopyasız okunur. Silinen node'lar satır
+    düzeyinde işaretlenir, compact() ile (save sırasında otomatik) atılır.
+    Dosya formatı tek bir .npz: CSR biçiminde posting'ler + JSON metadata.
+    """
+
+    VERSION = 1
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._terms: Dict[str, int] = {}
+        self._postings: List[Tuple[array, array]] = []
+        self._doc_len = array("i")
+        self._alive = bytearray()
+        self._node_ids: List[str] = []
+        self._doc_ids: List[Optional[str]] = []
+        self._row_by_node: Dict[str, int] = {}
+        self._live = 0
+        self._live_len = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def add(self, items: Iterable[Tuple[str, Optional[str], str]]) -> None:
+        """(node_id, doc_id, metin) üçlülerini ekler; aynı node_id varsa eskisinin yerini alır."""
+        with self._lock:
+            for node_id, doc_id, text in items:
+                if node_id in self._row_by_node:
+                    self._kill_locked(self._row_by_node[node_id])
+                tokens = tokenize(text)
+                row = len(self._node_ids)
+                counts: Dict[str, int] = {}
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                for token, tf in counts.items():
+                    term_id = self._terms.get(token)
+                    if term_id is None:
+                        term_id = self._terms[token] = len(self._postings)
+                        self._postings.append((array("i"), array("i")))
+                    rows, tfs = self._postings[term_id]
+                    rows.append(row)
+                    tfs.append(tf)
+                self._node_ids.append(node_id)
+                self._doc_ids.append(doc_id)
+                self._doc_len.append(len(tokens))
+                self._alive.append(1)
+                self._row_by_node[node_id] = row
+                self._live += 1
+                self._live_len += len(tokens)
+
+    def add_nodes(self, nodes: Sequence[Any]) -> None:
+        """LlamaIndex node'larını embed edilen metinleriyle (başlık metadata'sı dahil) ekler."""
+        from llama_index.core.schema import MetadataMode
+
+        self.add(
+            (n.node_id, n.metadata.get("doc_id") or n.ref_doc_id, n.get_content(metadata_mode=MetadataMode.EMBED))
+            for n in nodes
+        )
+
+    def _kill_locked(self, row: int) -> None:
+        if self._alive[row]:
+            self._alive[row] = 0
+            self._live -= 1
+            self._live_len -= self._doc_len[row]
+            del self._row_by_node[self._node_ids[row]]
+
+    def delete_nodes(self, node_ids: Sequence[str]) -> None:
+        with self._lock:
+            for node_id in node_ids:
+                row = self._row_by_node.get(node_id)
+                if row is not None:
+                    self._kill_locked(row)
+
+    def delete_document(self, doc_id: str) -> None:
+        with self._lock:
+            for row, row_doc in enumerate(self._doc_ids):
+                if row_doc == doc_id and self._alive[row]:
+                    self._kill_locked(row)
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """En yüksek BM25 skorlu top_k node: [(node_id, skor), ...]; eşleşme yoksa boş."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            if not terms or not self._live:
+                return []
+            n_rows = len(self._node_ids)
+            avgdl = self._live_len / self._live or 1.0
+            doc_len = np.frombuffer(self._doc_len, dtype=np.int32)
+            alive = np.frombuffer(self._alive, dtype=np.uint8)
+            has_dead = self._live != n_rows
+            scores = np.zeros(n_rows, dtype=np.float32)
+            for term in terms:
+                term_id = self._terms.get(term)
+                if term_id is None:
+                    continue
+                rows_buf, tfs_buf = self._postings[term_id]
+                rows = np.frombuffer(rows_buf, dtype=np.int32)
+                tfs = np.frombuffer(tfs_buf, dtype=np.int32).astype(np.float32)
+                # Silinmiş satırlar df'e sayılmaz (compact edilmemiş indeks de aynı skoru verir)
+                df = int(alive[rows].sum()) if has_dead else len(rows)
+                if not df:
+                    continue
+                idf = math.log(1.0 + (self._live - df + 0.5) / (df + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * doc_len[rows] / avgdl)
+                scores[rows] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+            if has_dead:
+                scores[alive == 0] = 0.0
+            candidates = np.flatnonzero(scores > 0)
+            if not len(candidates):
+                return []
+            if len(candidates) > top_k:
+                part = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+                candidates = candidates[part]
+            order = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [(self._node_ids[i], float(scores[i])) for i in order]
+
+    def compact(self) -> None:
+        """Silinmiş satırları posting'lerden ve node listesinden atar."""
+        with self._lock:
+            if self._live == len(self._node_ids):
+                return
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            remap = np.cumsum(alive, dtype=np.int64) - 1
+            terms: Dict[str, int] = {}
+            postings: List[Tuple[array, array]] = []
+            for term, term_id in self._terms.items():
+                rows = np.frombuffer(self._postings[term_id][0], dtype=np.int32)
+                keep = alive[rows]
+                if not keep.any():
+                    continue
+                terms[term] = len(postings)
+                tfs = np.frombuffer(self._postings[term_id][1], dtype=np.int32)[keep]
+                postings.append((
+                    array("i", remap[rows[keep]].astype(np.int32).tobytes()),
+                    array("i", tfs.tobytes()),
+                ))
+            kept = np.flatnonzero(alive)
+            self._terms = terms
+            self._postings = postings
+            self._doc_len = array("i", np.frombuffer(self._doc_len, dtype=np.int32)[kept].tobytes())
+            self._node_ids = [self._node_ids[i] for i in kept]
+            self._doc_ids = [self._doc_ids[i] for i in kept]
+            self._alive = bytearray(b"\x01" * len(kept))
+            self._row_by_node = {node_id: row for row, node_id in enumerate(self._node_ids)}
+
+    def save(self, path: str) -> None:
+        """Atomik yazım (geçici dosya + os.replace)."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self.compact()
+            terms = sorted(self._terms, key=self._terms.get)
+            lengths = np.array([len(self._postings[self._terms[t]][0]) for t in terms], dtype=np.int64)
+            offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            rows = np.frombuffer(b"".join(self._postings[self._terms[t]][0].tobytes() for t in terms), dtype=np.int32)
+            tfs = np.frombuffer(b"".join(self._postings[self._terms[t]][1].tobytes() for t in terms), dtype=np.int32)
+            meta = {
+                "version": self.VERSION,
+                "k1": self.k1,
+                "b": self.b,
+                "terms": terms,
+                "node_ids": self._node_ids,
+                "doc_ids": self._doc_ids,
+            }
+            doc_len = np.frombuffer(self._doc_len, dtype=np.int32)
+            fd, tmp_path = tempfile.mkstemp(prefix=".lexical-", suffix=".npz", dir=directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(
+                        f,
+                        meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+                        offsets=offsets,
+                        rows=rows,
+                        tfs=tfs,
+                        doc_len=doc_len,
+                    )
+                os.replace(tmp_path, path)
+            except Exception:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            offsets, rows, tfs = data["offsets"], data["rows"], data["tfs"]
+            doc_len = data["doc_len"]
+        if meta.get("version") != cls.VERSION:
+            raise ValueError(f"Unsupported lexical index version {meta.get('version')} in {path}")
+        index = cls(k1=meta["k1"], b=meta["b"])
+        index._terms = {term: i for i, term in enumerate(meta["terms"])}
+        index._postings = [
+            (array("i", rows[start:stop].tobytes()), array("i", tfs[start:stop].tobytes()))
+            for start, stop in zip(offsets[:-1], offsets[1:])
+        ]
+        index._doc_len = array("i", doc_len.astype(np.int32).tobytes())
+        index._node_ids = list(meta["node_ids"])
+        index._doc_ids = list(meta["doc_ids"])
+        index._alive = bytearray(b"\x01" * len(index._node_ids))
+        index._row_by_node = {node_id: row for row, node_id in enumerate(index._node_ids)}
+        index._live = len(index._node_ids)
+        index._live_len = int(doc_len.sum())
+        return index
+
+    @classmethod
+    def open(cls, path: str) -> "BM25Index":
+        """Dosya varsa yükler, yoksa boş indeks döner (process() artımlı çalışmaları için)."""
+        return cls.load(path) if os.path.exists(path) else cls()
+
+
+# index objesi -> BM25Index; index bellekten düşünce kayıt da düşer
+_ATTACHED: "weakref.WeakKeyDictionary[Any, BM25Index]" = weakref.WeakKeyDictionary()
+# Store klasöründeki dosyadan yüklenen indeksler için index objesi -> dosyanın st_mtime_ns'i
+_LOADED_AT: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+_ATTACH_LOCK = threading.Lock()
+
+
+def attach_lexical_index(index: Any, lexical: Optional[BM25Index]) -> None:
+    """Vektör index'ine BM25 indeksini bağlar (hybrid / lexical sorgular bunu kullanır)."""
+    with _ATTACH_LOCK:
+        _LOADED_AT.pop(index, None)
+        if lexical is None:
+            _ATTACHED.pop(index, None)
+        else:
+            _ATTACHED[index] = lexical
+
+
+def get_lexical_index(index: Any) -> Optional[BM25Index]:
+    """Bağlı BM25 indeksi; yoksa klasör tabanlı store'un yanındaki dosya (varsa) yüklenip bağlanır.
+
+    Dosyadan yüklenen indeks, dosya sonradan (örn. process() ile) yeniden
+    yazıldıysa bir sonraki çağrıda tekrar yüklenir.
+    """
+    with _ATTACH_LOCK:
+        lexical = _ATTACHED.get(index)
+        if lexical is not None and index not in _LOADED_AT:
+            return lexical
+        path = lexical_index_path(getattr(index, "vector_store", None))
+        if path is None:
+            return lexical
+        try:
+            stamp = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return lexical
+        if _LOADED_AT.get(index) != stamp:
+            lexical = _ATTACHED[index] = BM25Index.load(path)
+            _LOADED_AT[index] = stamp
+        return lexical
+
+
+def lexical_index_path(vector_store: Any) -> Optional[str]:
+    """Klasör tabanlı store'larda (örn. NumpyVectorStore) BM25 dosyasının varsayılan yeri."""
+    path = getattr(vector_store, "path", None)
+    if isinstance(path, str) and os.path.isdir(path):
+        return os.path.join(path, LEXICAL_FILE)
+    return None
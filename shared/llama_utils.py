@@ -1,19 +1,43 @@
-from typing import Sequence
+from typing import Sequence, Optional, Dict, Tuple, Callable
 import os
-from llama_index.core import Document, VectorStoreIndex, StorageContext, Settings
-from llama_index.core.node_parser import SentenceSplitter
+import time
+import shutil
+import secrets
+import tempfile
+import threading
+from llama_index.core import Document, VectorStoreIndex, StorageContext, Settings, load_index_from_storage
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.vector_stores.types import BasePydanticVectorStore
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 
+from shared.config import SETTINGS
+from shared.embedding_cache import EmbeddingCache, CachedEmbedding
+from shared.embedding_engine import ParallelEmbedding
+from shared.metrics import METRICS
+from shared.chunking import STRUCTURE_METADATA_KEYS, chunk_documents, default_chunk_cache
+from shared.lexical import LEXICAL_FILE, BM25Index, attach_lexical_index, get_lexical_index
+from shared.vector_store import default_vector_store
+
 
 
 _EMBED_MODEL = None  # lazy init
 
+_SNAPSHOTS_DIR = "snapshots"
+_CURRENT_FILE = "CURRENT"
+# persist_dir -> (snapshot adı, yüklenmiş index)
+_LOADED_INDEXES: Dict[str, Tuple[str, VectorStoreIndex]] = {}
+_LOAD_LOCK = threading.Lock()
+
 
 def setup_llama_index():
     """HuggingFace embedding modelini global Settings'e uygular.
 
     Ortam değişkeni: HUGGINGFACE_EMBED_MODEL
       Belirtilmezse varsayılan: sentence-transformers/all-MiniLM-L6-v2
+    SETTINGS.embed_workers > 0 ise (EMBED_WORKERS) model worker process'lerde
+    çalışan ParallelEmbedding motoru üzerinden kullanılır.
+    SETTINGS.embed_cache_path tanımlıysa model CachedEmbedding ile sarılır;
+    aynı model + chunk metni bir daha embed edilmez.
     """
     global _EMBED_MODEL
     if _EMBED_MODEL is not None:
@@ -21,7 +45,20 @@ def setup_llama_index():
 
     model_name = os.environ.get("HUGGINGFACE_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
     try:
-        _EMBED_MODEL = HuggingFaceEmbedding(model_name=model_name)
+        if SETTINGS.embed_workers > 0:
+            embed_model = ParallelEmbedding(
+                model_name=model_name,
+                workers=SETTINGS.embed_workers,
+                max_batch_tokens=SETTINGS.embed_max_batch_tokens,
+                max_batch_size=SETTINGS.embed_max_batch_size,
+                max_seq_tokens=SETTINGS.embed_max_seq_tokens,
+            )
+        else:
+            embed_model = HuggingFaceEmbedding(model_name=model_name)
+        if SETTINGS.embed_cache_path:
+            cache = EmbeddingCache(SETTINGS.embed_cache_path, max_entries=SETTINGS.embed_cache_max_entries)
+            embed_model = CachedEmbedding(embed_model, cache)
+        _EMBED_MODEL = embed_model
         Settings.embed_model = _EMBED_MODEL
        
     except Exception as e:
@@ -32,22 +69,175 @@ def setup_llama_index():
 def build_nodes_from_documents(
     documents: Sequence[Document],
     chunk_size: int = 1024,
-    chunk_overlap: int = 20
+    chunk_overlap: int = 20,
+    strategy: Optional[str] = None,
+    workers: Optional[int] = None,
 ):
-    splitter = SentenceSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    nodes = splitter.get_nodes_from_documents(list(documents))
-    return nodes
+    """Belgeleri shared.chunking ile node'lara böler.
+
+    strategy / workers verilmezse SETTINGS.chunk_strategy / SETTINGS.chunk_workers
+    kullanılır; SETTINGS.chunk_cache_path tanımlıysa revizyonu değişmeyen belgeler
+    tekrar bölünmez.
+    """
+    return chunk_documents(
+        documents,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        strategy=strategy,
+        workers=workers,
+        cache=default_chunk_cache(),
+    )
+
+
+def embed_nodes(
+    nodes: Sequence[BaseNode],
+    embed_model,
+    batch_size: int,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> None:
+    """Embedding'i olmayan node'ları batch_size'lık parçalar halinde embed eder.
+
+    Her parça gdocs_embedding_batch_seconds ile ölçülür; progress verilirse başta ve
+    her parçadan sonra progress(embedding'i olan node sayısı, toplam) çağrılır.
+    """
+    pending = [n for n in nodes if n.embedding is None]
+    done = len(nodes) - len(pending)
+    if progress is not None:
+        progress(done, len(nodes))
+    for start in range(0, len(pending), batch_size):
+        part = pending[start:start + batch_size]
+        texts = [n.get_content(metadata_mode=MetadataMode.EMBED) for n in part]
+        with METRICS.timer("gdocs_embedding_batch_seconds"):
+            vectors = embed_model.get_text_embedding_batch(texts)
+        for node, vector in zip(part, vectors):
+            node.embedding = vector
+        if METRICS.enabled:
+            METRICS.inc("gdocs_embedded_nodes_total", len(part))
+        done += len(part)
+        if progress is not None:
+            progress(done, len(nodes))
 
 
 def create_index_from_documents(
     documents: Sequence[Document],
     chunk_size: int = 1024,
-    chunk_overlap: int = 20
+    chunk_overlap: int = 20,
+    persist_dir: Optional[str] = None,
+    vector_store: Optional[BasePydanticVectorStore] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
 ):
     """
     Gerçek bir VectorStoreIndex oluşturur. Dönen obje sorgulanabilir.
+    persist_dir verilirse index yeni bir snapshot olarak diske de yazılır.
+    vector_store verilirse (örn. shared.vector_store.NumpyVectorStore) embedding'ler
+    varsayılan bellek içi store yerine ona yazılır. Verilmezse SETTINGS.vector_store
+    kullanılır (bkz. default_vector_store); ayarlardaki kalıcı store bu index'e ait
+    sayılır ve yeniden kurulumda önce boşaltılır.
+    progress verilirse node'lar SETTINGS.stream_embed_batch_size'lık parçalar
+    halinde önceden embed edilir ve her parçadan sonra progress(biten, toplam) çağrılır.
+    SETTINGS.lexical_index açıksa aynı node'lardan BM25 indeksi de kurulur, index'e
+    bağlanır (bkz. query_engine hybrid / lexical modları) ve snapshot'la birlikte yazılır.
     """
     nodes = build_nodes_from_documents(documents, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    storage_context = StorageContext.from_defaults()
+    if vector_store is None:
+        vector_store = default_vector_store()
+        if vector_store is not None:
+            vector_store.clear()
+    if progress is not None:
+        embed_nodes(nodes, Settings.embed_model, SETTINGS.stream_embed_batch_size, progress=progress)
+    storage_context = StorageContext.from_defaults(vector_store=vector_store)
     index = VectorStoreIndex(nodes, storage_context=storage_context)
+    if SETTINGS.lexical_index:
+        lexical = BM25Index()
+        lexical.add_nodes(nodes)
+        attach_lexical_index(index, lexical)
+    if persist_dir:
+        persist_index(index, persist_dir)
+    return index
+
+
+def _current_snapshot(persist_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(persist_dir, _CURRENT_FILE), "r", encoding="utf-8") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return name or None
+
+
+def persist_index(index: VectorStoreIndex, persist_dir: str, keep: Optional[int] = None) -> str:
+    """Index'i persist_dir altına yeni bir snapshot olarak atomik şekilde yazar.
+
+    Snapshot önce geçici klasöre yazılır, rename ile yerine konur, ardından
+    CURRENT dosyası os.replace ile güncellenir. Okuyucular CURRENT'ın işaret
+    ettiği tam yazılmış snapshot'ı görür; yarım yazılmış index hiç görünmez.
+    Dönen değer yeni snapshot adıdır.
+    """
+    keep = keep or SETTINGS.index_snapshots_to_keep
+    snapshots_dir = os.path.join(persist_dir, _SNAPSHOTS_DIR)
+    os.makedirs(snapshots_dir, exist_ok=True)
+
+    name = f"{time.time_ns():020d}-{secrets.token_hex(4)}"
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=snapshots_dir)
+    try:
+        index.storage_context.persist(persist_dir=tmp_dir)
+        lexical = get_lexical_index(index)
+        if lexical is not None:
+            lexical.save(os.path.join(tmp_dir, LEXICAL_FILE))
+        os.rename(tmp_dir, os.path.join(snapshots_dir, name))
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    fd, tmp_current = tempfile.mkstemp(prefix=".current-", dir=persist_dir)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(tmp_current, os.path.join(persist_dir, _CURRENT_FILE))
+    except Exception:
+        # CURRENT eski snapshot'ı göstermeye devam eder; hiç görünmeyen yeni snapshot silinir
+        if os.path.exists(tmp_current):
+            os.unlink(tmp_current)
+        shutil.rmtree(os.path.join(snapshots_dir, name), ignore_errors=True)
+        raise
+
+    with _LOAD_LOCK:
+        _LOADED_INDEXES[os.path.abspath(persist_dir)] = (name, index)
+
+    snapshots = sorted(d for d in os.listdir(snapshots_dir) if not d.startswith("."))
+    for old in snapshots[:-keep]:
+        shutil.rmtree(os.path.join(snapshots_dir, old), ignore_errors=True)
+    return name
+
+
+def load_persisted_index(
+    persist_dir: str, vector_store: Optional[BasePydanticVectorStore] = None
+) -> Optional[VectorStoreIndex]:
+    """CURRENT snapshot'ını yükler; snapshot değişmediyse bellekteki index döner.
+
+    Index harici bir vector store ile oluşturulduysa aynı store verilmelidir; verilmezse
+    SETTINGS.vector_store'daki store kullanılır.
+    Henüz yazılmış bir snapshot yoksa None döner.
+    """
+    name = _current_snapshot(persist_dir)
+    if name is None:
+        return None
+    key = os.path.abspath(persist_dir)
+    cached = _LOADED_INDEXES.get(key)
+    if cached and cached[0] == name:
+        return cached[1]
+    with _LOAD_LOCK:
+        cached = _LOADED_INDEXES.get(key)
+        if cached and cached[0] == name:
+            return cached[1]
+        setup_llama_index()
+        storage_context = StorageContext.from_defaults(
+            persist_dir=os.path.join(persist_dir, _SNAPSHOTS_DIR, name),
+            vector_store=vector_store if vector_store is not None else default_vector_store(),
+        )
+        index = load_index_from_storage(storage_context)
+        lexical_path = os.path.join(persist_dir, _SNAPSHOTS_DIR, name, LEXICAL_FILE)
+        if os.path.exists(lexical_path):
+            attach_lexical_index(index, BM25Index.load(lexical_path))
+        _LOADED_INDEXES[key] = (name, index)
     return index
\ No newline at end of file
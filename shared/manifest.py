@@ -0,0 +1,64 @@
+import os
+import json
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional
+
+
+class IndexManifest:
+    """doc_id -> revision_id -> node_id listesi eşlemesini diskte tutar.
+
+    Artımlı indekslemede değişmeyen belgeleri atlamak, değişenlerin eski
+    node'larını silmek ve kaldırılan belgeleri vector store'dan temizlemek için kullanılır.
+    Dosya atomik olarak (temp dosya + os.replace) yazılır.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._docs = data.get("documents", {})
+
+    def doc_ids(self) -> List[str]:
+        return list(self._docs)
+
+    def get_revision(self, doc_id: str) -> Optional[str]:
+        entry = self._docs.get(doc_id)
+        return entry.get("revision_id") if entry else None
+
+    def get_node_ids(self, doc_id: str) -> List[str]:
+        entry = self._docs.get(doc_id)
+        return list(entry.get("node_ids", [])) if entry else []
+
+    def is_unchanged(self, doc_id: str, revision_id: Optional[str]) -> bool:
+        return bool(revision_id) and self.get_revision(doc_id) == revision_id
+
+    def update(self, doc_id: str, revision_id: Optional[str], node_ids: List[str]) -> None:
+        with self._lock:
+            self._docs[doc_id] = {"revision_id": revision_id, "node_ids": list(node_ids)}
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            self._docs.pop(doc_id, None)
+
+    def save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            payload = {"version": self.VERSION, "documents": self._docs}
+            fd, tmp_path = tempfile.mkstemp(prefix=".manifest_", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(payload, f)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
@@ -0,0 +1,256 @@
+import os
+import time
+import atexit
+import logging
+import tempfile
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from shared.config import SETTINGS
+
+# Saniye cinsinden varsayılan histogram sınırları (API çağrısı, embed batch vb.)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsSink:
+    """Ölçüm alıcısı; kind "counter" ya da "histogram"dır."""
+
+    def record(self, kind: str, name: str, value: float, labels: Labels) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        pass
+
+
+class LoggingSink(MetricsSink):
+    """Her ölçümü logging ile yazar (varsayılan logger: gdocs.metrics, DEBUG)."""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG):
+        self.logger = logger or logging.getLogger("gdocs.metrics")
+        self.level = level
+
+    def record(self, kind: str, name: str, value: float, labels: Labels) -> None:
+        if self.logger.isEnabledFor(self.level):
+            rendered = ",".join(f"{k}={v}" for k, v in labels)
+            self.logger.log(self.level, "%s %s{%s} %.6g", kind, name, rendered, value)
+
+
+class InMemorySink(MetricsSink):
+    """Counter ve histogram'ları bellekte toplayan registry; snapshot() ve Prometheus metni verir."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [bucket başına sayım (+Inf dahil), toplam, adet]
+        self._histograms: Dict[Tuple[str, Labels], List[Any]] = {}
+
+    def record(self, kind: str, name: str, value: float, labels: Labels) -> None:
+        key = (name, labels)
+        with self._lock:
+            if kind == "counter":
+                self._counters[key] = self._counters.get(key, 0.0) + value
+                return
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            hist[0][bisect_left(self.buckets, value)] += 1
+            hist[1] += value
+            hist[2] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def counter(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self._counters.get((name, _labels(labels)), 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """{"counters": {...}, "histograms": {...}}; anahtarlar name{label=değer,...} biçimindedir."""
+        with self._lock:
+            return {
+                "counters": {_series(n, l): v for (n, l), v in self._counters.items()},
+                "histograms": {
+                    _series(n, l): {"count": h[2], "sum": h[1], "buckets": list(h[0])}
+                    for (n, l), h in self._histograms.items()
+                },
+            }
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition formatı (0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((k, (list(h[0]), h[1], h[2])) for k, h in self._histograms.items())
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{_series(name, labels)} {value:.17g}")
+        for (name, labels), (counts, total, count) in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{_series(name + '_bucket', labels + (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{_series(name + '_bucket', labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{_series(name + '_sum', labels)} {total:.17g}")
+            lines.append(f"{_series(name + '_count', labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+class PrometheusFileSink(InMemorySink):
+    """InMemorySink + text exposition dosyası (örn. node_exporter textfile collector için).
+
+    Dosya en fazla min_interval saniyede bir, geçici dosya + os.replace ile
+    atomik yazılır; process kapanırken son durum flush edilir.
+    """
+
+    def __init__(self, path: str, min_interval: float = 5.0, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(buckets)
+        self.path = path
+        self.min_interval = min_interval
+        self._last_write = 0.0
+        self._write_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def record(self, kind: str, name: str, value: float, labels: Labels) -> None:
+        super().record(kind, name, value, labels)
+        if time.monotonic() - self._last_write >= self.min_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._write_lock:
+            self._last_write = time.monotonic()
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=".metrics-", dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render_prometheus())
+            os.replace(tmp, self.path)
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _series(name: str, labels: Labels) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return f"{name}{{{rendered}}}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _Timer:
+    __slots__ = ("_metrics", "_name", "_labels", "_start")
+
+    def __init__(self, metrics: "Metrics", name: str, labels: Dict[str, Any]):
+        self._metrics = metrics
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._metrics.observe(self._name, time.perf_counter() - self._start, **self._labels)
+        return False
+
+
+class Metrics:
+    """Ölçüm kaydı cephesi; sink eklenmemişse tüm çağrılar hiçbir şey yapmaz.
+
+    Sıcak yollarda çağrılar `if METRICS.enabled:` ile korunur, böylece kapalıyken
+    etiket dict'i bile oluşturulmaz; timer() kapalıyken paylaşılan no-op context döner.
+    """
+
+    def __init__(self):
+        self._sinks: List[MetricsSink] = []
+        self.enabled = False
+
+    @property
+    def sinks(self) -> List[MetricsSink]:
+        return list(self._sinks)
+
+    def add_sink(self, sink: MetricsSink) -> MetricsSink:
+        self._sinks = self._sinks + [sink]
+        self.enabled = True
+        return sink
+
+    def clear_sinks(self) -> None:
+        self._sinks = []
+        self.enabled = False
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        for sink in self._sinks:
+            sink.record("counter", name, value, key)
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        for sink in self._sinks:
+            sink.record("histogram", name, value, key)
+
+    def timer(self, name: str, **labels: Any):
+        if not self.enabled:
+            return _NOOP_TIMER
+        return _Timer(self, name, labels)
+
+    def flush(self) -> None:
+        for sink in self._sinks:
+            sink.flush()
+
+
+def configure_metrics(spec: Optional[str], metrics: Optional[Metrics] = None) -> Metrics:
+    """"log,memory,prometheus=/yol/gdocs.prom" biçimindeki tanımdan sink'leri kurar."""
+    metrics = metrics or METRICS
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        kind, _, arg = part.partition("=")
+        if kind == "log":
+            metrics.add_sink(LoggingSink())
+        elif kind == "memory":
+            metrics.add_sink(InMemorySink())
+        elif kind == "prometheus":
+            if not arg:
+                raise ValueError("prometheus metrics sink requires a path: prometheus=/path/file.prom")
+            metrics.add_sink(PrometheusFileSink(arg))
+        else:
+            raise ValueError(f"Unknown metrics sink '{kind}', expected log, memory or prometheus=PATH")
+    return metrics
+
+
+METRICS = Metrics()
+configure_metrics(SETTINGS.metrics_sinks)
@@ -0,0 +1,94 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+_DONE = object()
+
+
+class _StageError:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def run_pipeline(
+    source: Iterable[Any],
+    stages: Sequence[Callable[[Any], Any]],
+    queue_size: int = 2,
+) -> Iterator[Any]:
+    """source'taki öğeleri sırayla stages'ten geçirir; her aşama kendi thread'inde çalışır.
+
+    Aşamalar arasındaki kuyruklar queue_size ile sınırlıdır: yavaş bir aşama
+    öncekileri bekletir (backpressure), böylece bellekte en fazla
+    ~(aşama sayısı + 1) * queue_size batch bulunur. Son aşamanın çıktıları girdi
+    sırasıyla yield edilir. Bir aşamada hata olursa pipeline durur ve hata
+    tüketicide yeniden fırlatılır. Tüketici erken bırakırsa thread'ler de durur.
+    """
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+
+    def put(q: queue.Queue, item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q: queue.Queue) -> Any:
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def feed() -> None:
+        try:
+            for item in source:
+                if not put(queues[0], item):
+                    return
+        except BaseException as e:
+            put(queues[0], _StageError(e))
+            return
+        put(queues[0], _DONE)
+
+    def work(stage: Callable[[Any], Any], inbox: queue.Queue, outbox: queue.Queue) -> None:
+        while True:
+            item = get(inbox)
+            if item is _DONE or isinstance(item, _StageError):
+                put(outbox, item)
+                return
+            try:
+                result = stage(item)
+            except BaseException as e:
+                put(outbox, _StageError(e))
+                return
+            if not put(outbox, result):
+                return
+
+    threads = [threading.Thread(target=feed, name="pipeline-source", daemon=True)]
+    for i, stage in enumerate(stages):
+        threads.append(
+            threading.Thread(
+                target=work,
+                args=(stage, queues[i], queues[i + 1]),
+                name=f"pipeline-{getattr(stage, '__name__', i)}",
+                daemon=True,
+            )
+        )
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            item = get(queues[-1])
+            if item is _DONE:
+                return
+            if isinstance(item, _StageError):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+        for t in threads:
+            t.join(timeout=1)
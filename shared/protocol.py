@@ -4,6 +4,10 @@ from llama_index.core import Document
 from llama_index.core.schema import BaseNode
 
 
+class TaskCancelled(Exception):
+    """process, task_manager görevin iptal edildiğini bildirdiğinde fırlatır."""
+
+
 class EmbeddingMethod(ABC):
     """Abstract base class for embedding methods."""
 
@@ -26,6 +30,13 @@ class EmbeddingMethod(ABC):
     ) -> None:
         """
         Belgeleri alır, node'lara çevirir ve vector_store'a yazar.
-        task_manager gibi parametreler gerçek üretimde progress raporu için kullanılabilir.
+
+        task_manager None olabilir; verilirse aşağıdaki (hepsi opsiyonel) metotları
+        varsa kullanılır (bkz. shared.scheduler.IngestionScheduler):
+          - notify(task_id, message): ilerleme mesajı
+          - report_progress(task_id, done, total): işlenen / toplam öğe
+          - is_cancelled(task_id): True ise process TaskCancelled fırlatarak durur
+          - save_checkpoint(task_id, state) / load_checkpoint(task_id): yeniden
+            başlatıldığında tamamlanan işi atlamak için JSON state
         """
         pass
\ No newline at end of file
@@ -0,0 +1,301 @@
+import secrets
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from llama_index.core import QueryBundle, Settings
+
+from shared.config import SETTINGS
+from shared.llama_utils import setup_llama_index
+from shared.lexical import BM25Index, get_lexical_index, tokenize
+from shared.dedup import get_dedup_index
+
+QUERY_MODES = ("auto", "hybrid", "vector", "lexical")
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    """Tek bir arama sonucu; cache'te paylaşıldığı için değiştirilemez."""
+
+    node_id: str
+    doc_id: Optional[str]
+    title: Optional[str]
+    score: Optional[float]
+    text: str
+    # Aynı chunk'ın near-duplicate olarak store'a yazılmadığı diğer belgeler: ((doc_id, başlık), ...)
+    references: Tuple[Tuple[Optional[str], Optional[str]], ...] = ()
+
+
+class LRUCache:
+    """Thread-safe, boyut sınırlı LRU; hits / misses sayaçlarını tutar."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, prefix: Hashable) -> int:
+        """Anahtarı (prefix, ...) olan girdileri siler; silinen girdi sayısını döner."""
+        with self._lock:
+            stale = [k for k in self._data if isinstance(k, tuple) and k and k[0] == prefix]
+            for k in stale:
+                del self._data[k]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+def normalize_query(query: str) -> str:
+    """Boşlukları sadeleştirir; embed edilen ve BM25'e verilen metin budur."""
+    return " ".join(query.split())
+
+
+def _cache_text(normalized: str) -> str:
+    """Cache anahtarındaki metin: büyük / küçük harf farkı aynı girdiye düşer."""
+    return normalized.casefold()
+
+
+# (index versiyonu, casefold sorgu, top_k, mod) -> Tuple[SearchHit, ...]
+_RESULT_CACHE = LRUCache(SETTINGS.query_result_cache_size)
+# (embedding modeli, casefold sorgu) -> embedding; index değişse de geçerli kalır
+_QUERY_EMBED_CACHE = LRUCache(SETTINGS.query_embedding_cache_size)
+# index objesi -> [versiyon, store revizyonu]; obje bellekten düşünce kaydı da düşer
+_INDEX_VERSIONS: "weakref.WeakKeyDictionary[Any, List[Any]]" = weakref.WeakKeyDictionary()
+_VERSION_LOCK = threading.Lock()
+
+
+def _store_revision(index: Any) -> Any:
+    """Vector store'un içerik sayacı (örn. NumpyVectorStore.revision); yoksa None."""
+    return getattr(getattr(index, "vector_store", None), "revision", None)
+
+
+def _drop_results(entry: List[Any]) -> None:
+    _RESULT_CACHE.invalidate(entry[0])
+
+
+def index_version(index: Any) -> str:
+    """Index objesinin sonuç cache'inde kullanılan versiyonu.
+
+    Versiyon obje ilk görüldüğünde atanır ve store'un revision sayacı değiştikçe
+    (örn. process() aynı store'a yazdığında) yenilenir; eski versiyonun sonuçları
+    cache'ten atılır. Yeni bir index objesi kendiliğinden yeni versiyon alır;
+    obje bellekten düştüğünde sonuçları da silinir.
+    """
+    revision = _store_revision(index)
+    stale = None
+    with _VERSION_LOCK:
+        entry = _INDEX_VERSIONS.get(index)
+        if entry is None:
+            entry = _INDEX_VERSIONS[index] = [secrets.token_hex(8), revision]
+            weakref.finalize(index, _drop_results, entry)
+        elif entry[1] != revision:
+            stale = entry[0]
+            entry[:] = [secrets.token_hex(8), revision]
+        version = entry[0]
+    if stale is not None:
+        _RESULT_CACHE.invalidate(stale)
+    return version
+
+
+def invalidate_index(index: Any) -> str:
+    """Revision sayacı olmayan bir store yerinde değiştirildiyse çağrılır; eski sonuçları atar, yeni versiyon döner."""
+    with _VERSION_LOCK:
+        entry = _INDEX_VERSIONS.get(index)
+        if entry is not None:
+            stale, entry[0] = entry[0], secrets.token_hex(8)
+            version = entry[0]
+    if entry is None:
+        return index_version(index)
+    _RESULT_CACHE.invalidate(stale)
+    return version
+
+
+def _embed_model_key(embed_model: Any) -> str:
+    return f"{type(embed_model).__name__}:{getattr(embed_model, 'model_name', '')}"
+
+
+def embed_query(query: str) -> List[float]:
+    """Normalize sorgunun embedding'i; aynı soru ikinci kez embed edilmez."""
+    setup_llama_index()
+    embed_model = Settings.embed_model
+    normalized = normalize_query(query)
+    key = (_embed_model_key(embed_model), _cache_text(normalized))
+    embedding = _QUERY_EMBED_CACHE.get(key)
+    if embedding is None:
+        embedding = embed_model.get_query_embedding(normalized)
+        _QUERY_EMBED_CACHE.put(key, embedding)
+    return embedding
+
+
+def is_term_query(normalized: str) -> bool:
+    """Kısa ve ID / kod benzeri sorgu mu (örn. "proj-1234", "v2.1 release")?
+
+    Bu sorgularda anlamsal benzerlik az şey katar; auto modu embedding modelini
+    hiç çağırmadan yalnızca BM25 ile cevaplar.
+    """
+    words = normalized.split()
+    return 0 < len(words) <= 3 and any(
+        any(c.isdigit() for c in w) or any(c in "-./:#_" for c in w) for w in words
+    )
+
+
+def _to_hit(
+    node: Any, score: Optional[float], references: Sequence[Tuple[Optional[str], Optional[str]]] = ()
+) -> SearchHit:
+    doc_id = node.metadata.get("doc_id") or node.ref_doc_id
+    return SearchHit(
+        node_id=node.node_id,
+        doc_id=doc_id,
+        title=node.metadata.get("title"),
+        score=score,
+        text=node.get_content(),
+        references=tuple(r for r in references if r[0] != doc_id),
+    )
+
+
+def _fetch_nodes(index: Any, node_ids: Sequence[str]) -> Dict[str, Any]:
+    """Node'ları docstore'dan, orada yoksa metni tutan vector store'dan (örn. NumpyVectorStore) alır."""
+    found: Dict[str, Any] = {}
+    for node_id in node_ids:
+        node = index.docstore.get_node(node_id, raise_error=False)
+        if node is not None:
+            found[node_id] = node
+    missing = [n for n in node_ids if n not in found]
+    if missing and getattr(index.vector_store, "stores_text", False):
+        try:
+            for node in index.vector_store.get_nodes(node_ids=missing):
+                found[node.node_id] = node
+        except NotImplementedError:
+            pass
+    return found
+
+
+def _vector_search(index: Any, normalized: str, top_k: int) -> List[Tuple[Any, Optional[float]]]:
+    bundle = QueryBundle(query_str=normalized, embedding=embed_query(normalized))
+    return [(r.node, r.score) for r in index.as_retriever(similarity_top_k=top_k).retrieve(bundle)]
+
+
+def _lexical_search(
+    index: Any, lexical: BM25Index, normalized: str, top_k: int
+) -> List[Tuple[Any, Optional[float]]]:
+    scored = lexical.search(normalized, top_k)
+    nodes = _fetch_nodes(index, [node_id for node_id, _ in scored])
+    return [(nodes[node_id], score) for node_id, score in scored if node_id in nodes]
+
+
+def _min_max(scores: Dict[str, float]) -> Dict[str, float]:
+    if not scores:
+        return {}
+    low, high = min(scores.values()), max(scores.values())
+    if high - low <= 1e-12:
+        return {k: 1.0 for k in scores}
+    return {k: (v - low) / (high - low) for k, v in scores.items()}
+
+
+def _hybrid_search(
+    index: Any, lexical: BM25Index, normalized: str, top_k: int
+) -> List[Tuple[Any, Optional[float]]]:
+    """Vektör ve BM25 adaylarını min-max normalize edip alpha ağırlığıyla birleştirir."""
+    candidates = top_k * max(SETTINGS.query_hybrid_candidates, 1)
+    alpha = SETTINGS.query_hybrid_alpha
+    vector = _vector_search(index, normalized, candidates)
+    lexical_hits = _lexical_search(index, lexical, normalized, candidates)
+    nodes = {node.node_id: node for node, _ in vector + lexical_hits}
+    vector_scores = _min_max({n.node_id: s or 0.0 for n, s in vector})
+    lexical_scores = _min_max({n.node_id: s or 0.0 for n, s in lexical_hits})
+    fused = {
+        node_id: alpha * vector_scores.get(node_id, 0.0) + (1.0 - alpha) * lexical_scores.get(node_id, 0.0)
+        for node_id in nodes
+    }
+    best = sorted(fused, key=fused.get, reverse=True)[:top_k]
+    return [(nodes[node_id], fused[node_id]) for node_id in best]
+
+
+def search_index(
+    index: Any, query: str, top_k: Optional[int] = None, mode: Optional[str] = None
+) -> Tuple[SearchHit, ...]:
+    """Index üzerinde arama; en ilgili top_k chunk'ı döner.
+
+    mode (varsayılan SETTINGS.query_mode):
+      - "vector": semantik arama
+      - "lexical": yalnızca BM25; embedding modeli çağrılmaz
+      - "hybrid": vektör + BM25 skorlarının ağırlıklı birleşimi
+      - "auto": ID / kod benzeri kısa sorgularda lexical (eşleşme yoksa hybrid),
+        diğerlerinde hybrid
+    Index'e bağlı BM25 indeksi yoksa (bkz. shared.lexical) hybrid / auto vektör
+    aramasına düşer, lexical hata verir.
+
+    Store'da bir imza indeksi varsa (bkz. shared.dedup) her sonuç, aynı chunk'ın
+    duplicate olarak tutulduğu diğer belgelerle (references) genişletilir.
+
+    Sonuçlar (index versiyonu, casefold sorgu, top_k, mod) anahtarıyla LRU
+    cache'ten verilir; cache kaçağında sorgu embedding'i ayrı cache'ten alınır.
+    """
+    normalized = normalize_query(query)
+    if not normalized:
+        raise ValueError("Query is empty.")
+    top_k = top_k or SETTINGS.query_top_k
+    mode = mode or SETTINGS.query_mode
+    if mode not in QUERY_MODES:
+        raise ValueError(f"Unknown query mode '{mode}', expected one of {QUERY_MODES}")
+    key = (index_version(index), _cache_text(normalized), top_k, mode)
+    hits = _RESULT_CACHE.get(key)
+    if hits is not None:
+        return hits
+
+    lexical = get_lexical_index(index)
+    if mode == "lexical" and lexical is None:
+        raise ValueError("This index has no lexical (BM25) index; use vector or hybrid mode.")
+    if lexical is None or (mode != "lexical" and not tokenize(normalized)):
+        mode = "vector"
+
+    results: List[Tuple[Any, Optional[float]]] = []
+    if mode in ("lexical", "auto") and (mode == "lexical" or is_term_query(normalized)):
+        results = _lexical_search(index, lexical, normalized, top_k)
+        if mode == "auto" and not results:
+            mode = "hybrid"
+    elif mode == "auto":
+        mode = "hybrid"
+    if mode == "hybrid":
+        results = _hybrid_search(index, lexical, normalized, top_k)
+    elif mode == "vector":
+        results = _vector_search(index, normalized, top_k)
+
+    dedup = get_dedup_index(index)
+    references = dedup.reference_documents([node.node_id for node, _ in results]) if dedup and results else {}
+    hits = tuple(_to_hit(node, score, references.get(node.node_id, ())) for node, score in results)
+    _RESULT_CACHE.put(key, hits)
+    return hits
+
+
+def query_cache_stats() -> Dict[str, Dict[str, int]]:
+    return {"results": _RESULT_CACHE.stats(), "query_embeddings": _QUERY_EMBED_CACHE.stats()}
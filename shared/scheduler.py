@@ -0,0 +1,372 @@
+import os
+import json
+import time
+import sqlite3
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.config import SETTINGS
+from shared.protocol import EmbeddingMethod, TaskCancelled
+from shared.vector_store import default_vector_store
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+_TASK_COLUMNS = (
+    "task_id, data_source_id, status, priority, seq, payload, checkpoint, message, "
+    "items_done, items_total, attempts, error, created_at, started_at, finished_at, cancel_requested"
+)
+
+
+@dataclass
+class _Source:
+    method: EmbeddingMethod
+    vector_store: Any
+    limit: int
+    process_kwargs: Dict[str, Any] = field(default_factory=dict)
+
+
+class IngestionScheduler:
+    """SQLite destekli yerel ingestion iş planlayıcısı; task_manager sözleşmesini uygular.
+
+    - Her data source için bir görev kuyruğu; görevler register_source ile kaydedilen
+      EmbeddingMethod.process(vector_store, self, data_source_id, task_id, **kwargs) ile çalışır
+    - Global eşzamanlılık sınırı (max_concurrency) ve source başına sınır (per_source_limit
+      ya da register_source(limit=...)); sıradaki görev en az çalışan görevi olan
+      source'tan seçilir, böylece yüzlerce source CPU ve API kotasını adil paylaşır
+    - cancel: kuyruktaki görev hemen iptal edilir, çalışan görev is_cancelled ile
+      bir sonraki batch sınırında durur (TaskCancelled)
+    - save_checkpoint / load_checkpoint: görev durumu SQLite'ta tutulur; process
+      çökerse yarım kalan görevler yeniden başlatmada checkpoint'ten devam eder
+    - report_progress: işlenen / toplam öğe, throughput (öğe/sn) ve ETA status() ile okunur
+
+    Görev kwargs'ı JSON olarak saklanır; JSON'a çevrilemeyen argümanlar (örn.
+    embed_model) register_source'a verilir.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        per_source_limit: Optional[int] = None,
+        poll_interval: float = 1.0,
+    ):
+        path = path or SETTINGS.scheduler_db_path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_concurrency = max_concurrency or SETTINGS.scheduler_max_concurrency
+        self.per_source_limit = per_source_limit or SETTINGS.scheduler_per_source_limit
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._sources: Dict[str, _Source] = {}
+        self._running: Dict[str, str] = {}  # task_id -> data_source_id
+        self._cancel_requested: set = set()
+        self._run_started: Dict[str, Tuple[float, int]] = {}  # task_id -> (başlangıç, o andaki items_done)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " task_id TEXT PRIMARY KEY, data_source_id TEXT NOT NULL, status TEXT NOT NULL,"
+            " priority INTEGER NOT NULL DEFAULT 0, seq INTEGER NOT NULL, payload TEXT NOT NULL,"
+            " checkpoint TEXT, message TEXT, items_done INTEGER NOT NULL DEFAULT 0,"
+            " items_total INTEGER, attempts INTEGER NOT NULL DEFAULT 0, error TEXT,"
+            " created_at REAL NOT NULL, started_at REAL, finished_at REAL,"
+            " cancel_requested INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, data_source_id)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS task_events ("
+            " task_id TEXT NOT NULL, ts REAL NOT NULL, message TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_task_events_task ON task_events(task_id, ts)")
+        # Önceki process çalışırken kapanmışsa yarım kalan görevler checkpoint'leriyle kuyruğa döner
+        self._conn.execute(
+            "UPDATE tasks SET status = ?, cancel_requested = 0 WHERE status = ?", (QUEUED, RUNNING)
+        )
+        self._conn.commit()
+
+    # ---- kayıt ve görev yönetimi ----
+
+    def register_source(
+        self,
+        data_source_id: str,
+        method: EmbeddingMethod,
+        vector_store: Any = None,
+        limit: Optional[int] = None,
+        **process_kwargs: Any,
+    ) -> None:
+        """data_source_id'nin görevlerini çalıştıracak reader ve store'u kaydeder.
+
+        vector_store verilmezse SETTINGS.vector_store'daki kalıcı store kullanılır.
+        """
+        if vector_store is None:
+            vector_store = default_vector_store()
+        with self._lock:
+            self._sources[data_source_id] = _Source(
+                method, vector_store, limit or self.per_source_limit, process_kwargs
+            )
+        self._wake()
+
+    def submit(self, data_source_id: str, priority: int = 0, **kwargs: Any) -> str:
+        """Kuyruğa yeni görev ekler; kwargs process'e iletilir (JSON'a çevrilebilir olmalı)."""
+        task_id = secrets.token_hex(8)
+        payload = json.dumps(kwargs)
+        with self._lock:
+            seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM tasks").fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO tasks (task_id, data_source_id, status, priority, seq, payload, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (task_id, data_source_id, QUEUED, priority, seq, payload, time.time()),
+            )
+            self._conn.commit()
+        self._wake()
+        return task_id
+
+    def cancel(self, task_id: str) -> bool:
+        """Kuyruktaki görevi iptal eder ya da çalışan göreve durma isteği bırakır."""
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if row is None or row[0] in FINISHED_STATES:
+                return False
+            if row[0] == QUEUED:
+                self._conn.execute(
+                    "UPDATE tasks SET status = ?, finished_at = ? WHERE task_id = ?",
+                    (CANCELLED, time.time(), task_id),
+                )
+            else:
+                self._cancel_requested.add(task_id)
+                self._conn.execute("UPDATE tasks SET cancel_requested = 1 WHERE task_id = ?", (task_id,))
+            self._conn.commit()
+        self._wake()
+        return True
+
+    def resume(self, task_id: str) -> bool:
+        """Başarısız ya da iptal edilmiş görevi checkpoint'i korunarak kuyruğa geri koyar."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE tasks SET status = ?, error = NULL, finished_at = NULL, cancel_requested = 0"
+                " WHERE task_id = ? AND status IN (?, ?)",
+                (QUEUED, task_id, FAILED, CANCELLED),
+            )
+            self._conn.commit()
+        self._wake()
+        return cur.rowcount > 0
+
+    # ---- task_manager sözleşmesi ----
+
+    def notify(self, task_id: str, message: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE tasks SET message = ? WHERE task_id = ?", (message, task_id))
+            self._conn.execute(
+                "INSERT INTO task_events (task_id, ts, message) VALUES (?, ?, ?)",
+                (task_id, time.time(), message),
+            )
+            self._conn.commit()
+
+    def is_cancelled(self, task_id: str) -> bool:
+        return task_id in self._cancel_requested
+
+    def save_checkpoint(self, task_id: str, state: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET checkpoint = ? WHERE task_id = ?", (json.dumps(state), task_id)
+            )
+            self._conn.commit()
+
+    def load_checkpoint(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT checkpoint FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def report_progress(self, task_id: str, done: int, total: Optional[int] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET items_done = ?, items_total = COALESCE(?, items_total) WHERE task_id = ?",
+                (done, total, task_id),
+            )
+            self._conn.commit()
+
+    # ---- durum ----
+
+    def _row_to_status(self, row: Tuple) -> Dict[str, Any]:
+        status = dict(zip([c.strip() for c in _TASK_COLUMNS.split(",")], row))
+        status["payload"] = json.loads(status["payload"])
+        status["checkpoint"] = json.loads(status["checkpoint"]) if status["checkpoint"] else None
+        status["cancel_requested"] = bool(status["cancel_requested"])
+        run = self._run_started.get(status["task_id"])
+        throughput = eta = None
+        if run is not None:
+            elapsed = time.time() - run[0]
+            processed = status["items_done"] - run[1]
+            throughput = processed / elapsed if elapsed > 0 else None
+            if throughput and status["items_total"] is not None:
+                eta = max(status["items_total"] - status["items_done"], 0) / throughput
+        elif status["status"] == DONE and status["started_at"] and status["finished_at"]:
+            elapsed = status["finished_at"] - status["started_at"]
+            throughput = status["items_done"] / elapsed if elapsed > 0 else None
+        status["throughput"] = throughput
+        status["eta_seconds"] = eta
+        return status
+
+    def status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_TASK_COLUMNS} FROM tasks WHERE task_id = ?", (task_id,)
+            ).fetchone()
+            return self._row_to_status(row) if row else None
+
+    def list_tasks(
+        self, data_source_id: Optional[str] = None, status: Optional[str] = None, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        sql = f"SELECT {_TASK_COLUMNS} FROM tasks WHERE 1 = 1"
+        args: List[Any] = []
+        if data_source_id is not None:
+            sql += " AND data_source_id = ?"
+            args.append(data_source_id)
+        if status is not None:
+            sql += " AND status = ?"
+            args.append(status)
+        sql += " ORDER BY seq DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            return [self._row_to_status(r) for r in self._conn.execute(sql, args).fetchall()]
+
+    def events(self, task_id: str) -> List[Tuple[float, str]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT ts, message FROM task_events WHERE task_id = ? ORDER BY ts", (task_id,)
+            ).fetchall()
+
+    def wait(self, task_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Görev bitene (ya da timeout dolana) kadar bekler; son durumu döner."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.status(task_id)
+            if status is None or status["status"] in FINISHED_STATES:
+                return status
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return status
+            with self._wakeup:
+                self._wakeup.wait(min(self.poll_interval, remaining) if remaining is not None else self.poll_interval)
+
+    # ---- çalıştırma ----
+
+    def start(self) -> "IngestionScheduler":
+        if self._dispatcher is None:
+            self._stopping = False
+            self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="gdocs_ingest")
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="gdocs_scheduler", daemon=True)
+            self._dispatcher.start()
+        return self
+
+    def shutdown(self, wait: bool = True, cancel_running: bool = False) -> None:
+        """Yeni görev başlatmayı durdurur; cancel_running ile çalışanlara da durma isteği gönderir."""
+        self._stopping = True
+        if cancel_running:
+            with self._lock:
+                self._cancel_requested.update(self._running)
+        self._wake()
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+            self._dispatcher = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+    def close(self) -> None:
+        self.shutdown()
+        with self._lock:
+            self._conn.close()
+
+    def _wake(self) -> None:
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def _claim_next_locked(self) -> Optional[Tuple[str, str]]:
+        """Sınırlara uyan, en az çalışan görevi olan source'un en öncelikli görevini seçer."""
+        running_by_source: Dict[str, int] = {}
+        for source_id in self._running.values():
+            running_by_source[source_id] = running_by_source.get(source_id, 0) + 1
+        best = None
+        rows = self._conn.execute(
+            "SELECT task_id, data_source_id, priority, seq FROM tasks WHERE status = ?", (QUEUED,)
+        ).fetchall()
+        for task_id, source_id, priority, seq in rows:
+            source = self._sources.get(source_id)
+            running = running_by_source.get(source_id, 0)
+            if source is None or running >= source.limit:
+                continue
+            rank = (running, -priority, seq)
+            if best is None or rank < best[0]:
+                best = (rank, task_id, source_id)
+        if best is None:
+            return None
+        _, task_id, source_id = best
+        self._conn.execute(
+            "UPDATE tasks SET status = ?, attempts = attempts + 1, cancel_requested = 0,"
+            " started_at = COALESCE(started_at, ?) WHERE task_id = ?",
+            (RUNNING, time.time(), task_id),
+        )
+        self._conn.commit()
+        self._running[task_id] = source_id
+        return task_id, source_id
+
+    def _dispatch_loop(self) -> None:
+        while not self._stopping:
+            claimed = []
+            with self._lock:
+                while len(self._running) < self.max_concurrency:
+                    next_task = self._claim_next_locked()
+                    if next_task is None:
+                        break
+                    claimed.append(next_task)
+            for task_id, source_id in claimed:
+                self._pool.submit(self._run_task, task_id, source_id)
+            with self._wakeup:
+                self._wakeup.wait(self.poll_interval)
+
+    def _run_task(self, task_id: str, source_id: str) -> None:
+        with self._lock:
+            source = self._sources[source_id]
+            payload, items_done = self._conn.execute(
+                "SELECT payload, items_done FROM tasks WHERE task_id = ?", (task_id,)
+            ).fetchone()
+            self._run_started[task_id] = (time.time(), items_done)
+        status, error = DONE, None
+        try:
+            source.method.process(
+                source.vector_store,
+                self,
+                source_id,
+                task_id,
+                **{**source.process_kwargs, **json.loads(payload)},
+            )
+        except TaskCancelled:
+            status = CANCELLED
+        except Exception as e:
+            status, error = FAILED, f"{type(e).__name__}: {e}"
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET status = ?, error = ?, finished_at = ? WHERE task_id = ?",
+                (status, error, time.time(), task_id),
+            )
+            self._conn.commit()
+            self._running.pop(task_id, None)
+            self._run_started.pop(task_id, None)
+            self._cancel_requested.discard(task_id)
+        self._wake()
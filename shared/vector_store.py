@@ -0,0 +1,550 @@
+import os
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import PrivateAttr
+
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import node_to_metadata_dict, metadata_dict_to_node
+
+from shared.ann import IVFIndex
+from shared.config import SETTINGS
+
+_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+VECTOR_STORE_KINDS = ("simple", "numpy")
+# Klasör -> açık store; aynı klasör process içinde tek bir store ile açılır
+_DEFAULT_STORES: Dict[str, "NumpyVectorStore"] = {}
+_DEFAULT_STORES_LOCK = threading.Lock()
+
+
+class NumpyVectorStore(BasePydanticVectorStore):
+    """Embedding'leri memory-mapped NumPy segment dosyalarında tutan vector store.
+
+    Dizin yapısı:
+      - seg-000001.vec: satır düzeninde (rows, dim) vektörler; dtype float32 / float16 / int8
+      - seg-000001.scale: int8 için satır başına float32 ölçek
+      - meta.sqlite: segment kataloğu ve node tablosu (node_id, ref_doc_id, segment, row, payload)
+
+    Vektörler L2-normalize edilerek yazılır; cosine benzerliği tek bir matris-vektör
+    çarpımıdır. Yazma yalnızca son segmente ekleme şeklindedir (append-only);
+    silinen satırlar compact() çağrılana kadar maskelenir.
+
+    ann="ivf" verilirse satır sayısı ann_min_rows'a ulaştığında bir IVF indeksi
+    eğitilir ve sorgular yalnızca en yakın ann_nprobe kümeyi tarar
+    (query(..., nprobe=N) ile sorgu başına değiştirilebilir). doc_ids / node_ids
+    kısıtlı sorgular her zaman tam aramayla yapılır. İndeks ann.npz'ye persist()
+    ve close() sırasında yazılır; sonradan eklenen satırlar açılışta yetiştirilir.
+    """
+
+    stores_text: bool = True
+    flat_metadata: bool = False
+
+    path: str
+    dtype: str = "float32"
+    segment_max_rows: int = 262_144
+    ann: Optional[str] = None
+    ann_nlist: Optional[int] = None
+    ann_nprobe: int = 8
+    ann_min_rows: int = 20_000
+
+    _lock: Any = PrivateAttr(default=None)
+    _conn: Any = PrivateAttr(default=None)
+    _dim: Optional[int] = PrivateAttr(default=None)
+    _next_segment: int = PrivateAttr(default=1)
+    # segment id -> satır sayısı
+    _segments: Dict[int, int] = PrivateAttr(default_factory=dict)
+    # segment id -> canlı satır maskesi
+    _live: Dict[int, np.ndarray] = PrivateAttr(default_factory=dict)
+    # segment id -> (satır sayısı, memmap, ölçekler)
+    _maps: Dict[int, Tuple[int, np.ndarray, Optional[np.ndarray]]] = PrivateAttr(default_factory=dict)
+    _ann_index: Optional[IVFIndex] = PrivateAttr(default=None)
+    # segment id -> ANN indeksine eklenmiş satır sayısı
+    _ann_covered: Dict[int, int] = PrivateAttr(default_factory=dict)
+    # add / delete / clear ile artan sayaç (bkz. revision)
+    _revision: int = PrivateAttr(default=0)
+
+    def __init__(self, path: str, dtype: str = "float32", **kwargs: Any):
+        if dtype not in _DTYPES:
+            raise ValueError(f"Unsupported dtype '{dtype}', expected one of {list(_DTYPES)}")
+        if kwargs.get("ann") not in (None, "ivf"):
+            raise ValueError(f"Unsupported ann '{kwargs['ann']}', expected None or 'ivf'")
+        super().__init__(path=path, dtype=dtype, **kwargs)
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(path, "meta.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS segments (id INTEGER PRIMARY KEY, rows INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS nodes (
+                node_id TEXT PRIMARY KEY,
+                ref_doc_id TEXT,
+                segment INTEGER NOT NULL,
+                row INTEGER NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_nodes_ref_doc ON nodes(ref_doc_id);
+            CREATE INDEX IF NOT EXISTS idx_nodes_position ON nodes(segment, row);
+            """
+        )
+        stored = dict(self._conn.execute("SELECT key, value FROM settings").fetchall())
+        if "dtype" in stored and stored["dtype"] != dtype:
+            raise ValueError(f"Store at {path} was created with dtype={stored['dtype']}, not {dtype}")
+        self._conn.execute("INSERT OR IGNORE INTO settings VALUES ('dtype', ?)", (dtype,))
+        self._conn.commit()
+        if "dim" in stored:
+            self._dim = int(stored["dim"])
+        self._load_catalog()
+        if self.ann and os.path.exists(self._ann_path()) and "ann_covered" in stored:
+            self._ann_index = IVFIndex.load(self._ann_path())
+            self._ann_covered = {int(k): v for k, v in json.loads(stored["ann_covered"]).items()}
+        self._ann_catch_up()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "NumpyVectorStore"
+
+    @property
+    def revision(self) -> int:
+        """İçerik her değiştiğinde artan sayaç; sorgu sonuç cache'i bununla geçersizlenir."""
+        return self._revision
+
+    @property
+    def client(self) -> Any:
+        return None
+
+    # --- dosya yardımcıları -------------------------------------------------
+
+    def _vec_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"seg-{segment:06d}.vec")
+
+    def _scale_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"seg-{segment:06d}.scale")
+
+    def _ann_path(self) -> str:
+        return os.path.join(self.path, "ann.npz")
+
+    def _load_catalog(self) -> None:
+        self._segments = dict(self._conn.execute("SELECT id, rows FROM segments").fetchall())
+        self._next_segment = max(self._segments, default=0) + 1
+        self._live = {seg: np.zeros(rows, dtype=bool) for seg, rows in self._segments.items()}
+        for seg, row in self._conn.execute("SELECT segment, row FROM nodes"):
+            self._live[seg][row] = True
+        self._maps = {}
+
+    def _encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+        if self.dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales = np.maximum(scales, 1e-12).astype(np.float32)
+            quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+            return quantized, scales
+        return vectors.astype(_DTYPES[self.dtype]), None
+
+    def _segment_matrix(self, segment: int) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        rows = self._segments[segment]
+        cached = self._maps.get(segment)
+        if cached is None or cached[0] != rows:
+            matrix = np.memmap(
+                self._vec_path(segment), dtype=_DTYPES[self.dtype], mode="r", shape=(rows, self._dim)
+            )
+            scales = None
+            if self.dtype == "int8":
+                scales = np.memmap(self._scale_path(segment), dtype=np.float32, mode="r", shape=(rows,))
+            cached = self._maps[segment] = (rows, matrix, scales)
+        return cached[1], cached[2]
+
+    def _append_rows(self, vectors: np.ndarray) -> List[Tuple[int, int]]:
+        """Vektörleri son segmente ekler (dolunca yeni segment açar); (segment, row) döner."""
+        encoded, scales = self._encode(vectors)
+        positions: List[Tuple[int, int]] = []
+        start = 0
+        while start < len(encoded):
+            segment = max(self._segments, default=0)
+            if not self._segments or self._segments[segment] >= self.segment_max_rows:
+                segment = self._next_segment
+                self._next_segment += 1
+                self._segments[segment] = 0
+                self._live[segment] = np.zeros(0, dtype=bool)
+                self._conn.execute("INSERT INTO segments (id, rows) VALUES (?, 0)", (segment,))
+            first_row = self._segments[segment]
+            take = min(self.segment_max_rows - first_row, len(encoded) - start)
+            with open(self._vec_path(segment), "ab") as f:
+                f.write(np.ascontiguousarray(encoded[start:start + take]).tobytes())
+            if scales is not None:
+                with open(self._scale_path(segment), "ab") as f:
+                    f.write(scales[start:start + take].tobytes())
+            rows = first_row + take
+            self._segments[segment] = rows
+            self._live[segment] = np.concatenate([self._live[segment], np.ones(take, dtype=bool)])
+            self._conn.execute("UPDATE segments SET rows = ? WHERE id = ?", (rows, segment))
+            positions.extend((segment, r) for r in range(first_row, rows))
+            start += take
+        return positions
+
+    # --- BasePydanticVectorStore arayüzü ------------------------------------
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        if not nodes:
+            return []
+        vectors = np.asarray([node.get_embedding() for node in nodes], dtype=np.float32)
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                self._conn.execute("INSERT OR REPLACE INTO settings VALUES ('dim', ?)", (str(self._dim),))
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(f"Embedding dim {vectors.shape[1]} does not match store dim {self._dim}")
+            # Aynı node_id tekrar eklenirse eski satır ölü sayılır
+            self._kill_locked([n.node_id for n in nodes])
+            positions = self._append_rows(vectors)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO nodes (node_id, ref_doc_id, segment, row, payload) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        node.node_id,
+                        node.ref_doc_id,
+                        seg,
+                        row,
+                        json.dumps(node_to_metadata_dict(node, remove_text=False, flat_metadata=False)),
+                    )
+                    for node, (seg, row) in zip(nodes, positions)
+                ],
+            )
+            self._conn.commit()
+            self._revision += 1
+            self._ann_catch_up()
+        return [n.node_id for n in nodes]
+
+    # process() ile uyumluluk (add_nodes arayüzü)
+    add_nodes = add
+
+    def _kill_locked(self, node_ids: Sequence[str]) -> None:
+        for start in range(0, len(node_ids), 500):
+            part = list(node_ids[start:start + 500])
+            placeholders = ",".join("?" * len(part))
+            rows = self._conn.execute(
+                f"SELECT segment, row FROM nodes WHERE node_id IN ({placeholders})", part
+            ).fetchall()
+            for seg, row in rows:
+                self._live[seg][row] = False
+            self._conn.execute(f"DELETE FROM nodes WHERE node_id IN ({placeholders})", part)
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        with self._lock:
+            ids = [r[0] for r in self._conn.execute("SELECT node_id FROM nodes WHERE ref_doc_id = ?", (ref_doc_id,))]
+            self._kill_locked(ids)
+            self._conn.commit()
+            self._revision += 1
+
+    def delete_nodes(self, node_ids: Optional[List[str]] = None, filters: Any = None, **delete_kwargs: Any) -> None:
+        if filters is not None:
+            raise NotImplementedError("NumpyVectorStore does not support metadata filters.")
+        with self._lock:
+            self._kill_locked(list(node_ids or []))
+            self._conn.commit()
+            self._revision += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for seg in list(self._segments):
+                self._remove_segment_files(seg)
+            self._conn.executescript("DELETE FROM nodes; DELETE FROM segments;")
+            self._conn.execute("DELETE FROM settings WHERE key = 'ann_covered'")
+            self._conn.commit()
+            self._load_catalog()
+            self._revision += 1
+            self._ann_index, self._ann_covered = None, {}
+            if os.path.exists(self._ann_path()):
+                os.unlink(self._ann_path())
+
+    def get_nodes(self, node_ids: Optional[List[str]] = None, filters: Any = None) -> List[BaseNode]:
+        if filters is not None:
+            raise NotImplementedError("NumpyVectorStore does not support metadata filters.")
+        with self._lock:
+            if node_ids is None:
+                rows = self._conn.execute("SELECT payload FROM nodes").fetchall()
+            else:
+                placeholders = ",".join("?" * len(node_ids))
+                rows = self._conn.execute(
+                    f"SELECT payload FROM nodes WHERE node_id IN ({placeholders})", list(node_ids)
+                ).fetchall()
+        return [metadata_dict_to_node(json.loads(p)) for (p,) in rows]
+
+    def _allowed_mask(self, query: VectorStoreQuery) -> Optional[Dict[int, np.ndarray]]:
+        """doc_ids / node_ids kısıtı varsa segment başına izinli satır maskesi."""
+        if not query.doc_ids and not query.node_ids:
+            return None
+        clauses, params = [], []
+        if query.doc_ids:
+            clauses.append(f"ref_doc_id IN ({','.join('?' * len(query.doc_ids))})")
+            params.extend(query.doc_ids)
+        if query.node_ids:
+            clauses.append(f"node_id IN ({','.join('?' * len(query.node_ids))})")
+            params.extend(query.node_ids)
+        masks = {seg: np.zeros(rows, dtype=bool) for seg, rows in self._segments.items()}
+        for seg, row in self._conn.execute(f"SELECT segment, row FROM nodes WHERE {' AND '.join(clauses)}", params):
+            masks[seg][row] = True
+        return masks
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.filters is not None:
+            raise NotImplementedError("NumpyVectorStore does not support metadata filters.")
+        k = query.similarity_top_k
+        if query.query_embedding is None or self._dim is None or k <= 0:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+        q = np.asarray(query.query_embedding, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+
+        with self._lock:
+            allowed = self._allowed_mask(query)
+            if allowed is None and self._ann_index is not None and self._ann_index.is_trained:
+                return self._ann_query_locked(q, k, kwargs.get("nprobe"))
+            candidates: List[Tuple[np.ndarray, np.ndarray, int]] = []
+            for seg in sorted(self._segments):
+                if not self._segments[seg]:
+                    continue
+                matrix, scales = self._segment_matrix(seg)
+                scores = self._scores(matrix, scales, q)
+                live = self._live[seg] if allowed is None else self._live[seg] & allowed[seg]
+                scores = np.where(live, scores, -np.inf)
+                top = _top_k(scores, k)
+                candidates.append((scores[top], top, seg))
+
+            if not candidates:
+                return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+            all_scores = np.concatenate([c[0] for c in candidates])
+            all_rows = np.concatenate([c[1] for c in candidates])
+            all_segs = np.concatenate([np.full(len(c[1]), c[2]) for c in candidates])
+            best = _top_k(all_scores, k)
+            best = best[np.isfinite(all_scores[best])]
+            hits = [(int(all_segs[i]), int(all_rows[i]), float(all_scores[i])) for i in best]
+            return self._result_locked(hits)
+
+    # --- ANN ----------------------------------------------------------------
+
+    def _fetch_vectors(self, keys: np.ndarray) -> np.ndarray:
+        """seg << 32 | row anahtarlarının float32 vektörlerini memmap'lerden toplar."""
+        out = np.empty((len(keys), self._dim), dtype=np.float32)
+        segs, rows = keys >> 32, keys & 0xFFFFFFFF
+        for seg in np.unique(segs):
+            selected = np.nonzero(segs == seg)[0]
+            matrix, scales = self._segment_matrix(int(seg))
+            part = np.asarray(matrix[rows[selected]], dtype=np.float32)
+            if scales is not None:
+                part *= np.asarray(scales[rows[selected]])[:, None]
+            out[selected] = part
+        return out
+
+    def _live_keys(self, segment: int, start: int, stop: int) -> np.ndarray:
+        rows = np.nonzero(self._live[segment][start:stop])[0] + start
+        return (np.int64(segment) << 32) | rows.astype(np.int64)
+
+    def _ann_catch_up(self) -> None:
+        """ANN indeksini eğitir (yeterli satır varsa) ve henüz eklenmemiş satırları ekler."""
+        if not self.ann or self._dim is None:
+            return
+        if self._ann_index is None or not self._ann_index.is_trained:
+            live = sum(int(m.sum()) for m in self._live.values())
+            if live < self.ann_min_rows:
+                return
+            all_keys = np.concatenate([self._live_keys(s, 0, r) for s, r in self._segments.items()])
+            nlist = self.ann_nlist or int(min(max(4 * np.sqrt(live), 16), 65_536))
+            self._ann_index = IVFIndex(nlist=nlist, nprobe=self.ann_nprobe)
+            rng = np.random.default_rng(0)
+            sample = all_keys[rng.choice(len(all_keys), size=min(len(all_keys), nlist * 64), replace=False)]
+            self._ann_index.train(self._fetch_vectors(sample))
+            self._ann_covered = {}
+        for seg, rows in self._segments.items():
+            covered = self._ann_covered.get(seg, 0)
+            if rows > covered:
+                keys = self._live_keys(seg, covered, rows)
+                for start in range(0, len(keys), 65_536):
+                    part = keys[start:start + 65_536]
+                    self._ann_index.add(part, self._fetch_vectors(part))
+                self._ann_covered[seg] = rows
+
+    def _live_mask(self, keys: np.ndarray) -> np.ndarray:
+        segs, rows = keys >> 32, keys & 0xFFFFFFFF
+        mask = np.zeros(len(keys), dtype=bool)
+        for seg in np.unique(segs):
+            selected = segs == seg
+            mask[selected] = self._live[int(seg)][rows[selected]]
+        return mask
+
+    def _ann_query_locked(self, q: np.ndarray, k: int, nprobe: Optional[int]) -> VectorStoreQueryResult:
+        # Silinmiş satırlar indekste kalır (compact() atar); adaylar skorlanmadan önce elenir.
+        # Taranan kümelerde k canlı satır yoksa nprobe ikiye katlanarak tekrar denenir.
+        nprobe = min(nprobe or self._ann_index.nprobe, self._ann_index.nlist)
+        while True:
+            keys, scores = self._ann_index.search(q, k, self._fetch_vectors, nprobe=nprobe, keep=self._live_mask)
+            if len(keys) >= k or nprobe >= self._ann_index.nlist:
+                break
+            nprobe = min(nprobe * 2, self._ann_index.nlist)
+        hits = [(int(key >> 32), int(key & 0xFFFFFFFF), float(score)) for key, score in zip(keys, scores)]
+        return self._result_locked(hits)
+
+    def persist(self, persist_path: Optional[str] = None, fs: Any = None) -> None:
+        """Vektörler zaten diskte; yalnızca ANN indeksini yazar."""
+        with self._lock:
+            if self._ann_index is None or not self._ann_index.is_trained:
+                return
+            tmp = self._ann_path() + ".tmp"
+            self._ann_index.save(tmp)
+            os.replace(tmp, self._ann_path())
+            self._conn.execute(
+                "INSERT OR REPLACE INTO settings VALUES ('ann_covered', ?)", (json.dumps(self._ann_covered),)
+            )
+            self._conn.commit()
+
+    def _scores(self, matrix: np.ndarray, scales: Optional[np.ndarray], q: np.ndarray) -> np.ndarray:
+        """Bellek kullanımını sınırlamak için blok blok float32 skor hesaplar."""
+        out = np.empty(matrix.shape[0], dtype=np.float32)
+        block = 65_536
+        for start in range(0, matrix.shape[0], block):
+            part = np.asarray(matrix[start:start + block], dtype=np.float32)
+            out[start:start + block] = part @ q
+        if scales is not None:
+            out *= scales
+        return out
+
+    def _result_locked(self, hits: List[Tuple[int, int, float]]) -> VectorStoreQueryResult:
+        nodes, ids, sims = [], [], []
+        for seg, row, score in hits:
+            found = self._conn.execute(
+                "SELECT node_id, payload FROM nodes WHERE segment = ? AND row = ?", (seg, row)
+            ).fetchone()
+            if found is None:
+                continue
+            node_id, payload = found
+            nodes.append(metadata_dict_to_node(json.loads(payload)))
+            ids.append(node_id)
+            sims.append(score)
+        return VectorStoreQueryResult(nodes=nodes, similarities=sims, ids=ids)
+
+    # --- bakım --------------------------------------------------------------
+
+    def _remove_segment_files(self, segment: int) -> None:
+        self._maps.pop(segment, None)
+        for p in (self._vec_path(segment), self._scale_path(segment)):
+            try:
+                os.unlink(p)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self._segments.values())
+            live = int(sum(int(m.sum()) for m in self._live.values()))
+            size = sum(
+                os.path.getsize(p)
+                for seg in self._segments
+                for p in (self._vec_path(seg), self._scale_path(seg))
+                if os.path.exists(p)
+            )
+        return {
+            "segments": len(self._segments),
+            "rows": total,
+            "live_rows": live,
+            "dim": self._dim,
+            "dtype": self.dtype,
+            "vector_bytes": size,
+            "ann": self.ann,
+            "ann_lists": self._ann_index.nlist if self._ann_index is not None and self._ann_index.is_trained else 0,
+            "ann_rows": self._ann_index.ntotal if self._ann_index is not None else 0,
+        }
+
+    def compact(self) -> None:
+        """Canlı satırları yeni segmentlere kopyalar, eski segment dosyalarını siler."""
+        with self._lock:
+            old_segments = sorted(self._segments)
+            if not old_segments:
+                return
+            rows = self._conn.execute("SELECT node_id, segment, row FROM nodes ORDER BY segment, row").fetchall()
+            vectors = np.empty((len(rows), self._dim or 0), dtype=np.float32)
+            seg_col = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+            row_col = np.fromiter((r[2] for r in rows), dtype=np.int64, count=len(rows))
+            for seg in old_segments:
+                selected = np.nonzero(seg_col == seg)[0]
+                if not len(selected):
+                    continue
+                matrix, scales = self._segment_matrix(seg)
+                part = np.asarray(matrix[row_col[selected]], dtype=np.float32)
+                if scales is not None:
+                    part *= np.asarray(scales[row_col[selected]])[:, None]
+                vectors[selected] = part
+
+            # Yeni segmentler _next_segment'ten numaralanır, eski dosyalarla çakışmaz
+            self._segments, self._live = {}, {}
+            positions = self._append_rows(vectors) if len(rows) else []
+            self._conn.execute(
+                f"DELETE FROM segments WHERE id IN ({','.join('?' * len(old_segments))})", old_segments
+            )
+            self._conn.executemany(
+                "UPDATE nodes SET segment = ?, row = ? WHERE node_id = ?",
+                [(seg, row, node_id) for (node_id, _, _), (seg, row) in zip(rows, positions)],
+            )
+            self._conn.commit()
+            for seg in old_segments:
+                self._remove_segment_files(seg)
+            self._load_catalog()
+            if self.ann:
+                # Satır konumları değişti; indeks yeni veriyle yeniden eğitilir
+                self._ann_index, self._ann_covered = None, {}
+                self._ann_catch_up()
+                self.persist()
+
+    def close(self) -> None:
+        self.persist()
+        with self._lock:
+            self._maps.clear()
+            self._conn.close()
+
+
+def default_vector_store(path: Optional[str] = None) -> Optional[NumpyVectorStore]:
+    """SETTINGS.vector_store'a göre uygulamanın kullanacağı store ("simple" için None).
+
+    "numpy" seçiliyse klasör path, SETTINGS.vector_store_path ya da
+    index_persist_dir/vectors'tur; store ANN ayarlarıyla (SETTINGS.ann, ann_nlist,
+    ann_nprobe, ann_min_rows) açılır ve klasör başına paylaşılır.
+    """
+    kind = SETTINGS.vector_store
+    if kind not in VECTOR_STORE_KINDS:
+        raise ValueError(f"Unsupported vector_store '{kind}', expected one of {list(VECTOR_STORE_KINDS)}")
+    if kind == "simple":
+        return None
+    path = path or SETTINGS.vector_store_path or (
+        os.path.join(SETTINGS.index_persist_dir, "vectors") if SETTINGS.index_persist_dir else None
+    )
+    if not path:
+        raise ValueError("vector_store='numpy' requires vector_store_path or index_persist_dir")
+    key = os.path.abspath(path)
+    with _DEFAULT_STORES_LOCK:
+        store = _DEFAULT_STORES.get(key)
+        if store is None:
+            store = NumpyVectorStore(
+                key,
+                ann=SETTINGS.ann,
+                ann_nlist=SETTINGS.ann_nlist,
+                ann_nprobe=SETTINGS.ann_nprobe,
+                ann_min_rows=SETTINGS.ann_min_rows,
+            )
+            _DEFAULT_STORES[key] = store
+        return store
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Azalan skora göre en iyi k indeks (argpartition + küçük sıralama)."""
+    if len(scores) <= k:
+        return np.argsort(-scores)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part])]
@@ -0,0 +1,55 @@
+"""Ortak fixture'lar: benchmarks.fake_docs_server üzerinde ağsız testler."""
+import pytest
+from llama_index.core.embeddings import MockEmbedding
+
+from benchmarks.fake_docs_server import FakeDocsServer
+from shared.config import SETTINGS
+
+
+@pytest.fixture(autouse=True)
+def isolated_settings(monkeypatch):
+    """Testler ev dizinine cache yazmaz, hız sınırına ve uzun backoff'lara takılmaz."""
+    monkeypatch.setattr(SETTINGS, "chunk_cache_path", None)
+    monkeypatch.setattr(SETTINGS, "embed_cache_path", None)
+    monkeypatch.setattr(SETTINGS, "api_rate_per_second", 0.0)
+    monkeypatch.setattr(SETTINGS, "api_backoff_base", 0.01)
+    monkeypatch.setattr(SETTINGS, "api_backoff_max", 0.05)
+
+
+@pytest.fixture
+def docs_server():
+    """corpus -> çalışan FakeDocsServer; test sonunda durdurulur."""
+    servers = []
+
+    def start(corpus, **kwargs):
+        kwargs.setdefault("latency", 0.0)
+        server = FakeDocsServer(corpus, **kwargs).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def embed_model(monkeypatch):
+    """Sahte embedding modeli; sorgu tarafı (setup_llama_index) da bunu kullanır."""
+    import shared.llama_utils as llama_utils
+    from llama_index.core import Settings
+
+    model = MockEmbedding(embed_dim=8)
+    monkeypatch.setattr(llama_utils, "_EMBED_MODEL", model)
+    monkeypatch.setattr(Settings, "_embed_model", model)
+    return model
+
+
+def reader_config(server, document_ids, **extra):
+    return {
+        "service_account_dict": server.service_account_info(),
+        "document_ids": list(document_ids),
+        "inclusion_rules": [],
+        "exclusion_rules": [],
+        "api_endpoint": server.endpoint,
+        **extra,
+    }
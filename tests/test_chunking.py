@@ -0,0 +1,89 @@
+from llama_index.core import Document
+
+from shared.chunking import ChunkCache, chunk_documents, sentence_chunks, structure_chunks
+
+
+def _words(s):
+    return len(s.split())
+
+
+def _structured_text():
+    paragraphs = [
+        "Intro",
+        "alpha beta gamma delta.",
+        "epsilon zeta eta theta.",
+        "Details",
+        "iota kappa lambda mu.",
+        "nu xi omicron pi.",
+        "rho sigma tau upsilon.",
+    ]
+    offsets, pos = [], 0
+    for p in paragraphs:
+        offsets.append(pos)
+        pos += len(p) + 1
+    return "\n".join(paragraphs), offsets, [offsets[0], offsets[3]]
+
+
+def test_sentence_chunks_map_back_to_text():
+    text = " ".join(f"Sentence number {i} talks about the quarterly roadmap." for i in range(60))
+
+    chunks = sentence_chunks(text, chunk_size=40, chunk_overlap=10)
+
+    assert len(chunks) > 1
+    assert all(text[start:end] == piece for start, end, piece in chunks)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(text)
+    assert all(a[0] < b[0] for a, b in zip(chunks, chunks[1:]))
+
+
+def test_structure_chunks_follow_headings_and_paragraphs():
+    text, offsets, headings = _structured_text()
+
+    chunks = structure_chunks(text, offsets, headings, chunk_size=12, chunk_overlap=5, count_tokens=_words)
+
+    assert [c[2] for c in chunks] == [
+        "Intro\nalpha beta gamma delta.\nepsilon zeta eta theta.",
+        "Details\niota kappa lambda mu.\nnu xi omicron pi.",
+        "nu xi omicron pi.\nrho sigma tau upsilon.",
+    ]
+    assert all(text[start:end] == piece for start, end, piece in chunks)
+
+
+def test_structure_chunks_split_oversized_paragraph():
+    text = "Heading\n" + " ".join(f"word{i}." for i in range(200))
+
+    chunks = structure_chunks(text, [0, 8], [0], chunk_size=30, chunk_overlap=0, count_tokens=_words)
+
+    assert chunks[0][2] == "Heading"
+    assert len(chunks) > 2
+    assert all(text[start:end] == piece for start, end, piece in chunks)
+
+
+def _document(revision):
+    text, offsets, headings = _structured_text()
+    return Document(
+        id_="doc-1",
+        text=text,
+        metadata={
+            "doc_id": "doc-1",
+            "revision_id": revision,
+            "paragraph_offsets": offsets,
+            "headings": [[o, 1, "h"] for o in headings],
+        },
+    )
+
+
+def test_chunk_cache_hits_until_revision_changes(tmp_path):
+    cache = ChunkCache(str(tmp_path / "chunks.sqlite"))
+
+    first = chunk_documents([_document("rev-1")], 64, 8, strategy="structure", workers=0, cache=cache)
+    writes = cache._conn.total_changes
+    second = chunk_documents([_document("rev-1")], 64, 8, strategy="structure", workers=0, cache=cache)
+    assert cache._conn.total_changes == writes, "cache hits must not write"
+    chunk_documents([_document("rev-2")], 64, 8, strategy="structure", workers=0, cache=cache)
+
+    assert [n.text for n in first] == [n.text for n in second]
+    assert [(n.start_char_idx, n.end_char_idx) for n in first] == [(n.start_char_idx, n.end_char_idx) for n in second]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+    assert "paragraph_offsets" not in first[0].metadata
+    cache.close()
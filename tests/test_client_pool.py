@@ -0,0 +1,95 @@
+import time
+
+import pytest
+from googleapiclient.errors import HttpError
+
+from benchmarks.synthetic_docs import make_document
+from google_docs.client_pool import DocsClientPool
+from google_docs.rate_limit import RetryBudget
+from shared.config import SETTINGS
+
+
+def _corpus():
+    return {"doc-0": make_document(doc_id="doc-0", paragraphs=6, seed=0)}
+
+
+def _client(server):
+    return DocsClientPool().get(server.service_account_info(), api_endpoint=server.endpoint)
+
+
+def test_pool_shares_clients_and_limiter_per_identity(docs_server):
+    server = docs_server(_corpus())
+    pool = DocsClientPool()
+    info = server.service_account_info()
+    assert pool.limiter(info, api_endpoint=server.endpoint) is None
+
+    docs = pool.get(info, api_endpoint=server.endpoint)
+    assert pool.get(info, api_endpoint=server.endpoint) is docs
+    other_scope = pool.get(info, scopes=("https://www.googleapis.com/auth/drive.readonly",), api_endpoint=server.endpoint)
+    assert other_scope is not docs
+    assert other_scope.limiter is docs.limiter is pool.limiter(info, api_endpoint=server.endpoint)
+    assert pool.get_drive(info, api_endpoint=server.endpoint).limiter is not docs.limiter
+
+    pool.evict(service_account_info=info)
+    assert pool.limiter(info, api_endpoint=server.endpoint) is None
+    assert pool.get(info, api_endpoint=server.endpoint) is not docs
+
+
+def test_field_mask_profiles_select_fields(docs_server):
+    server = docs_server(_corpus())
+    client = _client(server)
+
+    metadata = client.get_document("doc-0", fields="metadata")
+    text = client.get_document("doc-0", fields="text")
+
+    assert "body" not in metadata and metadata["documentId"] == "doc-0" and metadata["title"]
+    assert text["body"]["content"]
+    stats = client.transfer_stats.snapshot()
+    assert stats["metadata"]["requests"] == stats["text"]["requests"] == 1
+    assert stats["metadata"]["bytes"] < stats["text"]["bytes"]
+
+
+def test_server_errors_are_retried_up_to_max_attempts(docs_server, monkeypatch):
+    monkeypatch.setattr(SETTINGS, "api_max_attempts", 3)
+    server = docs_server(_corpus(), error_rate=1.0)
+    client = _client(server)
+
+    with pytest.raises(HttpError) as excinfo:
+        client.get_document("doc-0")
+
+    assert excinfo.value.resp.status == 500
+    assert server.stats["500"] == 3
+
+
+def test_retry_budget_is_shared_across_requests(docs_server):
+    server = docs_server(_corpus(), error_rate=1.0)
+    client = _client(server)
+    budget = RetryBudget(1)
+
+    for _ in range(2):
+        with pytest.raises(HttpError):
+            client.get_document("doc-0", retry_budget=budget)
+
+    # İlk istek bütçeyi tek tekrarla tüketir, ikincisi hiç tekrar denenmez
+    assert server.stats["500"] == 3
+    assert budget.remaining == 0
+
+
+def test_retry_after_pauses_shared_limiter(docs_server, monkeypatch):
+    monkeypatch.setattr(SETTINGS, "api_rate_per_second", 1000.0)
+    monkeypatch.setattr(SETTINGS, "api_backoff_max", 5.0)
+    # seed=1: ilk istek 429, ikincisi başarılı
+    server = docs_server(_corpus(), rate_429=0.5, retry_after=0.3, seed=1)
+    client = _client(server)
+    limiter = client.limiter
+    initial = limiter.concurrency.limit
+
+    start = time.monotonic()
+    doc = client.get_document("doc-0")
+
+    assert doc["documentId"] == "doc-0"
+    assert server.stats["429"] == 1 and server.stats["200"] >= 1
+    assert time.monotonic() - start >= 0.3
+    assert limiter.concurrency.limit == initial // 2
+    # Retry-After süresi kovaya yazılır; aynı limiter'ı kullanan diğer çağıranlar da bekler
+    assert limiter.bucket._paused_until > start + 0.3
@@ -0,0 +1,49 @@
+import copy
+
+from llama_index.core import VectorStoreIndex
+
+from benchmarks.synthetic_docs import make_document
+from conftest import reader_config
+from google_docs.docs_reader import GoogleDocsConfigReader
+from shared.dedup import DEDUP_FILE
+from shared.query_engine import search_index
+from shared.vector_store import NumpyVectorStore
+
+
+def _near_identical_pair():
+    original = make_document(doc_id="doc-a", paragraphs=8, table_density=0.0, seed=1)
+    original["title"] = "Onboarding template"
+    fork = copy.deepcopy(original)
+    fork["documentId"] = "doc-b"
+    fork["title"] = "Onboarding - Team B"
+    fork["revisionId"] = "rev-b"
+    paragraphs = [block for block in fork["body"]["content"] if "paragraph" in block]
+    paragraphs[-1]["paragraph"]["elements"][-1]["textRun"]["content"] += " Team B."
+    return {"doc-a": original, "doc-b": fork}
+
+
+def _index(tmp_path, docs_server, embed_model, **extra):
+    corpus = _near_identical_pair()
+    server = docs_server(corpus)
+    store = NumpyVectorStore(str(tmp_path / "store"))
+    config = reader_config(server, corpus, manifest_path=str(tmp_path / "manifest.json"), **extra)
+    GoogleDocsConfigReader("test", config).process(store, None, "test", "task", embed_model=embed_model)
+    return store
+
+
+def test_dedup_is_opt_in(tmp_path, docs_server, embed_model):
+    store = _index(tmp_path, docs_server, embed_model)
+    assert not (tmp_path / "store" / DEDUP_FILE).exists()
+    assert {n.metadata["doc_id"] for n in store.get_nodes()} == {"doc-a", "doc-b"}
+
+
+def test_search_returns_near_duplicate_document(tmp_path, docs_server, embed_model):
+    store = _index(tmp_path, docs_server, embed_model, dedup_threshold=0.9)
+    # Fork store'a yazılmadı; yalnızca referans olarak tutuluyor
+    assert {n.metadata["doc_id"] for n in store.get_nodes()} == {"doc-a"}
+
+    index = VectorStoreIndex.from_vector_store(store, embed_model=embed_model)
+    hits = search_index(index, "onboarding team b", top_k=3, mode="vector")
+    assert hits
+    found = {(hit.doc_id, hit.title) for hit in hits} | {ref for hit in hits for ref in hit.references}
+    assert ("doc-b", "Onboarding - Team B") in found
@@ -0,0 +1,109 @@
+import copy
+
+from llama_index.core.embeddings import MockEmbedding
+
+from benchmarks.synthetic_docs import make_document
+from conftest import reader_config
+from google_docs.docs_reader import GoogleDocsConfigReader
+from shared.lexical import BM25Index, LEXICAL_FILE
+from shared.manifest import IndexManifest
+from shared.vector_store import NumpyVectorStore
+
+
+def _corpus(count=3):
+    return {f"doc-{i}": make_document(doc_id=f"doc-{i}", paragraphs=8, table_density=0.0, seed=i) for i in range(count)}
+
+
+def _process(docs_server, corpus, store, manifest_path, embed_model, **extra):
+    server = docs_server(copy.deepcopy(corpus))
+    config = reader_config(server, corpus, manifest_path=manifest_path, exclusion_rules=["draft"], **extra)
+    GoogleDocsConfigReader("test", config).process(store, None, "test", "task", embed_model=embed_model)
+
+
+def test_incremental_run_refetches_only_changed_revisions(tmp_path, docs_server, embed_model, monkeypatch):
+    corpus = _corpus()
+    store = NumpyVectorStore(str(tmp_path / "store"))
+    manifest_path = str(tmp_path / "manifest.json")
+    _process(docs_server, corpus, store, manifest_path, embed_model)
+    before = IndexManifest(manifest_path)
+    old_nodes = {doc_id: set(before.get_node_ids(doc_id)) for doc_id in before.doc_ids()}
+
+    fetched, embedded = [], []
+    original_fetch = GoogleDocsConfigReader.fetch_raw_documents
+    original_embed = MockEmbedding._get_text_embeddings
+
+    def fetch(self, document_ids, fields=None):
+        if fields != "metadata":
+            fetched.extend(document_ids)
+        return original_fetch(self, document_ids, fields=fields)
+
+    def embed(self, texts):
+        embedded.extend(texts)
+        return original_embed(self, texts)
+
+    monkeypatch.setattr(GoogleDocsConfigReader, "fetch_raw_documents", fetch)
+    monkeypatch.setattr(MockEmbedding, "_get_text_embeddings", embed)
+    corpus["doc-1"] = make_document(doc_id="doc-1", paragraphs=8, table_density=0.0, seed=11)
+    del corpus["doc-2"]
+    _process(docs_server, corpus, store, manifest_path, embed_model)
+
+    manifest = IndexManifest(manifest_path)
+    assert fetched == ["doc-1"]
+    assert sorted(manifest.doc_ids()) == ["doc-0", "doc-1"]
+    assert manifest.get_revision("doc-1") == "rev-11"
+    assert set(manifest.get_node_ids("doc-0")) == old_nodes["doc-0"]
+    new_nodes = set(manifest.get_node_ids("doc-1"))
+    assert new_nodes and len(embedded) == len(new_nodes)
+    stored = {n.node_id for n in store.get_nodes()}
+    assert stored == old_nodes["doc-0"] | new_nodes
+    assert not stored & (old_nodes["doc-1"] | old_nodes["doc-2"])
+
+
+def test_renamed_into_exclusion_rule_is_purged(tmp_path, docs_server, embed_model):
+    corpus = _corpus()
+    store = NumpyVectorStore(str(tmp_path / "store"))
+    manifest_path = str(tmp_path / "manifest.json")
+    _process(docs_server, corpus, store, manifest_path, embed_model)
+    manifest = IndexManifest(manifest_path)
+    assert sorted(manifest.doc_ids()) == ["doc-0", "doc-1", "doc-2"]
+    renamed_nodes = set(manifest.get_node_ids("doc-1"))
+    assert renamed_nodes
+
+    corpus["doc-1"]["title"] = "DRAFT - do not share"
+    _process(docs_server, corpus, store, manifest_path, embed_model)
+
+    manifest = IndexManifest(manifest_path)
+    assert sorted(manifest.doc_ids()) == ["doc-0", "doc-2"]
+    stored = {n.node_id for n in store.get_nodes()}
+    assert stored and not stored & renamed_nodes
+    lexical = BM25Index.load(str(tmp_path / "store" / LEXICAL_FILE))
+    assert {hit for hit, _ in lexical.search("lorem ipsum dolor", top_k=100)}.isdisjoint(renamed_nodes)
+    assert len(lexical) == len(stored)
+
+
+def test_streaming_run_saves_lexical_index_once(tmp_path, docs_server, embed_model, monkeypatch):
+    saves = []
+    original_save = BM25Index.save
+    monkeypatch.setattr(BM25Index, "save", lambda self, path: saves.append(path) or original_save(self, path))
+    corpus = _corpus(6)
+    store = NumpyVectorStore(str(tmp_path / "store"))
+    _process(
+        docs_server, corpus, store, str(tmp_path / "manifest.json"), embed_model,
+        stream=True, stream_doc_batch_size=2,
+    )
+    assert len(saves) == 1
+    assert len(BM25Index.load(saves[0])) == len(store.get_nodes())
+
+
+def test_get_documents_keeps_input_order_and_collects_failures(docs_server):
+    corpus = _corpus(8)
+    server = docs_server(corpus, latency=0.05, unavailable={"doc-5"})
+    requested = ["doc-6", "doc-0", "missing", "doc-5", "doc-3", "doc-7", "doc-1", "doc-2", "doc-4"]
+    reader = GoogleDocsConfigReader("test", reader_config(server, requested, max_workers=3))
+
+    docs = reader.get_documents()
+
+    assert [d.doc_id for d in docs] == [d for d in requested if d not in ("missing", "doc-5")]
+    assert set(reader.fetch_errors) == {"missing", "doc-5"}
+    assert reader.fetch_errors["missing"].startswith("HTTP 404")
+    assert 1 < server.stats["max_in_flight"] <= 3
@@ -0,0 +1,15 @@
+import logging
+
+from benchmarks.synthetic_docs import make_document
+from google_docs.downloader import fetch_document
+
+
+def test_missing_document_is_logged_not_printed(docs_server, caplog, capsys):
+    server = docs_server({"doc-0": make_document(doc_id="doc-0", paragraphs=2)})
+
+    with caplog.at_level(logging.ERROR, logger="gdocs.downloader"):
+        doc = fetch_document("missing", service_account_info=server.service_account_info(), api_endpoint=server.endpoint)
+
+    assert doc is None
+    assert "missing not found (404)" in caplog.text
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,93 @@
+import copy
+
+from benchmarks.fake_docs_server import FakeDrive
+from benchmarks.synthetic_docs import make_document
+from conftest import reader_config
+from google_docs.client_pool import DocsClientPool
+from google_docs.docs_reader import GoogleDocsConfigReader
+from google_docs.drive import DriveFolderSync, DriveSyncState
+from shared.manifest import IndexManifest
+from shared.vector_store import NumpyVectorStore
+
+
+def _drive():
+    drive = FakeDrive()
+    drive.add_folder("root")
+    drive.add_folder("sub", parent="root")
+    drive.add_folder("elsewhere")
+    drive.add_document("doc-a", parent="root")
+    drive.add_document("doc-b", parent="sub")
+    drive.add_document("doc-c", parent="elsewhere")
+    return drive
+
+
+def _sync(server, state_path, page_size=1000):
+    client = DocsClientPool().get_drive(server.service_account_info(), api_endpoint=server.endpoint)
+    return DriveFolderSync(client, ["root"], state=DriveSyncState(state_path), page_size=page_size)
+
+
+def test_full_crawl_lists_documents_in_nested_folders(tmp_path, docs_server):
+    server = docs_server({}, drive=_drive())
+    state_path = str(tmp_path / "drive.json")
+    sync = _sync(server, state_path, page_size=1)
+
+    result = sync.sync()
+
+    assert result.full_crawl
+    assert sorted(result.document_ids) == sorted(result.changed_ids) == ["doc-a", "doc-b"]
+    sync.commit(result)
+    state = DriveSyncState(state_path)
+    assert state.page_token == result.page_token
+    assert sorted(state.documents) == ["doc-a", "doc-b"]
+
+
+def test_incremental_sync_applies_feed_changes(tmp_path, docs_server):
+    drive = _drive()
+    server = docs_server({}, drive=drive)
+    state_path = str(tmp_path / "drive.json")
+    first = _sync(server, state_path)
+    first.commit(first.sync())
+
+    drive.put("doc-a", name="renamed")
+    drive.put("doc-b", parents=["elsewhere"])
+    drive.add_folder("new", parent="sub")
+    drive.add_document("doc-d", parent="new")
+    drive.put("doc-c", parents=["root"])
+
+    result = _sync(server, state_path).sync()
+
+    assert not result.full_crawl
+    assert sorted(result.document_ids) == ["doc-a", "doc-c", "doc-d"]
+    assert sorted(result.changed_ids) == ["doc-a", "doc-c", "doc-d"]
+    assert result.removed_ids == ["doc-b"]
+    assert result.state["documents"]["doc-a"]["name"] == "renamed"
+
+
+def test_failed_fetch_is_retried_on_next_incremental_run(tmp_path, docs_server, embed_model):
+    drive = _drive()
+    corpus = {d: make_document(doc_id=d, paragraphs=4, table_density=0.0, seed=i) for i, d in enumerate(["doc-a", "doc-b"])}
+    store = NumpyVectorStore(str(tmp_path / "store"))
+    manifest_path = str(tmp_path / "manifest.json")
+
+    def run(**server_kwargs):
+        server = docs_server(copy.deepcopy(corpus), drive=drive, **server_kwargs)
+        config = reader_config(
+            server, [], folder_ids=["root"], drive_state_path=str(tmp_path / "drive.json"), manifest_path=manifest_path
+        )
+        reader = GoogleDocsConfigReader("test", config)
+        reader.process(store, None, "test", "task", embed_model=embed_model)
+        return reader
+
+    run()
+    assert IndexManifest(manifest_path).get_revision("doc-a") == "rev-0"
+
+    corpus["doc-a"]["revisionId"] = "rev-new"
+    drive.put("doc-a", name="doc-a edited")
+    reader = run(unavailable={"doc-a"})
+    assert set(reader.fetch_errors) == {"doc-a"}
+    assert IndexManifest(manifest_path).get_revision("doc-a") == "rev-0"
+
+    # Feed'de yeni değişiklik yok; başarısız belge yine de tekrar denenir
+    reader = run()
+    assert not reader.fetch_errors
+    assert IndexManifest(manifest_path).get_revision("doc-a") == "rev-new"
@@ -0,0 +1,29 @@
+from shared.embedding_cache import EmbeddingCache
+
+
+def test_lookup_does_not_write_until_put(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite"))
+    cache.put_many({"a": [1.0, 2.0], "b": [3.0, 4.0]})
+    writes = cache._conn.total_changes
+
+    for _ in range(10):
+        assert cache.get_many(["a", "b", "c"]) == {"a": [1.0, 2.0], "b": [3.0, 4.0]}
+    assert cache._conn.total_changes == writes
+    assert cache.stats()["hits"] == 20
+    cache.close()
+
+
+def test_buffered_touches_keep_lru_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(EmbeddingCache, "_EVICT_CHECK_EVERY", 1)
+    path = str(tmp_path / "emb.sqlite")
+    cache = EmbeddingCache(path, max_entries=2)
+    cache.put_many({"old": [0.0]})
+    cache.put_many({"new": [1.0]})
+    cache.get_many(["old"])
+    cache.put_many({"third": [2.0]})
+
+    assert set(cache.get_many(["old", "new", "third"])) == {"old", "third"}
+    cache.close()
+    reopened = EmbeddingCache(path, max_entries=2)
+    assert set(reopened.get_many(["old", "third"])) == {"old", "third"}
+    reopened.close()
@@ -0,0 +1,64 @@
+from google_docs.extraction import extract_document
+
+
+def _para(text, style="NORMAL_TEXT", bullet=None):
+    paragraph = {
+        "elements": [{"textRun": {"content": text}}],
+        "paragraphStyle": {"namedStyleType": style},
+    }
+    if bullet is not None:
+        paragraph["bullet"] = bullet
+    return {"paragraph": paragraph}
+
+
+def _lists():
+    return {
+        "steps": {"listProperties": {"nestingLevels": [{"glyphType": "DECIMAL"}, {"glyphType": "ALPHA"}]}},
+        "notes": {"listProperties": {"nestingLevels": [{"glyphSymbol": "●"}, {"glyphSymbol": "○"}]}},
+    }
+
+
+def test_list_items_get_markers_and_indentation():
+    raw = {
+        "lists": _lists(),
+        "body": {
+            "content": [
+                _para("Setup\n", "HEADING_1"),
+                _para("Install\n", bullet={"listId": "steps"}),
+                _para("Download\n", bullet={"listId": "steps", "nestingLevel": 1}),
+                _para("Unpack\n", bullet={"listId": "steps", "nestingLevel": 1}),
+                _para("Configure\n", bullet={"listId": "steps"}),
+                _para("Check\n", bullet={"listId": "steps", "nestingLevel": 1}),
+                _para("Remember backups\n", bullet={"listId": "notes"}),
+                _para("Weekly\n", bullet={"listId": "notes", "nestingLevel": 1}),
+            ]
+        },
+    }
+
+    doc = extract_document(raw)
+
+    assert doc.text == (
+        "Setup\n"
+        "1. Install\n"
+        "  1. Download\n"
+        "  2. Unpack\n"
+        "2. Configure\n"
+        "  1. Check\n"
+        "- Remember backups\n"
+        "  - Weekly"
+    )
+    lines = doc.text.split("\n")
+    assert [doc.text[o:].split("\n")[0] for o in doc.paragraph_offsets] == lines
+    assert doc.headings == [(0, 1, "Setup")]
+
+
+def test_bulleted_heading_keeps_plain_title():
+    raw = {
+        "lists": _lists(),
+        "body": {"content": [_para("Intro\n", "HEADING_2", bullet={"listId": "steps"}), _para("Body text\n")]},
+    }
+
+    doc = extract_document(raw)
+
+    assert doc.text == "1. Intro\nBody text"
+    assert doc.headings == [(0, 2, "Intro")]
@@ -0,0 +1,101 @@
+import threading
+import time
+
+from shared.jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobRunner
+
+
+def _wait(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.finished:
+        assert time.monotonic() < deadline, f"job stuck in {job.status}"
+        time.sleep(0.005)
+
+
+def _drain(runner):
+    """Tek worker'lı havuzda önceki _run'ların (trim dahil) bitmesini bekler."""
+    runner._pool.submit(lambda: None).result(5)
+
+
+def _blocking(gate, started=None):
+    def fn(job):
+        if started is not None:
+            started.set()
+        gate.wait(5)
+        return {"index": object(), "documents": 3}
+    return fn
+
+
+def test_job_lifecycle_and_reuse():
+    runner = JobRunner(max_workers=1)
+    gate, started = threading.Event(), threading.Event()
+
+    job = runner.submit("k", _blocking(gate, started), reuse_seconds=60)
+    started.wait(5)
+    assert job.status == RUNNING
+    assert runner.submit("k", _blocking(gate), reuse_seconds=60) is job
+    gate.set()
+    _wait(job)
+
+    assert job.status == DONE and job.progress == 1.0 and job.result["documents"] == 3
+    assert runner.get(job.id) is job
+    assert runner.submit("k", _blocking(gate), reuse_seconds=60) is job
+    fresh = runner.submit("k", _blocking(gate))
+    assert fresh is not job
+    _wait(fresh)
+
+    failed = runner.submit("broken", lambda job: 1 / 0)
+    _wait(failed)
+    assert failed.status == FAILED and failed.error.startswith("ZeroDivisionError")
+    assert runner.submit("broken", lambda job: 1) is not failed
+
+
+def test_cancel_queued_job_never_runs():
+    runner = JobRunner(max_workers=1)
+    gate = threading.Event()
+    blocker = runner.submit("a", _blocking(gate))
+    calls = []
+    queued = runner.submit("b", lambda job: calls.append(job))
+
+    assert queued.status == QUEUED
+    assert queued.cancel()
+    gate.set()
+    _wait(blocker)
+    _drain(runner)
+
+    assert queued.status == CANCELLED and not calls
+    assert not queued.cancel()
+
+
+def test_cancel_running_job_stops_at_check_point():
+    runner = JobRunner(max_workers=1)
+    started = threading.Event()
+
+    def fn(job):
+        started.set()
+        while True:
+            job.check_cancelled()
+            time.sleep(0.005)
+
+    job = runner.submit("loop", fn)
+    started.wait(5)
+    assert job.cancel() and job.is_cancelled("any-task-id")
+    _wait(job)
+
+    assert job.status == CANCELLED and job.error is None
+    assert job.snapshot()["cancel_requested"]
+
+
+def test_history_keeps_full_results_only_for_newest_jobs():
+    runner = JobRunner(max_workers=1, history=3, keep_results=1)
+    jobs = []
+    for i in range(4):
+        job = runner.submit(("docs", i), lambda job, i=i: {"index": object(), "documents": i, "title": f"t{i}"})
+        _wait(job)
+        jobs.append(job)
+    _drain(runner)
+
+    assert runner.get(jobs[0].id) is None
+    for i, job in enumerate(jobs[1:3], start=1):
+        assert job.result_released and job.result == {"documents": i, "title": f"t{i}"}
+    assert not jobs[3].result_released and "index" in jobs[3].result
+    assert runner.submit(("docs", 1), lambda job: {}, reuse_seconds=60) is not jobs[1]
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+from llama_index.core import Document, StorageContext
+from llama_index.core.schema import TextNode
+
+import shared.llama_utils as llama_utils
+from shared.llama_utils import embed_nodes
+
+
+def test_embed_nodes_fills_missing_embeddings_in_batches(embed_model):
+    nodes = [TextNode(id_=f"n{i}", text=f"node {i}") for i in range(5)]
+    nodes[1].embedding = [1.0] * 8
+    calls = []
+
+    embed_nodes(nodes, embed_model, batch_size=2, progress=lambda done, total: calls.append((done, total)))
+
+    assert all(n.embedding is not None for n in nodes)
+    assert nodes[1].embedding == [1.0] * 8
+    assert calls == [(1, 5), (3, 5), (5, 5)]
+
+
+def _documents(tag):
+    return [Document(id_=f"{tag}-{i}", text=f"{tag} paragraph {i}.") for i in range(3)]
+
+
+def _persist(tmp_path, tag):
+    index = llama_utils.create_index_from_documents(_documents(tag))
+    return llama_utils.persist_index(index, str(tmp_path), keep=2)
+
+
+def _load_fresh(tmp_path, monkeypatch):
+    monkeypatch.setattr(llama_utils, "_LOADED_INDEXES", {})
+    index = llama_utils.load_persisted_index(str(tmp_path))
+    return sorted(node.text for node in index.docstore.docs.values())
+
+
+def _snapshot_dirs(tmp_path):
+    return sorted(os.listdir(tmp_path / "snapshots"))
+
+
+@pytest.mark.parametrize("failing", ["storage", "current"])
+def test_interrupted_persist_keeps_previous_snapshot(tmp_path, embed_model, monkeypatch, failing):
+    first = _persist(tmp_path, "old")
+    expected = _load_fresh(tmp_path, monkeypatch)
+
+    replace = os.replace
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    def fail_current(src, dst):
+        if os.path.basename(dst) == "CURRENT":
+            fail()
+        replace(src, dst)
+
+    with monkeypatch.context() as patch, pytest.raises(OSError):
+        if failing == "storage":
+            patch.setattr(StorageContext, "persist", fail)
+        else:
+            patch.setattr(llama_utils.os, "replace", fail_current)
+        _persist(tmp_path, "new")
+
+    assert (tmp_path / "CURRENT").read_text() == first
+    assert _snapshot_dirs(tmp_path) == [first]
+    assert sorted(os.listdir(tmp_path)) == ["CURRENT", "snapshots"]
+    assert expected == _load_fresh(tmp_path, monkeypatch)
+    assert expected[0].startswith("old")
+
+
+def test_superseded_snapshots_are_removed(tmp_path, embed_model, monkeypatch):
+    names = [_persist(tmp_path, f"v{i}") for i in range(4)]
+
+    assert len(set(names)) == 4
+    assert _snapshot_dirs(tmp_path) == names[-2:]
+    assert (tmp_path / "CURRENT").read_text() == names[-1]
+    assert all(text.startswith("v3") for text in _load_fresh(tmp_path, monkeypatch))
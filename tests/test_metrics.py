@@ -0,0 +1,70 @@
+import pytest
+
+from shared.metrics import InMemorySink, Metrics, PrometheusFileSink, configure_metrics
+
+
+def _metrics(buckets=(0.1, 1.0)):
+    metrics = Metrics()
+    sink = metrics.add_sink(InMemorySink(buckets=buckets))
+    return metrics, sink
+
+
+def test_counters_and_histograms_accumulate_per_label_set():
+    metrics, sink = _metrics()
+    metrics.inc("requests_total", status="200")
+    metrics.inc("requests_total", 2, status="200")
+    metrics.inc("requests_total", status="429")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        metrics.observe("latency_seconds", value, op="get")
+
+    assert sink.counter("requests_total", status="200") == 3
+    assert sink.counter("requests_total", status="500") == 0
+    snapshot = sink.snapshot()
+    assert snapshot["counters"] == {'requests_total{status="200"}': 3.0, 'requests_total{status="429"}': 1.0}
+    latency = snapshot["histograms"]['latency_seconds{op="get"}']
+    assert latency["count"] == 4 and latency["sum"] == pytest.approx(3.65)
+    # Sınıra eşit değer o sınırın kovasına düşer (le)
+    assert latency["buckets"] == [2, 1, 1]
+
+    sink.reset()
+    assert sink.snapshot() == {"counters": {}, "histograms": {}}
+
+
+def test_render_prometheus_exposition():
+    metrics, sink = _metrics()
+    metrics.inc("docs_total", 2, source='a "quoted"\nname')
+    metrics.inc("docs_total")
+    metrics.observe("embed_seconds", 0.1)
+    metrics.observe("embed_seconds", 2.0)
+
+    assert sink.render_prometheus() == (
+        "# TYPE docs_total counter\n"
+        "docs_total 1\n"
+        'docs_total{source="a \\"quoted\\"\\nname"} 2\n'
+        "# TYPE embed_seconds histogram\n"
+        'embed_seconds_bucket{le="0.1"} 1\n'
+        'embed_seconds_bucket{le="1"} 1\n'
+        'embed_seconds_bucket{le="+Inf"} 2\n'
+        "embed_seconds_sum 2.1000000000000001\n"
+        "embed_seconds_count 2\n"
+    )
+
+
+def test_disabled_metrics_record_nothing_and_sinks_are_configured_from_spec(tmp_path):
+    metrics = Metrics()
+    metrics.inc("ignored")
+    with metrics.timer("ignored_seconds"):
+        pass
+    assert not metrics.enabled and not metrics.sinks
+
+    path = tmp_path / "gdocs.prom"
+    configure_metrics(f"memory, prometheus={path}", metrics)
+    memory, prometheus = metrics.sinks
+    assert type(memory) is InMemorySink and isinstance(prometheus, PrometheusFileSink)
+    with metrics.timer("step_seconds", stage="embed"):
+        pass
+    metrics.flush()
+    assert 'step_seconds_count{stage="embed"} 1' in path.read_text()
+
+    with pytest.raises(ValueError):
+        configure_metrics("statsd", Metrics())
@@ -0,0 +1,60 @@
+from llama_index.core import VectorStoreIndex
+
+from benchmarks.synthetic_docs import make_document
+from conftest import reader_config
+from google_docs.docs_reader import GoogleDocsConfigReader
+from shared.query_engine import embed_query, search_index
+from shared.vector_store import NumpyVectorStore
+
+
+def _corpus(count=3):
+    corpus = {f"doc-{i}": make_document(doc_id=f"doc-{i}", paragraphs=6, table_density=0.0, seed=i) for i in range(count)}
+    corpus["doc-1"]["body"]["content"].append(
+        {"paragraph": {"elements": [{"textRun": {"content": "Escalated as PROJ-4711 yesterday.\n"}}]}}
+    )
+    return corpus
+
+
+def _process(server, corpus, store, embed_model, **extra):
+    config = reader_config(server, corpus, **extra)
+    GoogleDocsConfigReader("test", config).process(store, None, "test", "task", embed_model=embed_model)
+
+
+def test_lexical_search_reads_index_written_by_process(tmp_path, docs_server, embed_model):
+    corpus = _corpus()
+    store = NumpyVectorStore(str(tmp_path / "store"))
+    _process(docs_server(corpus), corpus, store, embed_model)
+    index = VectorStoreIndex.from_vector_store(store, embed_model=embed_model)
+
+    hits = search_index(index, "PROJ-4711", mode="lexical")
+
+    assert hits and hits[0].doc_id == "doc-1"
+    assert "PROJ-4711" in hits[0].text
+
+
+def test_results_refresh_after_process_writes_to_same_store(tmp_path, docs_server, embed_model):
+    corpus = _corpus()
+    store = NumpyVectorStore(str(tmp_path / "store"))
+    manifest_path = str(tmp_path / "manifest.json")
+    server = docs_server(corpus)
+    _process(server, {"doc-0": corpus["doc-0"]}, store, embed_model, manifest_path=manifest_path)
+    index = VectorStoreIndex.from_vector_store(store, embed_model=embed_model)
+    assert search_index(index, "PROJ-4711", mode="lexical") == ()
+    assert {h.doc_id for h in search_index(index, "quarterly roadmap", top_k=50, mode="vector")} == {"doc-0"}
+
+    _process(server, corpus, store, embed_model, manifest_path=manifest_path)
+
+    hits = search_index(index, "PROJ-4711", mode="lexical")
+    assert hits and hits[0].doc_id == "doc-1"
+    assert {h.doc_id for h in search_index(index, "quarterly roadmap", top_k=50, mode="vector")} == set(corpus)
+
+
+def test_query_is_embedded_with_original_case(embed_model, monkeypatch):
+    embedded = []
+    monkeypatch.setattr(type(embed_model), "_get_query_embedding", lambda self, q: embedded.append(q) or [0.0] * 8)
+
+    first = embed_query("  Release   NOTES ")
+    second = embed_query("release notes")
+
+    assert embedded == ["Release NOTES"]
+    assert first == second
@@ -0,0 +1,119 @@
+import json
+import socket
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+import google_docs.rate_limit as rate_limit
+from google_docs.rate_limit import AdaptiveConcurrency, RateLimiter, RetryBudget, TokenBucket, is_retryable
+from shared.config import SETTINGS
+
+
+class _Clock:
+    """time modülünün yerine geçen sahte saat; sleep zamanı ilerletir."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(rate_limit, "time", fake)
+    return fake
+
+
+def _http_error(status, reason=None):
+    errors = [{"reason": reason}] if reason else []
+    content = json.dumps({"error": {"code": status, "message": "x", "errors": errors}}).encode()
+    return HttpError(httplib2.Response({"status": status}), content)
+
+
+def test_token_bucket_refills_at_rate_up_to_burst(clock):
+    bucket = TokenBucket(rate=10.0, burst=2)
+
+    assert bucket.acquire() == bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.1)
+
+    clock.now += 10.0
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.1)
+
+
+def test_token_bucket_pause_delays_callers(clock):
+    bucket = TokenBucket(rate=10.0, burst=5)
+    bucket.pause(2.0)
+
+    assert bucket.acquire() == pytest.approx(2.0)
+    assert bucket.acquire() == 0.0
+
+
+def test_adaptive_concurrency_additive_increase_multiplicative_decrease(clock):
+    limiter = AdaptiveConcurrency(initial=4, maximum=5, cooldown=1.0)
+
+    for _ in range(4):
+        limiter.on_success()
+    assert limiter.limit == 5
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.limit == 5
+
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.limit == 2, "throttles within the cooldown halve once"
+    clock.now += 1.5
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.limit == 1
+    clock.now += 1.5
+    limiter.on_throttle()
+    assert limiter.limit == 1
+
+
+def test_retry_budget_runs_out():
+    budget = RetryBudget(2)
+
+    assert budget.try_spend() and budget.try_spend()
+    assert not budget.try_spend()
+    assert budget.remaining == 0 and budget.used == 2
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (httplib2.ServerNotFoundError("Unable to find the server at docs.googleapis.com"), True),
+        (socket.gaierror(-3, "Temporary failure in name resolution"), True),
+        (ConnectionResetError(), True),
+        (TimeoutError(), True),
+        (_http_error(503), True),
+        (_http_error(429), True),
+        (_http_error(403, "rateLimitExceeded"), True),
+        (_http_error(403, "forbidden"), False),
+        (_http_error(404), False),
+        (ValueError("bad"), False),
+    ],
+)
+def test_is_retryable(error, expected):
+    assert is_retryable(error) is expected
+
+
+def test_default_concurrency_ceiling_matches_fetch_pools(monkeypatch):
+    monkeypatch.setattr(SETTINGS, "api_max_concurrency", None)
+    monkeypatch.setattr(SETTINGS, "fetch_max_workers", 4)
+    monkeypatch.setattr(SETTINGS, "scheduler_max_concurrency", 3)
+
+    assert RateLimiter.from_settings().concurrency.maximum == 12
+    monkeypatch.setattr(SETTINGS, "api_max_concurrency", 6)
+    assert RateLimiter.from_settings().concurrency.maximum == 6
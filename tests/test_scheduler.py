@@ -0,0 +1,179 @@
+import threading
+import time
+
+from shared.protocol import EmbeddingMethod, TaskCancelled
+from shared.scheduler import CANCELLED, DONE, FAILED, QUEUED, IngestionScheduler
+
+
+class _RecordingMethod(EmbeddingMethod):
+    """Başlayan görevleri kaydeder; gate açılana (ya da iptal istenene) kadar bekler."""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.lock = threading.Lock()
+        self.started = []
+        self.running = {}
+        self.max_running = {}
+        self.max_total = 0
+
+    def get_documents(self, *args, **kwargs):
+        return []
+
+    def create_nodes(self, documents):
+        return []
+
+    def process(self, vector_store, task_manager, data_source_id, task_id, **kwargs):
+        with self.lock:
+            self.started.append(kwargs.get("name", task_id))
+            self.running[data_source_id] = self.running.get(data_source_id, 0) + 1
+            self.max_running[data_source_id] = max(self.max_running.get(data_source_id, 0), self.running[data_source_id])
+            self.max_total = max(self.max_total, sum(self.running.values()))
+        try:
+            while self.gate is not None and not self.gate.wait(0.01):
+                if task_manager.is_cancelled(task_id):
+                    raise TaskCancelled(task_id)
+        finally:
+            with self.lock:
+                self.running[data_source_id] -= 1
+
+
+def _scheduler(tmp_path, **kwargs):
+    kwargs.setdefault("poll_interval", 0.01)
+    return IngestionScheduler(str(tmp_path / "scheduler.sqlite"), **kwargs)
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_global_and_per_source_limits(tmp_path):
+    gate = threading.Event()
+    method = _RecordingMethod(gate)
+    scheduler = _scheduler(tmp_path, max_concurrency=3, per_source_limit=1)
+    for source in ("a", "b"):
+        scheduler.register_source(source, method, None)
+    scheduler.register_source("c", method, None, limit=2)
+    tasks = [scheduler.submit(source) for source in ("a", "a", "b", "b", "c", "c", "c")]
+    scheduler.start()
+    try:
+        _wait_for(lambda: len(method.started) == 3)
+        time.sleep(0.05)
+        assert len(method.started) == 3
+        gate.set()
+        assert all(scheduler.wait(t, timeout=5)["status"] == DONE for t in tasks)
+    finally:
+        scheduler.close()
+    assert method.max_total == 3
+    assert method.max_running["a"] == method.max_running["b"] == 1
+    assert method.max_running["c"] <= 2
+
+
+def test_least_busy_source_then_priority_then_fifo(tmp_path):
+    gate = threading.Event()
+    method = _RecordingMethod(gate)
+    scheduler = _scheduler(tmp_path, max_concurrency=2, per_source_limit=2)
+    scheduler.register_source("a", method, None)
+    scheduler.register_source("b", method, None)
+    tasks = [
+        scheduler.submit("a", name="a1"),
+        scheduler.submit("a", name="a2"),
+        scheduler.submit("a", priority=5, name="a3"),
+        scheduler.submit("b", name="b1"),
+    ]
+    scheduler.start()
+    try:
+        _wait_for(lambda: len(method.started) == 2)
+        # a'nın en öncelikli görevi ilk sırada; ikinci slot çalışanı olmayan b'ye gider
+        assert method.started == ["a3", "b1"]
+        gate.set()
+        assert all(scheduler.wait(t, timeout=5)["status"] == DONE for t in tasks)
+    finally:
+        scheduler.close()
+    assert method.started[2:] == ["a1", "a2"]
+
+
+def test_cancel_queued_and_running_tasks(tmp_path):
+    method = _RecordingMethod(threading.Event())
+    scheduler = _scheduler(tmp_path, max_concurrency=1)
+    scheduler.register_source("a", method, None)
+    running = scheduler.submit("a", name="running")
+    queued = scheduler.submit("a", name="queued")
+    scheduler.start()
+    try:
+        _wait_for(lambda: method.started == ["running"])
+        assert scheduler.cancel(queued)
+        assert scheduler.status(queued)["status"] == CANCELLED
+        assert scheduler.cancel(running)
+        assert scheduler.wait(running, timeout=5)["status"] == CANCELLED
+        assert not scheduler.cancel(running)
+    finally:
+        scheduler.close()
+    assert method.started == ["running"]
+
+
+class _CheckpointMethod(_RecordingMethod):
+    """items'ı tek tek işler; fail_at'a ilk gelişte hata verir."""
+
+    def __init__(self, fail_at=None):
+        super().__init__()
+        self.fail_at = fail_at
+        self.processed = []
+
+    def process(self, vector_store, task_manager, data_source_id, task_id, items=(), **kwargs):
+        done = (task_manager.load_checkpoint(task_id) or {}).get("done", [])
+        for item in items:
+            if item in done:
+                continue
+            if item == self.fail_at:
+                self.fail_at = None
+                raise RuntimeError(f"boom at {item}")
+            self.processed.append(item)
+            done.append(item)
+            task_manager.save_checkpoint(task_id, {"done": done})
+            task_manager.report_progress(task_id, len(done), len(items))
+
+
+def test_failed_task_resumes_from_checkpoint(tmp_path):
+    method = _CheckpointMethod(fail_at=3)
+    scheduler = _scheduler(tmp_path)
+    scheduler.register_source("a", method, None)
+    task = scheduler.submit("a", items=[1, 2, 3, 4])
+    scheduler.start()
+    try:
+        failed = scheduler.wait(task, timeout=5)
+        assert failed["status"] == FAILED and "boom at 3" in failed["error"]
+        assert failed["checkpoint"] == {"done": [1, 2]}
+
+        assert scheduler.resume(task)
+        finished = scheduler.wait(task, timeout=5)
+    finally:
+        scheduler.close()
+    assert finished["status"] == DONE
+    assert finished["attempts"] == 2
+    assert (finished["items_done"], finished["items_total"]) == (4, 4)
+    assert method.processed == [1, 2, 3, 4]
+
+
+def test_running_tasks_are_requeued_after_crash(tmp_path):
+    crashed = _scheduler(tmp_path)
+    task = crashed.submit("a", items=[1, 2, 3])
+    # Görev çalışırken process kapanmış gibi: satır RUNNING, checkpoint yarım
+    crashed._conn.execute("UPDATE tasks SET status = 'running', attempts = 1 WHERE task_id = ?", (task,))
+    crashed._conn.commit()
+    crashed.save_checkpoint(task, {"done": [1]})
+    crashed.close()
+
+    method = _CheckpointMethod()
+    scheduler = _scheduler(tmp_path)
+    assert scheduler.status(task)["status"] == QUEUED
+    scheduler.register_source("a", method, None)
+    scheduler.start()
+    try:
+        finished = scheduler.wait(task, timeout=5)
+    finally:
+        scheduler.close()
+    assert finished["status"] == DONE
+    assert method.processed == [2, 3]
@@ -0,0 +1,56 @@
+import numpy as np
+from llama_index.core import Document
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+import shared.llama_utils as llama_utils
+import shared.vector_store as vector_store
+from shared.config import SETTINGS
+from shared.vector_store import NumpyVectorStore
+
+
+def _nodes(count, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(count, dim)).astype(np.float32)
+    return [TextNode(id_=f"n{i}", text=f"node {i}", embedding=v.tolist()) for i, v in enumerate(vectors)]
+
+
+def test_ann_query_returns_top_k_after_most_rows_deleted(tmp_path):
+    store = NumpyVectorStore(str(tmp_path / "store"), ann="ivf", ann_min_rows=200, ann_nlist=16, ann_nprobe=2)
+    nodes = _nodes(400)
+    store.add(nodes)
+    assert store.stats()["ann_lists"] == 16
+    deleted = [n.node_id for i, n in enumerate(nodes) if i % 10]
+    store.delete_nodes(deleted)
+
+    result = store.query(VectorStoreQuery(query_embedding=nodes[0].embedding, similarity_top_k=10))
+
+    assert len(result.ids) == 10
+    assert not set(result.ids) & set(deleted)
+    assert result.ids[0] == "n0"
+
+
+def test_settings_build_ann_store_for_app_indexes(tmp_path, embed_model, monkeypatch):
+    monkeypatch.setattr(vector_store, "_DEFAULT_STORES", {})
+    monkeypatch.setattr(SETTINGS, "vector_store", "numpy")
+    monkeypatch.setattr(SETTINGS, "index_persist_dir", str(tmp_path / "index"))
+    monkeypatch.setattr(SETTINGS, "ann", "ivf")
+    monkeypatch.setattr(SETTINGS, "ann_nlist", 4)
+    monkeypatch.setattr(SETTINGS, "ann_nprobe", 2)
+    monkeypatch.setattr(SETTINGS, "ann_min_rows", 8)
+    documents = [Document(id_=f"doc-{i}", text=f"Paragraph {i} about topic {i % 3}.") for i in range(12)]
+
+    index = llama_utils.create_index_from_documents(documents, persist_dir=SETTINGS.index_persist_dir)
+    store = index.vector_store
+
+    assert isinstance(store, NumpyVectorStore)
+    assert store.path == str(tmp_path / "index" / "vectors")
+    assert (store.ann, store.ann_nprobe) == ("ivf", 2)
+    assert store.stats()["ann_lists"] == 4
+    monkeypatch.setattr(llama_utils, "_LOADED_INDEXES", {})
+    loaded = llama_utils.load_persisted_index(SETTINGS.index_persist_dir)
+    assert loaded is not index and loaded.vector_store is store
+    assert len(loaded.as_retriever(similarity_top_k=3).retrieve("topic 1")) == 3
+
+    llama_utils.create_index_from_documents(documents[:5])
+    assert len(store.get_nodes()) == 5